@@ -1,3 +1,52 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import NEW_PASSWORD, PASSWORD, QueryBudget, QueryBudgetMixin
+
+
+class AccountsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Query budgets of the authentication and profile endpoints.
+    """
+
+    budgets = [
+        QueryBudget(
+            'register_user', 3, method='post', user=None, status_code=201,
+            data={
+                'first_name': 'New', 'last_name': 'User', 'email': 'new@example.com', 'password': PASSWORD,
+                'job_title': 'Buyer', 'company_name': 'Example', 'mobile_number': '+441234567890',
+            },
+        ),
+        QueryBudget(
+            'verify_user_email', 5, user=None, url_kwargs=lambda test: {'token': test.activation_token}
+        ),
+        QueryBudget(
+            'resend_verify_user_email', 3, method='post', user=None,
+            data=lambda test: {'email': test.inactive_user.email},
+        ),
+        QueryBudget(
+            'token_obtain_pair', 4, method='post', user=None,
+            data=lambda test: {'email': test.user.email, 'password': PASSWORD},
+        ),
+        QueryBudget('forgot_password', 2, method='post', user=None, data=lambda test: {'email': test.user.email}),
+        QueryBudget(
+            'restore_password', 2, method='put', user=None,
+            url_kwargs=lambda test: {'uid': test.user.id, 'token': test.password_reset_token},
+            data={'password': NEW_PASSWORD, 'password2': NEW_PASSWORD},
+        ),
+        QueryBudget('token_refresh', 1, method='post', data=lambda test: {'refresh': test.refresh_token}),
+        QueryBudget('logout_user', 6, method='post', data=lambda test: {'refresh': test.refresh_token}),
+        QueryBudget(
+            'change_password', 2, method='put',
+            data={'old_password': PASSWORD, 'password': NEW_PASSWORD, 'password2': NEW_PASSWORD},
+        ),
+        QueryBudget('retrieve_update_profile', 1),
+        QueryBudget(
+            'retrieve_update_profile', 2, method='put',
+            data={
+                'first_name': 'Updated', 'last_name': 'User', 'job_title': 'Manager', 'company_name': 'Example',
+                'mobile_number': '+441234567890',
+            },
+        ),
+        QueryBudget('retrieve_update_remove_profile_pic', 1),
+        QueryBudget('retrieve_update_remove_profile_pic', 1, method='delete'),
+    ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
 
-from administrator.models import SearchData, ViewData
+from administrator.models import SearchData, SearchEvent, ViewData
 
-admin.site.register([SearchData, ViewData])
+admin.site.register([SearchData, SearchEvent, ViewData])
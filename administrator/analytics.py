@@ -0,0 +1,241 @@
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction, close_old_connections, DatabaseError
+
+from administrator.constants import BACKPRESSURE_BLOCK, BACKPRESSURE_DROP, BACKPRESSURE_SAMPLE, BACKPRESSURE_POLICIES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANALYTICS_SINK_SETTINGS = {
+    'ASYNC': True,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 2,
+    'MAX_QUEUE_SIZE': 10000,
+    'BACKPRESSURE': BACKPRESSURE_DROP,
+    'BLOCK_TIMEOUT': 1,
+    'SAMPLE_RATE': 0.1,
+}
+
+_STOP = object()
+
+
+class AnalyticsSink:
+    """
+    Buffers analytics rows (unsaved model instances) in process and writes them with bulk_create
+    from a background thread.
+
+    A batch is written once it holds batch_size rows or flush_interval seconds after its first row,
+    whichever comes first. Pending rows are drained when the process exits.
+
+    Backpressure policies, applied when producers are faster than the database:
+        block: record() waits up to block_timeout seconds for room in the queue, then drops the row.
+        drop: rows are dropped while the queue is full.
+        sample: once the queue is half full only sample_rate of the rows are kept, rows are dropped
+            while the queue is full.
+
+    Attributes:
+        stats (dict): Counters of enqueued, dropped, written and failed rows.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=2, max_queue_size=10000, backpressure=BACKPRESSURE_DROP,
+                 block_timeout=1, sample_rate=0.1, run_async=True):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f'backpressure must be one of {BACKPRESSURE_POLICIES}, current value is {backpressure}')
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.backpressure = backpressure
+        self.block_timeout = block_timeout
+        self.sample_rate = sample_rate
+        self.run_async = run_async
+
+        self.stats = {'enqueued': 0, 'dropped': 0, 'written': 0, 'failed': 0}
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Creates a sink configured by the ANALYTICS_SINK setting.
+
+        Returns:
+            AnalyticsSink: The configured sink.
+        """
+        config = {**DEFAULT_ANALYTICS_SINK_SETTINGS, **getattr(settings, 'ANALYTICS_SINK', {})}
+        return cls(
+            batch_size=config['BATCH_SIZE'],
+            flush_interval=config['FLUSH_INTERVAL'],
+            max_queue_size=config['MAX_QUEUE_SIZE'],
+            backpressure=config['BACKPRESSURE'],
+            block_timeout=config['BLOCK_TIMEOUT'],
+            sample_rate=config['SAMPLE_RATE'],
+            run_async=config['ASYNC'],
+        )
+
+    def record(self, *instances):
+        """
+        Enqueues unsaved model instances to be written by the background thread.
+
+        When the sink is not asynchronous the instances are written immediately.
+
+        Args:
+            *instances (Model): The unsaved model instances.
+
+        Returns:
+            int: The number of instances accepted.
+        """
+        if not self.run_async:
+            self.write(list(instances))
+            return len(instances)
+
+        self.start()
+        accepted = sum(1 for instance in instances if self._put(instance))
+        self._count(enqueued=accepted, dropped=len(instances) - accepted)
+        return accepted
+
+    def _count(self, **counts):
+        # stats are updated by the request threads and the writer thread
+        with self._stats_lock:
+            for name, count in counts.items():
+                self.stats[name] += count
+
+    def _put(self, instance):
+        if self.backpressure == BACKPRESSURE_SAMPLE and self._queue.qsize() >= self.max_queue_size // 2:
+            if random.random() >= self.sample_rate:
+                return False
+
+        try:
+            if self.backpressure == BACKPRESSURE_BLOCK:
+                self._queue.put(instance, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(instance)
+        except queue.Full:
+            return False
+        return True
+
+    def start(self):
+        """
+        Starts the background writer thread, once per process.
+        """
+        if self._thread is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+
+            # A forked worker inherits the queue but not the thread, so it starts over.
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='analytics-sink', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def shutdown(self, timeout=10):
+        """
+        Stops the background thread after the pending rows have been written.
+
+        Args:
+            timeout (int): Seconds to wait for the pending rows to be written.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        stopped = False
+        while not stopped:
+            batch = []
+            try:
+                item = self._queue.get()
+            except Exception:  # pragma: no cover - the interpreter is shutting down
+                return
+
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            stopped = item is _STOP
+            if batch:
+                self.write(batch)
+                close_old_connections()
+
+    def write(self, instances):
+        """
+        Writes the instances with one bulk_create per model.
+
+        If a bulk write fails, for example because a referenced framework has been deleted in the
+        meantime, the instances of that model are saved one by one and the failing ones are skipped.
+
+        Args:
+            instances (list): The unsaved model instances.
+        """
+        instances_by_model = defaultdict(list)
+        for instance in instances:
+            instances_by_model[type(instance)].append(instance)
+
+        for model, model_instances in instances_by_model.items():
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(model_instances, batch_size=self.batch_size)
+                self._count(written=len(model_instances))
+            except DatabaseError:
+                logger.warning('Bulk write of %s %s rows failed, saving them one by one',
+                               len(model_instances), model.__name__, exc_info=True)
+                self._write_one_by_one(model_instances)
+
+    def _write_one_by_one(self, instances):
+        for instance in instances:
+            try:
+                with transaction.atomic():
+                    instance.save()
+                self._count(written=1)
+            except DatabaseError:
+                self._count(failed=1)
+                logger.exception('Could not write %s analytics row', type(instance).__name__)
+
+
+_analytics_sink = None
+_analytics_sink_lock = threading.Lock()
+
+
+def get_analytics_sink():
+    """
+    Returns the process wide analytics sink, created from the ANALYTICS_SINK setting.
+
+    Returns:
+        AnalyticsSink: The analytics sink.
+    """
+    global _analytics_sink
+    if _analytics_sink is None:
+        with _analytics_sink_lock:
+            if _analytics_sink is None:
+                _analytics_sink = AnalyticsSink.from_settings()
+    return _analytics_sink
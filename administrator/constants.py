@@ -1,2 +1,7 @@
 MONTHLY = 'monthly'
 YEARLY = 'yearly'
+
+BACKPRESSURE_BLOCK = 'block'
+BACKPRESSURE_DROP = 'drop'
+BACKPRESSURE_SAMPLE = 'sample'
+BACKPRESSURE_POLICIES = (BACKPRESSURE_BLOCK, BACKPRESSURE_DROP, BACKPRESSURE_SAMPLE)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from administrator.models import SearchData, SearchEvent
+
+
+class Command(BaseCommand):
+    """
+    Converts the SearchData rows into SearchEvent rows. Each batch of converted rows is deleted in the
+    transaction creating its events, so the command can be run again, e.g. after a failure, without
+    converting a row twice.
+    """
+
+    help = 'Convert the one row per result SearchData rows into one SearchEvent per search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000, dest='batch_size',
+            help='Number of SearchData rows read and SearchEvent rows written at once.'
+        )
+        parser.add_argument(
+            '--window', type=float, default=1, dest='window',
+            help='Rows of the same user saved within this many seconds belong to the same search.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options.get('batch_size')
+        window = timedelta(seconds=options.get('window'))
+
+        print('Converting search data ...')
+        rows = SearchData.objects.order_by('user_id', 'searched_date', 'id').values_list(
+            'id', 'user_id', 'framework_id', 'searched_date'
+        ).iterator(chunk_size=batch_size)
+
+        events = []
+        converted_ids = []
+        current = None
+        created = 0
+
+        for row_id, user_id, framework_id, searched_date in rows:
+            if current is None or current.user_id != user_id or searched_date - current.searched_date > window:
+                if current is not None:
+                    events.append(current)
+                current = SearchEvent(user_id=user_id, searched_date=searched_date, framework_ids=[])
+
+            if framework_id is not None:
+                current.framework_ids.append(framework_id)
+            current.total_count += 1
+            converted_ids.append(row_id)
+
+            if len(events) >= batch_size:
+                created += self.save(events, converted_ids[:-1])
+                events, converted_ids = [], converted_ids[-1:]
+
+        if current is not None:
+            events.append(current)
+        created += self.save(events, converted_ids)
+        print(f'Done, created {created} search events')
+
+    @staticmethod
+    def save(events, converted_ids):
+        if not events:
+            return 0
+
+        with transaction.atomic():
+            SearchEvent.objects.bulk_create(events)
+            SearchData.objects.filter(id__in=converted_ids).delete()
+        return len(events)
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Manager
+from django.utils import timezone
+
+from search.models import Framework
+
+
+class SearchEventManager(Manager):
+    """
+    Custom manager for the SearchEvent model.
+
+    Methods:
+        get_period(year, month=None): Returns the datetime range of a year or of a month.
+        count_searches_by(column, year, month=None, limit=3): Counts the searched frameworks grouped by a column.
+    """
+
+    @staticmethod
+    def get_period(year, month=None):
+        """
+        Returns the datetime range of a year, or of a month when month is given, in the current timezone.
+
+        Args:
+            year (int): The year.
+            month (int, optional): The month. Defaults to None.
+
+        Returns:
+            tuple: The inclusive start and exclusive end of the period.
+        """
+        if month is None:
+            start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+        else:
+            start = datetime(year, month, 1)
+            end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        return timezone.make_aware(start), timezone.make_aware(end)
+
+    def count_searches_by(self, column, year, month=None, limit=3):
+        """
+        Counts how often frameworks were returned by searches, grouped by a Framework column.
+
+        The framework ids array of every search is unnested in the database, so the count is the number
+        of search results like it was for SearchData.
+
+        Args:
+            column (str): The Framework column to group by, e.g. 'name' or 'industry_or_category'.
+            year (int): The year of the searches.
+            month (int, optional): The month of the searches. Defaults to None (the whole year).
+            limit (int): The number of groups to return. Defaults to 3.
+
+        Returns:
+            list: Tuples of column value and number of searches, most searched first. NULL values are left out.
+        """
+        column = Framework._meta.get_field(column).column
+        start, end = self.get_period(year, month)
+        sql = f'''
+            SELECT framework.{column}, COUNT(*) AS number_of_searches
+            FROM {self.model._meta.db_table} AS event
+            CROSS JOIN LATERAL unnest(event.framework_ids) AS searched(framework_id)
+            JOIN {Framework._meta.db_table} AS framework ON framework.id = searched.framework_id
+            WHERE event.searched_date >= %s AND event.searched_date < %s AND framework.{column} IS NOT NULL
+            GROUP BY framework.{column}
+            ORDER BY number_of_searches DESC
+            LIMIT %s
+        '''
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [start, end, limit])
+            return cursor.fetchall()
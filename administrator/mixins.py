@@ -5,8 +5,7 @@ from django.db.models.functions import ExtractMonth, ExtractYear
 from django.utils import timezone
 
 from administrator.constants import MONTHLY, YEARLY
-from administrator.models import SearchData
-from search.models import Framework
+from administrator.models import SearchEvent
 
 
 class SearchVolumeDataMixin:
@@ -45,7 +44,7 @@ class SearchVolumeDataMixin:
         duration_info = self.date_formats[duration]
         group_function = duration_info['group_function']
 
-        return SearchData.objects.annotate(
+        return SearchEvent.objects.annotate(
             group=group_function('searched_date')
         ).values('group').annotate(volume=Count('id'))
 
@@ -54,21 +53,16 @@ class SearchTopNamesMixin:
 
     def get_queryset(self):
         duration = self.get_duration()
-        filters = {'searched_date__year': timezone.now().year}
-        if duration == MONTHLY:
-            filters['searched_date__month'] = timezone.now().month
-
-        return SearchData.objects.filter(**filters).values('framework__name').annotate(
-            number_of_searches=Count('id')
-        ).order_by('-number_of_searches')[:3]
+        month = timezone.now().month if duration == MONTHLY else None
+        return SearchEvent.objects.count_searches_by('name', year=timezone.now().year, month=month)
 
     def format_data(self, queryset):
         return [
             {
-                'framework_name': item['framework__name'],
-                'number_of_searches': item['number_of_searches']
+                'framework_name': framework_name,
+                'number_of_searches': number_of_searches
             }
-            for item in queryset
+            for framework_name, number_of_searches in queryset
         ]
 
 
@@ -76,21 +70,14 @@ class SearchTopIndustriesMixin:
 
     def get_queryset(self):
         duration = self.get_duration()
-        filters = {'searchdata__searched_date__year': timezone.now().year}
-        if duration == MONTHLY:
-            filters['searchdata__searched_date__month'] = timezone.now().month
-
-        return Framework.objects.filter(
-            searchdata__isnull=False, industry_or_category__isnull=False, **filters
-        ).values('industry_or_category').annotate(
-            number_of_searches=Count('searchdata')
-        ).order_by('-number_of_searches')[:3]
+        month = timezone.now().month if duration == MONTHLY else None
+        return SearchEvent.objects.count_searches_by('industry_or_category', year=timezone.now().year, month=month)
 
     def format_data(self, queryset):
         return [
             {
-                'industry': item['industry_or_category'],
-                'number_of_searches': item['number_of_searches']
+                'industry': industry,
+                'number_of_searches': number_of_searches
             }
-            for item in queryset
+            for industry, number_of_searches in queryset
         ]
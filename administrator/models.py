@@ -1,6 +1,10 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.utils import timezone
 
 from accounts.models import User
+from administrator.managers import SearchEventManager
+from search.constants import QUERY_TYPE_CHOICES
 from search.models import Framework
 
 
@@ -15,6 +19,34 @@ class SearchData(models.Model):
         return f'{self.user.first_name} {self.user.last_name} searched "{self.framework.name}"'
 
 
+class SearchEvent(models.Model):
+    """
+    Model representing one search made by a user, replacing the one row per result of SearchData.
+
+    Fields:
+        user (ForeignKey): The user who searched.
+        searched_date (DateTimeField): The time of the search.
+        query (TextField): The normalized (lowercase, single spaced) search text.
+        query_type (CharField): The query type of the search, blank for migrated SearchData rows.
+        filters (JSONField): The non-empty filters and preference frameworks of the search.
+        total_count (IntegerField): The number of frameworks matching the search.
+        framework_ids (ArrayField): The ids of the returned frameworks in ranking order.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    searched_date = models.DateTimeField(default=timezone.now, db_index=True)
+    query = models.TextField(blank=True, default='')
+    query_type = models.CharField(max_length=20, choices=QUERY_TYPE_CHOICES, blank=True, default='')
+    filters = models.JSONField(default=dict, blank=True)
+    total_count = models.IntegerField(default=0)
+    framework_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+
+    objects = SearchEventManager()
+
+    def __str__(self):
+        return f'{self.user} searched "{self.query}" ({self.total_count} results)'
+
+
 class ViewData(models.Model):
     framework = models.ForeignKey(Framework, on_delete=models.SET_NULL, null=True)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -1,3 +1,45 @@
+import contextlib
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from administrator.constants import MONTHLY
+from administrator.models import SearchData, SearchEvent
+from core.testing import QueryBudget, QueryBudgetMixin
+
+
+class MigrateSearchDataTests(TestCase):
+    def test_run_again(self):
+        user = User.objects.create_user(email='user@example.com', password='Password#1')
+        rows = SearchData.objects.bulk_create([SearchData(user=user) for _ in range(3)])
+        # searched_date is auto_now_add, a second search a minute later
+        SearchData.objects.filter(id=rows[2].id).update(searched_date=timezone.now() + timedelta(minutes=1))
+
+        # the command prints its progress
+        with contextlib.redirect_stdout(io.StringIO()):
+            call_command('migrate_search_data', batch_size=1)
+            call_command('migrate_search_data', batch_size=1)
+
+        self.assertEqual(sorted(SearchEvent.objects.values_list('total_count', flat=True)), [1, 2])
+        self.assertFalse(SearchData.objects.exists())
+
+
+class AdministratorQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Query budgets of the administrator endpoints, called as a staff user.
+    """
 
-# Create your tests here.
+    budgets = [
+        QueryBudget('clicked data', 2, method='post', data={'duration': MONTHLY}, user='staff_user'),
+        QueryBudget('search-top-3-names', 2, method='post', data={'duration': MONTHLY}, user='staff_user'),
+        QueryBudget('top_industries', 2, method='post', data={'duration': MONTHLY}, user='staff_user'),
+        QueryBudget(
+            'admin_framework_search', 2, method='post', user='staff_user', max_es_calls=0,
+            data=lambda test: {'frameworks': [test.framework.name]},
+        ),
+        QueryBudget('admin_framework_detail', 5, url_kwargs=lambda test: {'framework_id': test.framework.id}),
+    ]
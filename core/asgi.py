@@ -8,9 +8,12 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 """
 
 import os
-
+import dotenv
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+dotenv.load_dotenv()
+
+settings_module_name = os.environ.get('SETTINGS_MODULE_NAME')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'core.settings.{settings_module_name}')
 
 application = get_asgi_application()
@@ -0,0 +1,50 @@
+import codecs
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from core.renderers import ORJSONRenderer
+
+# orjson parses the integers beyond 64 bits as floats, Python as integers
+MAX_ORJSON_INTEGER = 2 ** 63
+
+
+def has_large_float(value):
+    """
+    Returns whether parsed JSON holds a float beyond the range of the 64 bits integers.
+    """
+    value_type = type(value)
+    if value_type is float:
+        return not -MAX_ORJSON_INTEGER < value < MAX_ORJSON_INTEGER
+    if value_type is dict:
+        return any(map(has_large_float, value.values()))
+    if value_type is list:
+        return any(map(has_large_float, value))
+    return False
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser decoding with orjson, with the same result as JSONParser.
+
+    The body is parsed by JSONParser instead when orjson rejects it, so invalid bodies raise the same
+    ParseError messages.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        body = stream.read()
+        try:
+            data = orjson.loads(body if codecs.lookup(encoding).name == 'utf-8' else body.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            pass
+        else:
+            if not has_large_float(data):
+                return data
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,59 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+# Python writes the floats out of this range in exponent notation, which orjson formats differently
+# (1e16 for 1e+16, 0.00001 for 1e-05), within it both write the shortest repr
+MIN_DECIMAL_FLOAT = 1e-4
+MAX_DECIMAL_FLOAT = 1e16
+
+
+def has_exponent_float(value):
+    """
+    Returns whether value holds, in its lists, tuples and dictionaries, a float that Python writes in
+    exponent notation, or NaN or an infinity.
+    """
+    value_type = type(value)
+    if value_type is str or value_type is int:
+        return False
+    if value_type is float:
+        return value != 0 and not MIN_DECIMAL_FLOAT <= abs(value) < MAX_DECIMAL_FLOAT
+    if isinstance(value, dict):
+        return any(map(has_exponent_float, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(has_exponent_float, value))
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, with the same output as JSONRenderer. JSONRenderer renders the
+    data instead when the orjson output would differ, e.g. with an indent or floats in exponent notation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.compact or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context or {}) \
+                or has_exponent_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+
+        def default(obj):
+            value = encoder.default(obj)
+            if has_exponent_float(value):
+                # orjson raises a JSONEncodeError, and the data is rendered by JSONRenderer
+                raise TypeError(f'{obj!r} converts to a float in exponent notation')
+            return value
+
+        try:
+            ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # We always fully escape \u2028 and \u2029 to ensure we output JSON
+        # that is a strict javascript subset, like JSONRenderer.
+        # See: https://gist.github.com/damncabbage/623b879af56f850a6ddc
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its total includes the other middleware, not loaded when REQUEST_TIMING is 'off'
+    'core.timing.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -109,8 +112,73 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'EXCEPTION_HANDLER': 'core.utils.custom_exception_handler',
+    # same output as rest_framework.renderers.JSONRenderer and rest_framework.parsers.JSONParser, encoded with orjson
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# manage.py test
+TESTING = sys.argv[1:2] == ['test']
+
+# Search analytics, written in batches by administrator.analytics.AnalyticsSink
+ANALYTICS_SINK = {
+    'ASYNC': not TESTING,  # False writes the rows inside the request, in the transaction of the test case
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 2,  # seconds
+    'MAX_QUEUE_SIZE': 10000,
+    'BACKPRESSURE': 'drop',  # 'block', 'drop' or 'sample'
+    'BLOCK_TIMEOUT': 1,  # seconds, used by 'block'
+    'SAMPLE_RATE': 0.1,  # used by 'sample'
 }
 
+# Alias in CACHES shared by the web workers and the management commands, e.g. a FileBasedCache or DatabaseCache.
+# It holds the index generation, see search.generation, without it the processes do not see the changes of the others
+# and the in-process indexes are rebuilt every search.generation.MAX_AGE seconds instead
+SEARCH_SHARED_CACHE = None
+
+# Search results cache, see search.cache.SearchResultCache, requires SEARCH_SHARED_CACHE
+SEARCH_RESULT_CACHE = {
+    'ENABLED': False,
+    'MAX_ENTRIES': 1024,  # entries of the in-process tier
+    'TIMEOUT': 300,  # seconds
+    'NEGATIVE_TIMEOUT': 60,  # seconds, for results without hits
+}
+
+# Per request timing of the search stages and database queries, see core.timing.ServerTimingMiddleware:
+# 'off', 'header' (Server-Timing response header), 'log' (JSON line on the core.timing logger) or 'both'
+REQUEST_TIMING = 'off'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Serve framework name and number suggestions from the in-process search.autocomplete indexes
+SEARCH_AUTOCOMPLETE_INDEX = True
+
+# Framework index updates are written to the search.models.IndexOutbox table in the transaction of the change,
+# and applied by the process_index_outbox command
+ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = 'search.outbox.OutboxSignalProcessor'
+
 # User model
 AUTH_USER_MODEL = 'accounts.User'
 
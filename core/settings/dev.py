@@ -42,4 +42,8 @@ ELASTICSEARCH_DSL = {
 }
 
 FRAMEWORK_INDEX_NAME = os.environ.get('FRAMEWORK_INDEX_NAME')
+SEARCH_HYDRATION_MODE = os.environ.get('SEARCH_HYDRATION_MODE', 'database')
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'elasticsearch')
+SEARCH_RANKING_ENGINE = os.environ.get('SEARCH_RANKING_ENGINE', 'elasticsearch')
+REQUEST_TIMING = os.environ.get('REQUEST_TIMING', 'off')
 INQUIRY_EMAIL = os.environ.get('INQUIRY_EMAIL')
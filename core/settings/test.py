@@ -0,0 +1,20 @@
+from core.settings.dev import *
+
+
+class DisableMigrations:
+    """
+    The repository ships no migrations, so the test database is created from the models.
+    """
+
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = DisableMigrations()
+
+# the searches of the tests run on the in-process memory index, Elasticsearch is not needed
+SEARCH_BACKEND = 'memory'
+ELASTICSEARCH_DSL_AUTOSYNC = False
@@ -0,0 +1,322 @@
+import contextlib
+import importlib
+import pkgutil
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from elasticsearch import AsyncTransport, Transport
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from administrator.analytics import get_analytics_sink
+from administrator.models import SearchEvent
+from search.cache import get_search_result_cache
+from search.constants import QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_SEARCH_ALL
+from search.generation import index_generation
+from search.ingestion import FrameworkLoader
+from search.models import Framework, FrameworkValue, Preference
+from search.synthetic import SyntheticCatalog
+from survey.models import (
+    BusinessPercentage, Category, Industry, InterestedCountry, PublicSectorBusinessTerritory, PublicSectorCountry,
+    PublicSectorLanguage, Sector, Survey, Turnover
+)
+
+# namespaces of core.urls which are not API endpoints
+EXCLUDED_URL_NAMESPACES = {'admin'}
+
+PASSWORD = 'Budget#Password1'
+NEW_PASSWORD = 'Budget#Password2'
+CATALOG_SIZE = 30
+
+
+class QueryBudget:
+    """
+    The maximum number of database queries, and optionally of Elasticsearch requests, of one request shape of
+    an endpoint, checked by QueryBudgetMixin.
+
+    Attributes:
+        url_name (str): The name of the URL pattern of the endpoint.
+        max_queries (int): The maximum number of database queries of the request.
+        method (str): The HTTP method.
+        data (dict or callable): The request body, or a callable returning it from the test case.
+        url_kwargs (dict or callable): The URL kwargs, or a callable returning them from the test case.
+        user (str): The test case attribute holding the user the request is authenticated as with a JWT
+            access token, None for an anonymous request.
+        max_es_calls (int): The maximum number of Elasticsearch requests, None to not count them.
+        status_code (int): The expected status code of the response.
+        shape (str): The name of the parameter shape, shown in the failures.
+        known_issue (str): The known cause of queries over max_queries, e.g. an N+1 pattern not fixed yet.
+            The request is then expected to go over max_queries, and the test fails once it does not, so
+            the marker is removed with the fix.
+    """
+
+    def __init__(self, url_name, max_queries, method='get', data=None, url_kwargs=None, user='user',
+                 max_es_calls=None, status_code=200, shape='default',
+                 known_issue=None):
+        self.url_name = url_name
+        self.max_queries = max_queries
+        self.method = method
+        self.data = data
+        self.url_kwargs = url_kwargs
+        self.user = user
+        self.max_es_calls = max_es_calls
+        self.status_code = status_code
+        self.shape = shape
+        self.known_issue = known_issue
+
+    def __str__(self):
+        return f'{self.method.upper()} {self.url_name} ({self.shape})'
+
+    @staticmethod
+    def resolve(value, test_case):
+        return value(test_case) if callable(value) else value
+
+    def get_url(self, test_case):
+        return reverse(self.url_name, kwargs=self.resolve(self.url_kwargs, test_case))
+
+    def get_data(self, test_case):
+        return self.resolve(self.data, test_case)
+
+
+@contextlib.contextmanager
+def count_elasticsearch_requests():
+    """
+    Records the requests sent to Elasticsearch by the sync and async clients, which are still sent.
+
+    Usage:
+        with count_elasticsearch_requests() as requests:
+            search.execute()
+        assert len(requests) == 1
+
+    Yields:
+        list: The (method, url) pairs of the requests, filled while the block runs.
+    """
+    requests = []
+
+    def record(perform_request):
+        def wrapper(transport, method, url, *args, **kwargs):
+            requests.append((method, url))
+            return perform_request(transport, method, url, *args, **kwargs)
+        return wrapper
+
+    with mock.patch.object(Transport, 'perform_request', record(Transport.perform_request)), \
+            mock.patch.object(AsyncTransport, 'perform_request', record(AsyncTransport.perform_request)):
+        yield requests
+
+
+def get_api_url_names(urlconf=None):
+    """
+    Returns the names of the URL patterns of urlconf, ROOT_URLCONF by default, outside of
+    EXCLUDED_URL_NAMESPACES.
+
+    Returns:
+        set: The URL names.
+    """
+    def iter_url_names(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.namespace not in EXCLUDED_URL_NAMESPACES:
+                    yield from iter_url_names(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                yield pattern.name
+
+    return set(iter_url_names(get_resolver(urlconf).url_patterns))
+
+
+def get_query_budget_test_cases():
+    """
+    Imports the tests module or package of every app of the project and returns their QueryBudgetMixin
+    test cases.
+
+    Returns:
+        list: The test case classes.
+    """
+    for app_config in apps.get_app_configs():
+        if not app_config.path.startswith(str(settings.BASE_DIR)):
+            continue
+        try:
+            tests = importlib.import_module(f'{app_config.name}.tests')
+        except ModuleNotFoundError:
+            continue
+        for module in pkgutil.iter_modules(getattr(tests, '__path__', []), prefix=f'{tests.__name__}.'):
+            importlib.import_module(module.name)
+
+    test_cases, pending = [], [QueryBudgetMixin]
+    while pending:
+        subclasses = pending.pop().__subclasses__()
+        test_cases.extend(subclasses)
+        pending.extend(subclasses)
+    return test_cases
+
+
+class QueryBudgetMixin:
+    """
+    Mixin of the django.test.TestCase subclasses checking the database queries, and optionally the
+    Elasticsearch requests, of the endpoints against their QueryBudget entries. Every request is sent
+    twice against the data of seed_data(), with the memory search backend, and the second one is counted.
+
+    Attributes:
+        budgets (list): The QueryBudget entries of the endpoints.
+    """
+
+    budgets = []
+
+    @classmethod
+    def setUpClass(cls):
+        budget_settings = override_settings(
+            SEARCH_BACKEND='memory',
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            INQUIRY_EMAIL='inquiry@example.com',
+        )
+        budget_settings.enable()
+        cls.addClassCleanup(budget_settings.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seed_data()
+
+    @classmethod
+    def seed_data(cls):
+        """
+        Creates the data the budgets run against, as attributes of the test case.
+        """
+        cls.user = User.objects.create_user(
+            email='user@example.com', password=PASSWORD, first_name='Budget', last_name='User',
+            job_title='Buyer', company_name='Example', mobile_number='+441234567890', is_survey_completed=True,
+        )
+        cls.staff_user = User.objects.create_user(
+            email='staff@example.com', password=PASSWORD, first_name='Budget', last_name='Staff',
+            is_staff=True, is_survey_completed=True,
+        )
+        cls.inactive_user = User.objects.create_user(email='inactive@example.com', password=PASSWORD, is_active=False)
+        cls.activation_token = cls.inactive_user.generate_activation_token()
+        cls.password_reset_token = PasswordResetTokenGenerator().make_token(cls.user)
+
+        cls.survey_options = {
+            'country': InterestedCountry.objects.create(name='United Kingdom'),
+            'turnover': Turnover.objects.create(minimum_turnover=1, maximum_turnover=5),
+            'business_percentage': BusinessPercentage.objects.create(value='10'),
+            'industry': Industry.objects.create(name='Construction'),
+            'category': Category.objects.create(name='Buildings'),
+            'sector': Sector.objects.create(name='Public'),
+        }
+        cls.survey_lists = {
+            'public_sector_languages': PublicSectorLanguage.objects.bulk_create(
+                [PublicSectorLanguage(name=name) for name in ('English', 'French', 'German')]
+            ),
+            'public_sector_countries': PublicSectorCountry.objects.bulk_create(
+                [PublicSectorCountry(name=name) for name in ('England', 'Scotland', 'Wales')]
+            ),
+            'public_sector_business_territories': PublicSectorBusinessTerritory.objects.bulk_create(
+                [PublicSectorBusinessTerritory(name=name) for name in ('North', 'South', 'East')]
+            ),
+        }
+        for user in (cls.user, cls.staff_user):
+            survey = Survey.objects.create(user=user, **cls.survey_options)
+            for name, options in cls.survey_lists.items():
+                getattr(survey, name).set(options)
+
+        FrameworkLoader().load(SyntheticCatalog(seed=0).generate(CATALOG_SIZE))
+        # bulk_create sends no post_save signal
+        index_generation.bump()
+        cls.frameworks = list(Framework.objects.order_by('id'))
+        cls.framework = cls.frameworks[0]
+
+        FrameworkValue.objects.bulk_create([
+            FrameworkValue(value='Up to 1M', minimum_value=None, maximum_value=1000000),
+            FrameworkValue(value='1M to 10M', minimum_value=1000001, maximum_value=10000000),
+            FrameworkValue(value='Over 10M', minimum_value=10000001, maximum_value=None),
+        ])
+        cls.preferences = [
+            Preference.objects.create(user=cls.user, framework=framework) for framework in cls.frameworks[:3]
+        ]
+
+        cls.refresh_token = str(RefreshToken.for_user(cls.user))
+        cls.access_tokens = {
+            name: str(RefreshToken.for_user(getattr(cls, name)).access_token) for name in ('user', 'staff_user')
+        }
+
+        now = timezone.now()
+        SearchEvent.objects.bulk_create([
+            SearchEvent(
+                user=cls.user,
+                searched_date=now - timedelta(days=index),
+                query=framework.name.lower(),
+                query_type=QUERY_TYPE_CHOICE_BY_NAME if index % 2 else QUERY_TYPE_CHOICE_SEARCH_ALL,
+                total_count=1,
+                framework_ids=[framework.id],
+            )
+            for index, framework in enumerate(cls.frameworks)
+        ])
+
+    def setUp(self):
+        super().setUp()
+        for target, attribute in ((get_search_result_cache(), 'enabled'), (get_analytics_sink(), 'run_async')):
+            patcher = mock.patch.object(target, attribute, False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_query_budgets(self):
+        for budget in self.budgets:
+            with self.subTest(budget=str(budget)):
+                self.assertWithinBudget(budget)
+
+    def send(self, budget):
+        """
+        Sends the request of budget in a transaction which is rolled back, and counts its queries.
+
+        Returns:
+            tuple: The response, the captured queries and the Elasticsearch requests.
+        """
+        client = APIClient()
+        if budget.user:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_tokens[budget.user]}')
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries, count_elasticsearch_requests() as es_requests:
+                response = getattr(client, budget.method)(
+                    budget.get_url(self), budget.get_data(self), format='json'
+                )
+            transaction.set_rollback(True)
+        return response, queries, es_requests
+
+    def assertWithinBudget(self, budget):
+        # warms the process caches up
+        self.send(budget)
+        response, queries, es_requests = self.send(budget)
+
+        self.assertEqual(
+            response.status_code, budget.status_code,
+            f'{budget} returned {response.status_code}: {getattr(response, "data", response.content)}'
+        )
+        if budget.known_issue:
+            self.assertGreater(
+                len(queries), budget.max_queries,
+                f'{budget} ran {len(queries)} queries, within its budget of {budget.max_queries}: '
+                f'"{budget.known_issue}" is fixed, remove its known_issue'
+            )
+        else:
+            self.assertLessEqual(
+                len(queries), budget.max_queries,
+                f'{budget} ran {len(queries)} queries, over its budget of {budget.max_queries}:\n' + '\n'.join(
+                    f'{index}. {query["sql"]}' for index, query in enumerate(queries.captured_queries, start=1)
+                )
+            )
+        if budget.max_es_calls is not None:
+            self.assertLessEqual(
+                len(es_requests), budget.max_es_calls,
+                f'{budget} sent {len(es_requests)} Elasticsearch requests, over its budget of '
+                f'{budget.max_es_calls}: {es_requests}'
+            )
+
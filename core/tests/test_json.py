@@ -0,0 +1,48 @@
+import datetime
+import decimal
+import io
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONTests(SimpleTestCase):
+    """
+    Tests that ORJSONRenderer and ORJSONParser have the output of JSONRenderer and JSONParser.
+    """
+
+    def assertSameRendering(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_render(self):
+        self.assertSameRendering({'data': [{'id': 1, 'name': 'Cloud \u2028 hosting ✓', 'value': None}], 'page': 1})
+        self.assertSameRendering([0.1, -0.0, 1e-4, 1e15, 1e16, 1e-5, 2 ** 64, {1: True}])
+        self.assertSameRendering({
+            'date': datetime.date(2023, 1, 1),
+            'datetime': datetime.datetime(2023, 1, 1, 10, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'decimals': [decimal.Decimal('12.50'), decimal.Decimal('1E+20')],
+            'message': gettext_lazy('Search'),
+            'values': {'Buildings': 2, 'IT': 1}.keys(),
+        })
+        self.assertEqual(
+            ORJSONRenderer().render({'a': 1}, 'application/json; indent=2'),
+            JSONRenderer().render({'a': 1}, 'application/json; indent=2'),
+        )
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render({'score': float('nan')})
+
+    def test_parse(self):
+        for body in [b'{"query": {"value": "cloud"}, "page": 1, "facets": true}', b'[18446744073709551616, 1e400]']:
+            self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        self.assertIsInstance(ORJSONParser().parse(io.BytesIO(b'[18446744073709551616]'))[0], int)
+        for body in [b'{"a": NaN}', b'{"a": ']:
+            with self.assertRaises(ParseError) as expected:
+                JSONParser().parse(io.BytesIO(body))
+            with self.assertRaisesMessage(ParseError, str(expected.exception)):
+                ORJSONParser().parse(io.BytesIO(body))
@@ -0,0 +1,9 @@
+from django.test import SimpleTestCase
+
+from core.testing import get_api_url_names, get_query_budget_test_cases
+
+
+class QueryBudgetCoverageTests(SimpleTestCase):
+    def test_every_endpoint_has_a_budget(self):
+        budgeted = {budget.url_name for test_case in get_query_budget_test_cases() for budget in test_case.budgets}
+        self.assertEqual(get_api_url_names() - budgeted, set(), 'Endpoints without a QueryBudget')
@@ -0,0 +1,49 @@
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.timing import NULL_STAGE, RequestTimer, ServerTimingMiddleware, current_stage, current_timer, timed
+
+
+class RequestTimingTests(SimpleTestCase):
+    """
+    Tests the stage durations of timed() and the report of ServerTimingMiddleware.
+    """
+
+    def test_timed(self):
+        self.assertIs(timed('search'), NULL_STAGE)
+
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            with timed('result'):
+                time.sleep(0.01)
+                with timed('hydrate'):
+                    time.sleep(0.02)
+            with timed('hydrate'):
+                pass
+        finally:
+            current_timer.reset(token)
+
+        self.assertEqual(list(timer.stages), ['hydrate', 'result'])
+        self.assertGreaterEqual(timer.stages['hydrate'], 0.02)
+        self.assertGreaterEqual(timer.stages['result'], 0.01)
+        self.assertLess(timer.stages['result'], 0.02)
+        self.assertIsNone(current_stage.get())
+
+    def test_middleware(self):
+        def get_response(request):
+            with timed('search'):
+                return HttpResponse()
+
+        with override_settings(REQUEST_TIMING='off'), self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(get_response)
+
+        with override_settings(REQUEST_TIMING='header'):
+            response = ServerTimingMiddleware(get_response)(RequestFactory().get('/search/framework/'))
+        self.assertRegex(
+            response['Server-Timing'], r'^search;dur=\d+\.\d{3}, db;dur=0\.000;desc="0 queries", total;dur=\d+\.\d{3}$'
+        )
+        self.assertIsNone(current_timer.get())
@@ -0,0 +1,233 @@
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMING_OFF = 'off'
+REQUEST_TIMING_HEADER = 'header'
+REQUEST_TIMING_LOG = 'log'
+REQUEST_TIMING_BOTH = 'both'
+
+# timer of the request being served, None when the timing is disabled or outside of a request
+current_timer = contextvars.ContextVar('current_timer', default=None)
+# innermost stage being timed, its nested stages are subtracted from its own duration
+current_stage = contextvars.ContextVar('current_stage', default=None)
+
+NULL_STAGE = contextlib.nullcontext()
+
+
+class Stage:
+    """
+    Stage of a request being timed, entered with the with statement.
+
+    The duration recorded for the stage excludes the stages nested in it, so the stages of a request do
+    not overlap and add up to at most the total duration.
+    """
+
+    __slots__ = ('timer', 'name', 'started', 'nested_duration', 'token')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.nested_duration = 0.0
+
+    def __enter__(self):
+        self.token = current_stage.set(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.started
+        current_stage.reset(self.token)
+        if (parent := current_stage.get()) is not None:
+            parent.nested_duration += duration
+        # nested stages run concurrently by asyncio.gather() may add up to more than the stage
+        self.timer.add(self.name, max(duration - self.nested_duration, 0.0))
+
+
+class RequestTimer:
+    """
+    Collects the durations of the stages of a request, and the number and duration of its database queries.
+
+    Attributes:
+        started (float): The perf_counter() value at the start of the request.
+        stages (dict): Mapping of stage name to its duration in seconds, in order of first completion.
+        db_queries (int): The number of database queries.
+        db_duration (float): The duration of the database queries in seconds.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.db_queries = 0
+        self.db_duration = 0.0
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def add(self, name, duration):
+        """
+        Adds duration seconds to the stage name, stages run several times in a request are summed.
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + duration
+
+    def get_duration(self):
+        return time.perf_counter() - self.started
+
+    def get_server_timing(self, duration):
+        """
+        Formats the Server-Timing header value, with the durations in milliseconds.
+
+        Args:
+            duration (float): The total duration of the request in seconds.
+
+        Returns:
+            str: The header value.
+        """
+        metrics = [f'{name};dur={stage_duration * 1000:.3f}' for name, stage_duration in self.stages.items()]
+        metrics.append(f'db;dur={self.db_duration * 1000:.3f};desc="{self.db_queries} queries"')
+        metrics.append(f'total;dur={duration * 1000:.3f}')
+        return ', '.join(metrics)
+
+    def get_log_record(self, request, response, duration):
+        """
+        Returns the fields of the structured log line of the request, with the durations in milliseconds.
+        """
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(duration * 1000, 3),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_duration * 1000, 3),
+            'stages_ms': {name: round(stage_duration * 1000, 3) for name, stage_duration in self.stages.items()},
+        }
+
+
+def timed(name):
+    """
+    Times a stage of the current request.
+
+    Usage:
+        with timed('search'):
+            response = search.execute()
+
+    Returns:
+        The context manager of the stage, which does nothing when the request timing is disabled.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        return NULL_STAGE
+    return timer.stage(name)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting the queries of the current request and their duration.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.db_queries += 1
+        timer.db_duration += time.perf_counter() - started
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    """
+    Adds record_query() to the execute wrappers of a database connection, once.
+
+    Connections are per thread, so this runs for every new connection, including the ones of the worker
+    threads of sync_to_async(), which inherit the timer of the request.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def get_request_timing():
+    """
+    Returns the REQUEST_TIMING setting: REQUEST_TIMING_OFF, REQUEST_TIMING_HEADER, REQUEST_TIMING_LOG or
+    REQUEST_TIMING_BOTH.
+    """
+    return getattr(settings, 'REQUEST_TIMING', REQUEST_TIMING_OFF)
+
+
+class ServerTimingMiddleware:
+    """
+    Times every request, the stages timed with timed() and its database queries, and reports them in a
+    Server-Timing header and/or as one JSON line on the core.timing logger, depending on the REQUEST_TIMING
+    setting. It is first in MIDDLEWARE, so the total includes the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.mode = get_request_timing()
+        if self.mode == REQUEST_TIMING_OFF:
+            raise MiddlewareNotUsed
+        if self.mode not in (REQUEST_TIMING_HEADER, REQUEST_TIMING_LOG, REQUEST_TIMING_BOTH):
+            raise ValueError(f'Invalid REQUEST_TIMING setting {self.mode}')
+
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # marks the instance as a coroutine function for the handler, like django.utils.deprecation.MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+        connection_created.connect(install_query_recorder, dispatch_uid='core.timing.install_query_recorder')
+        for connection in connections.all():
+            install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.report(timer, request, response)
+        return response
+
+    async def __acall__(self, request):
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        self.report(timer, request, response)
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Times the rendering of the DRF responses, which the handler renders once the template response
+        middleware have run, and this one runs last as the first middleware.
+        """
+        if (timer := current_timer.get()) is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timer.add('render', time.perf_counter() - started))
+        return response
+
+    def report(self, timer, request, response):
+        duration = timer.get_duration()
+        if self.mode in (REQUEST_TIMING_HEADER, REQUEST_TIMING_BOTH):
+            response['Server-Timing'] = timer.get_server_timing(duration)
+        if self.mode in (REQUEST_TIMING_LOG, REQUEST_TIMING_BOTH):
+            logger.info(json.dumps(timer.get_log_record(request, response, duration)))
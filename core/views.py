@@ -0,0 +1,128 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from core.utils import custom_exception_handler
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of rest_framework.views.APIView, served without blocking a worker thread
+    when the project runs on the ASGI entry point (core.asgi).
+
+    Authenticates the JWT access token with the async ORM, checks permission_classes and returns
+    JsonResponse objects, with the error responses of core.utils.custom_exception_handler.
+
+    Attributes:
+        permission_classes (list): DRF permission classes, checked in memory once the user is loaded.
+    """
+
+    permission_classes = []
+    authentication = JWTAuthentication()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.authenticate(request)
+            request.data = self.parse(request)
+            self.check_permissions(request)
+
+            # every handler of an async view, including options(), returns an awaitable
+            response = await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = self.handle_exception(exc)
+        return response
+
+    async def authenticate(self, request):
+        """
+        Authenticates the request with its JWT access token.
+
+        Returns:
+            User: The authenticated user, or AnonymousUser when the request has no token.
+
+        Raises:
+            AuthenticationFailed: If the token is not valid or its user is not active.
+        """
+        header = self.authentication.get_header(request)
+        raw_token = self.authentication.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return AnonymousUser()
+
+        validated_token = self.authentication.get_validated_token(raw_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken('Token contained no recognizable user identification') from e
+
+        user_model = get_user_model()
+        try:
+            user = await user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except user_model.DoesNotExist as e:
+            raise AuthenticationFailed('User not found', code='user_not_found') from e
+
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+    @staticmethod
+    def parse(request):
+        """
+        Parses the JSON body of the request.
+
+        Returns:
+            dict: The parsed body, empty when there is no body.
+
+        Raises:
+            ParseError: If the body is not valid JSON.
+        """
+        if not request.body:
+            return {}
+        try:
+            return json.loads(request.body)
+        except ValueError as e:
+            raise exceptions.ParseError(f'JSON parse error - {e}') from e
+
+    def check_permissions(self, request):
+        """
+        Checks permission_classes like APIView.check_permissions().
+
+        Raises:
+            NotAuthenticated: If a permission is denied to an anonymous user.
+            PermissionDenied: If a permission is denied to an authenticated user.
+        """
+        for permission in [permission_class() for permission_class in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        """
+        Converts an API exception into an error response.
+
+        Returns:
+            JsonResponse: The error response.
+        """
+        response = custom_exception_handler(exc, {'view': self, 'request': self.request})
+        json_response = JsonResponse(response.data, status=response.status_code, safe=False)
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                json_response[header] = value
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            json_response['WWW-Authenticate'] = self.authentication.authenticate_header(self.request)
+        return json_response
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        raise exceptions.MethodNotAllowed(request.method)
@@ -0,0 +1,202 @@
+import functools
+import html
+import re
+
+# html_strip char filter: comments, script and style elements, then the remaining tags
+HTML_PATTERN = re.compile(r'<!--.*?-->|<(script|style)\b.*?</\1\s*>|<[^>]*>', re.IGNORECASE | re.DOTALL)
+
+# standard tokenizer: words, joined by apostrophes and dots, and numbers, joined by commas too
+TOKEN_PATTERN = re.compile(r"\w+(?:(?:['’.]|(?<=\d),(?=\d))\w+)*")
+
+# Lucene's English stop words, the default of the stop token filter
+ENGLISH_STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in', 'into', 'is', 'it', 'no', 'not',
+    'of', 'on', 'or', 'such', 'that', 'the', 'their', 'then', 'there', 'these', 'they', 'this', 'to', 'was',
+    'will', 'with',
+})
+
+VOWELS = frozenset('aeiouy')
+DOUBLES = ('bb', 'dd', 'ff', 'gg', 'mm', 'nn', 'pp', 'rr', 'tt')
+LI_ENDINGS = frozenset('cdeghkmnrt')
+
+STEM_EXCEPTIONS = {
+    'skis': 'ski', 'skies': 'sky', 'dying': 'die', 'lying': 'lie', 'tying': 'tie', 'idly': 'idl',
+    'gently': 'gentl', 'ugly': 'ugli', 'early': 'earli', 'only': 'onli', 'singly': 'singl',
+    'sky': 'sky', 'news': 'news', 'howe': 'howe', 'atlas': 'atlas', 'cosmos': 'cosmos', 'bias': 'bias',
+    'andes': 'andes',
+}
+STEP_1A_EXCEPTIONS = frozenset({'inning', 'outing', 'canning', 'herring', 'earring', 'proceed', 'exceed', 'succeed'})
+
+STEP_2_SUFFIXES = (
+    ('ization', 'ize'), ('ational', 'ate'), ('fulness', 'ful'), ('ousness', 'ous'), ('iveness', 'ive'),
+    ('tional', 'tion'), ('biliti', 'ble'), ('lessli', 'less'), ('entli', 'ent'), ('ation', 'ate'),
+    ('alism', 'al'), ('aliti', 'al'), ('ousli', 'ous'), ('iviti', 'ive'), ('fulli', 'ful'), ('enci', 'ence'),
+    ('anci', 'ance'), ('abli', 'able'), ('izer', 'ize'), ('ator', 'ate'), ('alli', 'al'), ('bli', 'ble'),
+    ('ogi', 'og'), ('li', ''),
+)
+STEP_3_SUFFIXES = (
+    ('ational', 'ate'), ('tional', 'tion'), ('alize', 'al'), ('icate', 'ic'), ('iciti', 'ic'), ('ative', ''),
+    ('ical', 'ic'), ('ness', ''), ('ful', ''),
+)
+STEP_4_SUFFIXES = (
+    'ement', 'ance', 'ence', 'able', 'ible', 'ment', 'ant', 'ent', 'ism', 'ate', 'iti', 'ous', 'ive', 'ize',
+    'ion', 'al', 'er', 'ic',
+)
+
+
+def strip_html(text):
+    """
+    Removes the HTML markup of text and decodes its character references, like the html_strip char filter.
+    """
+    return html.unescape(HTML_PATTERN.sub(' ', text))
+
+
+def _find_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix[0] if isinstance(suffix, tuple) else suffix):
+            return suffix
+    return None
+
+
+def _get_region(word, start):
+    # the region after the first non-vowel following a vowel
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _ends_with_short_syllable(word):
+    if len(word) == 2:
+        return word[0] in VOWELS and word[1] not in VOWELS
+    return len(word) > 2 and word[-3] not in VOWELS and word[-2] in VOWELS and word[-1] not in VOWELS | set('wxY')
+
+
+@functools.lru_cache(maxsize=100000)
+def stem(word):
+    """
+    Stems a lowercase English word with the Snowball English (Porter2) algorithm, like the snowball
+    token filter.
+
+    Args:
+        word (str): The word.
+
+    Returns:
+        str: The stem.
+    """
+    if word in STEM_EXCEPTIONS:
+        return STEM_EXCEPTIONS[word]
+    if len(word) <= 2:
+        return word
+
+    word = word.lstrip("'")
+    # y is a consonant at the start of the word and after a vowel
+    letters = list(word)
+    for index, letter in enumerate(letters):
+        if letter == 'y' and (index == 0 or letters[index - 1] in VOWELS):
+            letters[index] = 'Y'
+    word = ''.join(letters)
+
+    for prefix in ('gener', 'commun', 'arsen'):
+        if word.startswith(prefix):
+            r1 = len(prefix)
+            break
+    else:
+        r1 = _get_region(word, 0)
+    r2 = _get_region(word, r1)
+
+    # step 0
+    if suffix := _find_suffix(word, ("'s'", "'s", "'")):
+        word = word[:-len(suffix)]
+
+    # step 1a
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith(('ied', 'ies')):
+        word = word[:-2] if len(word) > 4 else word[:-1]
+    elif word.endswith(('us', 'ss')):
+        pass
+    elif word.endswith('s') and any(letter in VOWELS for letter in word[:-2]):
+        word = word[:-1]
+
+    if word in STEP_1A_EXCEPTIONS:
+        return word
+
+    # step 1b
+    suffix = _find_suffix(word, ('eedly', 'ingly', 'edly', 'eed', 'ing', 'ed'))
+    if suffix in ('eedly', 'eed'):
+        if len(word) - len(suffix) >= r1:
+            word = word[:-len(suffix)] + 'ee'
+    elif suffix and any(letter in VOWELS for letter in word[:-len(suffix)]):
+        word = word[:-len(suffix)]
+        if word.endswith(('at', 'bl', 'iz')):
+            word += 'e'
+        elif word.endswith(DOUBLES):
+            word = word[:-1]
+        elif r1 >= len(word) and _ends_with_short_syllable(word):
+            word += 'e'
+
+    # step 1c
+    if len(word) > 2 and word[-1] in 'yY' and word[-2] not in VOWELS:
+        word = word[:-1] + 'i'
+
+    # step 2
+    if (suffix := _find_suffix(word, STEP_2_SUFFIXES)) and len(word) - len(suffix[0]) >= r1:
+        if suffix[0] == 'ogi':
+            if word.endswith('logi'):
+                word = word[:-1]
+        elif suffix[0] == 'li':
+            if len(word) > 2 and word[-3] in LI_ENDINGS:
+                word = word[:-2]
+        else:
+            word = word[:-len(suffix[0])] + suffix[1]
+
+    # step 3
+    if (suffix := _find_suffix(word, STEP_3_SUFFIXES)) and len(word) - len(suffix[0]) >= r1:
+        if suffix[0] != 'ative' or len(word) - len(suffix[0]) >= r2:
+            word = word[:-len(suffix[0])] + suffix[1]
+
+    # step 4
+    if (suffix := _find_suffix(word, STEP_4_SUFFIXES)) and len(word) - len(suffix) >= r2:
+        if suffix != 'ion' or word[-4:-3] in ('s', 't'):
+            word = word[:-len(suffix)]
+
+    # step 5
+    if word.endswith('e'):
+        if len(word) - 1 >= r2 or (len(word) - 1 >= r1 and not _ends_with_short_syllable(word[:-1])):
+            word = word[:-1]
+    elif word.endswith('ll') and len(word) - 1 >= r2:
+        word = word[:-1]
+
+    return word.replace('Y', 'y')
+
+
+def analyze_standard(text):
+    """
+    Analyzes text like the standard analyzer: standard tokenizer and lowercase filter.
+
+    Returns:
+        list: The (position, term) pairs.
+    """
+    return [(position, match.group().lower()) for position, match in enumerate(TOKEN_PATTERN.finditer(text))]
+
+
+def analyze_html_strip(text):
+    """
+    Analyzes text like the html_strip analyzer of FrameworkDocument: html_strip char filter, standard
+    tokenizer, lowercase, stop and snowball filters. Stop words keep their position, so phrases match
+    across them like in Elasticsearch.
+
+    Returns:
+        list: The (position, term) pairs.
+    """
+    return [
+        (position, stem(term)) for position, term in analyze_standard(strip_html(text))
+        if term not in ENGLISH_STOP_WORDS
+    ]
+
+
+ANALYZERS = {
+    'standard': analyze_standard,
+    'html_strip': analyze_html_strip,
+}
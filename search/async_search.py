@@ -0,0 +1,100 @@
+from elasticsearch_dsl.response import Response
+
+from core.timing import timed
+from search.cache import get_search_result_cache
+from search.clients import get_async_elasticsearch
+from search.constants import HYDRATION_MODE_SOURCE
+from search.generation import index_generation
+from search.memory import get_memory_index
+from search.utils import aget_model_objects_in_bulk
+
+
+class AsyncSearchQueryMixin:
+    """
+    Async counterpart of BaseSearchQuery.get_data() for the views served on the ASGI entry point.
+    Must come before the search query class in the bases.
+    """
+
+    async def aexecute_query(self):
+        """
+        Async version of execute_query().
+
+        Returns:
+            Response: The response obtained from executing the query.
+        """
+        search = self.document.search().update_from_dict(self.query)
+        if engine := self.get_ranking_engine():
+            return Response(search, await engine.asearch(self.get_ranking_params()))
+        if memory_index := get_memory_index(self.document):
+            return Response(search, await memory_index.asearch(search.to_dict()))
+
+        client = get_async_elasticsearch(self.document._get_using())
+        params = self.get_search_params()
+        if 'pit' in self.query:
+            response = await client.search(body=search.to_dict(), **params)
+        else:
+            response = await client.search(index=self.document._index._name, body=search.to_dict(), **params)
+        return Response(search, response)
+
+    async def ahydrate(self):
+        """
+        Async version of hydrate(), whose later calls return the mapping built here.
+
+        Returns:
+            dict: Mapping of hit id to the hydrated data.
+        """
+        if self.hydration_model is None or self.hydrated_objects is not None:
+            return self.hydrated_objects
+
+        if self.get_hydration_mode() == HYDRATION_MODE_SOURCE:
+            return self.hydrate()
+
+        with timed('hydrate'):
+            objects = await aget_model_objects_in_bulk(
+                model_class=self.hydration_model, ids=self.get_hit_ids(), fields=self.hydration_fields
+            )
+            self.hydrated_objects = {pk: self.hydrate_object(obj) for pk, obj in objects.items()}
+        return self.hydrated_objects
+
+    async def aget_search_data(self):
+        """
+        Async version of BaseSearchQuery.get_data().
+
+        Returns:
+            Any: The processed search results.
+        """
+        cache = get_search_result_cache() if self.use_result_cache else None
+        with timed('cache'):
+            cache_key = self.get_cache_key() if cache else None
+            cached = None
+            if cache_key:
+                generation = await index_generation.aget()
+                cached = await cache.aget(cache_key, generation)
+        if cached is not None:
+            return self.restore_cached(cached)
+
+        with timed('query'):
+            self.query = self.prepare_query()
+        with timed('search'):
+            self.elasticsearch_response = await self.aexecute_query()
+        with timed('result'):
+            self.total_count = self.elasticsearch_response['hits']['total']['value']
+            await self.ahydrate()
+            result = self.get_result()
+
+            if cache_key:
+                await cache.aset(cache_key, self.make_cached(result), generation, is_empty=not result)
+        return result
+
+    def close_point_in_time(self, pit):
+        # closed with the async client by aclose_point_in_times()
+        self.pending_point_in_times = [*getattr(self, 'pending_point_in_times', []), pit]
+
+    async def aclose_point_in_times(self):
+        """
+        Closes the points in time whose last page has been fetched.
+        """
+        client = get_async_elasticsearch(self.document._get_using())
+        for pit in getattr(self, 'pending_point_in_times', []):
+            await client.close_point_in_time(body={'id': pit})
+        self.pending_point_in_times = []
@@ -0,0 +1,175 @@
+import bisect
+import heapq
+import itertools
+import re
+from collections import namedtuple
+
+from django.conf import settings
+
+from search.constants import DEFAULT_SUGGESTIONS_NUMBER
+from search.generation import InProcessIndex, index_generation
+from search.models import Framework
+from search.utils import normalize_query
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Prefixes up to this length have their completions precomputed, longer prefixes match few keys.
+PRECOMPUTED_PREFIX_LENGTH = 3
+
+FULL_MATCH = 0
+WORD_MATCH = 1
+
+AutocompleteData = namedtuple('AutocompleteData', ['keys', 'keys_by_id', 'top'])
+
+
+class AutocompleteIndex(InProcessIndex):
+    """
+    In-process autocomplete index over one Framework field.
+
+    Every value is indexed under its full normalized text and under each word start, so "mon" completes
+    "Media Monitoring". Completions are ranked full text matches first, then by shortest and alphabetical
+    value.
+
+    Attributes:
+        field (str): The Framework field indexed, e.g. 'name' or 'number'.
+        size (int): The number of completions returned.
+    """
+
+    def __init__(self, field, size=DEFAULT_SUGGESTIONS_NUMBER):
+        super().__init__(f'framework {field} autocomplete')
+        self.field = field
+        self.size = size
+
+    @staticmethod
+    def get_keys(framework_id, value):
+        """
+        Builds the sorted array keys of a value: the full normalized text and each later word start.
+
+        Returns:
+            list: Tuples of key text, match kind, value length, value and framework id.
+        """
+        text = normalize_query(value)
+        if not text:
+            return []
+
+        rank = (len(value), value, framework_id)
+        keys = [(text, FULL_MATCH, *rank)]
+        for match in WORD_PATTERN.finditer(text):
+            if match.start() > 0:
+                keys.append((text[match.start():], WORD_MATCH, *rank))
+        return keys
+
+    def get_queryset(self):
+        return Framework.objects.filter(is_available=True).exclude(**{f'{self.field}__isnull': True})
+
+    def load(self):
+        """
+        Loads the keys of the available frameworks.
+
+        Returns:
+            AutocompleteData: The sorted keys, the keys by framework id and the top completions by prefix.
+        """
+        keys_by_id = {}
+        for framework_id, value in self.get_queryset().values_list('id', self.field).iterator():
+            if framework_keys := self.get_keys(framework_id, value):
+                keys_by_id[framework_id] = framework_keys
+
+        keys = sorted(key for framework_keys in keys_by_id.values() for key in framework_keys)
+        prefixes = {key[0][:length] for key in keys for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)}
+        return AutocompleteData(keys, keys_by_id, {prefix: self._scan(keys, prefix) for prefix in prefixes})
+
+    def read_changes(self, framework_ids):
+        values = dict(self.get_queryset().filter(id__in=framework_ids).values_list('id', self.field))
+        return {framework_id: values.get(framework_id) for framework_id in framework_ids}
+
+    def apply_changes(self, data, changes):
+        """
+        Returns a copy of data with the values of the changed frameworks replaced, removed when None.
+        """
+        keys_by_id, top = dict(data.keys_by_id), dict(data.top)
+        old_keys, new_keys = set(), []
+        for framework_id, value in changes.items():
+            old_keys.update(keys_by_id.pop(framework_id, []))
+            if value is not None and (framework_keys := self.get_keys(framework_id, value)):
+                keys_by_id[framework_id] = framework_keys
+                new_keys.extend(framework_keys)
+
+        # one pass over the keys, whatever the number of changes
+        keys = list(heapq.merge((key for key in data.keys if key not in old_keys), sorted(new_keys)))
+        prefixes = {
+            key[0][:length] for key in itertools.chain(old_keys, new_keys)
+            for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1)
+        }
+        for prefix in prefixes:
+            if completions := self._scan(keys, prefix):
+                top[prefix] = completions
+            else:
+                top.pop(prefix, None)
+        return AutocompleteData(keys, keys_by_id, top)
+
+    def _scan(self, keys, prefix):
+        start = bisect.bisect_left(keys, (prefix,))
+        end = bisect.bisect_left(keys, (prefix + '\U0010ffff',), lo=start)
+        completions = []
+        seen = set()
+        for key in heapq.nsmallest(self.size * 2, keys[start:end], key=lambda item: item[1:]):
+            if key[4] not in seen:
+                seen.add(key[4])
+                completions.append((key[4], key[3]))
+        if len(completions) < self.size and end - start > self.size * 2:
+            # Values with many matching word starts crowded out others, rank the whole range instead
+            completions, seen = [], set()
+            for key in sorted(keys[start:end], key=lambda item: item[1:]):
+                if key[4] not in seen:
+                    seen.add(key[4])
+                    completions.append((key[4], key[3]))
+                    if len(completions) == self.size:
+                        break
+        return completions[:self.size]
+
+    def complete(self, query):
+        """
+        Returns the completions of query.
+
+        The index is built on first use. When the index generation changed elsewhere, for example in another
+        worker, it is rebuilt in the background and the current index serves meanwhile.
+
+        Args:
+            query (str): The text typed so far.
+
+        Returns:
+            list: Dictionaries with the framework id and the field value, best completion first.
+        """
+        self.refresh(index_generation.get_recent())
+        return self.lookup(query)
+
+    async def acomplete(self, query):
+        """
+        Async version of complete(), the first build runs in a worker thread.
+        """
+        await self.arefresh(await index_generation.aget_recent())
+        return self.lookup(query)
+
+    def lookup(self, query):
+        """
+        Returns the completions of query from the index as it is, without checking its generation.
+        """
+        prefix = normalize_query(query)
+        if not prefix:
+            return []
+
+        data = self.data
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            completions = data.top.get(prefix, [])
+        else:
+            completions = self._scan(data.keys, prefix)
+
+        return [{'id': framework_id, self.field: value} for framework_id, value in completions]
+
+
+def is_autocomplete_index_enabled():
+    return getattr(settings, 'SEARCH_AUTOCOMPLETE_INDEX', True)
+
+
+framework_name_index = AutocompleteIndex('name')
+framework_number_index = AutocompleteIndex('number')
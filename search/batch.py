@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+from elasticsearch_dsl import Search, MultiSearch
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from core.timing import timed
+from search.constants import BATCH_SEARCH_TYPE_FRAMEWORK, BATCH_SEARCH_TYPE_FRAMEWORK_NAMES, \
+    BATCH_SEARCH_TYPE_FRAMEWORK_NUMBERS, DEFAULT_RESULTS_PER_PAGE, HYDRATION_MODE_SOURCE, \
+    INVALID_BATCH_SEARCH_TYPE, INVALID_FRAMEWORK_SEARCH, BATCH_SEARCH_FAILED
+from search.exceptions import EmptyQueryException
+from search.memory import get_memory_index
+from search.mixins import FrameworkSearchQuery, ListFrameworkNames, ListFrameworkNumber
+from search.pagination import PaginationMixin
+from search.utils import get_model_objects_in_bulk
+
+
+class BatchSearchQuery:
+    """
+    Runs a batch of search queries with a single Elasticsearch _msearch request and hydrates their hits
+    together.
+
+    Attributes:
+        batch_query_types (dict): Mapping of sub-request type to the search query class and the mapping of
+            sub-request keys to the keys its serializers validate, None to validate the whole sub-request.
+        default_results_per_page (int): The results_per_page of paginated queries which do not send it.
+    """
+
+    batch_query_types = {
+        BATCH_SEARCH_TYPE_FRAMEWORK: (FrameworkSearchQuery, None),
+        BATCH_SEARCH_TYPE_FRAMEWORK_NAMES: (ListFrameworkNames, {'framework_name': 'name'}),
+        BATCH_SEARCH_TYPE_FRAMEWORK_NUMBERS: (ListFrameworkNumber, {'framework_number': 'number'}),
+    }
+    default_results_per_page = DEFAULT_RESULTS_PER_PAGE
+
+    def get_batch_data(self, sub_requests):
+        """
+        Runs the sub-requests.
+
+        Args:
+            sub_requests (list): The sub-requests, dictionaries with a type and the data of that search.
+
+        Returns:
+            list: A (search query, response) pair per sub-request, in input order. The response holds the
+                HTTP status and the data the single search endpoint would return. The search query is None
+                when the sub-request type is not valid.
+        """
+        entries = [self.prepare_entry(sub_request) for sub_request in sub_requests]
+
+        if pending := [entry for entry in entries if 'response' not in entry and entry['result'] is None]:
+            with timed('search'):
+                self.execute_entries(pending)
+
+        executed = [
+            entry['search_query'] for entry in pending
+            if 'response' not in entry and entry['search_query'].elasticsearch_response is not None
+        ]
+        with timed('hydrate'):
+            self.hydrate_in_bulk(executed)
+
+        for entry in entries:
+            if 'response' in entry:
+                continue
+
+            search_query = entry['search_query']
+            result = entry['result']
+            with timed('result'):
+                if result is None:
+                    result = search_query.get_response_data()
+                if isinstance(search_query, PaginationMixin):
+                    result = search_query.get_paginated_data(result)
+            entry['response'] = {'status': status.HTTP_200_OK, 'data': result}
+
+        return [(entry.get('search_query'), entry['response']) for entry in entries]
+
+    def prepare_entry(self, sub_request):
+        """
+        Validates a sub-request and prepares its query, unless its results are served locally.
+
+        Returns:
+            dict: The search query with its local result or its prepared query, or the error response.
+        """
+        query_type = sub_request.get('type')
+        if query_type not in self.batch_query_types:
+            return {
+                'search_query': None,
+                'response': {'status': status.HTTP_400_BAD_REQUEST, 'data': {'message': INVALID_BATCH_SEARCH_TYPE}}
+            }
+
+        query_class, fields = self.batch_query_types[query_type]
+        search_query = query_class()
+        search_query.request = self.request
+
+        data = sub_request if fields is None else {key: sub_request.get(name) for name, key in fields.items()}
+        entry = {'search_query': search_query, 'result': None}
+        if not search_query.is_data_valid(data=data):
+            entry['response'] = {'status': status.HTTP_400_BAD_REQUEST, 'data': {'message': INVALID_FRAMEWORK_SEARCH}}
+            return entry
+
+        try:
+            if isinstance(search_query, PaginationMixin):
+                search_query.results_per_page = search_query.results_per_page or self.default_results_per_page
+                with timed('query'):
+                    search_query.set_pagination(sub_request)
+
+            with timed('cache'):
+                entry['result'] = search_query.get_local_data()
+            if entry['result'] is None:
+                with timed('query'):
+                    search_query.query = search_query.prepare_query()
+        except ValidationError as e:
+            entry['response'] = {'status': status.HTTP_400_BAD_REQUEST, 'data': e.detail}
+        except EmptyQueryException:
+            entry['result'] = []
+        return entry
+
+    @staticmethod
+    def execute_entries(entries):
+        """
+        Executes the prepared queries of the entries with a single _msearch request. The queries executed by
+        a ranking engine or by the memory search backend are executed one by one.
+
+        Entries whose query fails get an error response.
+        """
+        remote_entries = []
+        for entry in entries:
+            search_query = entry['search_query']
+            if not get_memory_index(search_query.document) and not search_query.get_ranking_engine():
+                remote_entries.append(entry)
+                continue
+            try:
+                search_query.elasticsearch_response = search_query.execute_query()
+            except ValueError:
+                # the query uses a feature the memory index or the ranking engine does not support
+                entry['response'] = {
+                    'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'data': {'message': BATCH_SEARCH_FAILED}
+                }
+        if not remote_entries:
+            return
+
+        document = remote_entries[0]['search_query'].document
+        multi_search = MultiSearch(using=document._get_using())
+        for entry in remote_entries:
+            search_query = entry['search_query']
+            if 'pit' in search_query.query:
+                search = Search(using=search_query.document._get_using())
+            else:
+                search = search_query.document.search()
+            search = search.update_from_dict(search_query.query).params(**search_query.get_search_params())
+            multi_search = multi_search.add(search)
+
+        for entry, response in zip(remote_entries, multi_search.execute(raise_on_error=False)):
+            if response is None:
+                entry['response'] = {
+                    'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'data': {'message': BATCH_SEARCH_FAILED}
+                }
+            else:
+                entry['search_query'].elasticsearch_response = response
+
+    @staticmethod
+    def hydrate_in_bulk(search_queries):
+        """
+        Hydrates the hits of all search queries together, with one query per hydration model and fields.
+        Queries in the source hydration mode read their hits' _source instead.
+        """
+        groups = defaultdict(list)
+        for search_query in search_queries:
+            if search_query.hydration_model is None:
+                continue
+            if search_query.get_hydration_mode() == HYDRATION_MODE_SOURCE:
+                search_query.hydrate()
+            else:
+                groups[(search_query.hydration_model, tuple(search_query.hydration_fields or ()))].append(
+                    search_query
+                )
+
+        for (model, fields), group in groups.items():
+            ids = {hit_id for search_query in group for hit_id in search_query.get_hit_ids()}
+            objects = get_model_objects_in_bulk(model_class=model, ids=list(ids), fields=list(fields))
+            for search_query in group:
+                search_query.hydrated_objects = {
+                    hit_id: search_query.hydrate_object(objects[hit_id])
+                    for hit_id in search_query.get_hit_ids() if hit_id in objects
+                }
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from search.generation import get_shared_cache, index_generation
+
+DEFAULT_SEARCH_RESULT_CACHE_SETTINGS = {
+    'ENABLED': False,
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 300,
+    'NEGATIVE_TIMEOUT': 60,
+}
+
+
+class LRUCache:
+    """
+    Thread safe, size bounded least recently used cache whose entries expire after a timeout.
+
+    Attributes:
+        max_entries (int): The maximum number of entries, the least recently used entry is evicted first.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the value stored for key, or None if there is none or it has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        """
+        Stores value for key during timeout seconds.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def canonicalize(value):
+    """
+    Converts validated serializer data into a canonical form, so equivalent queries share a cache key.
+
+    Mappings are sorted by key and their empty values are left out, lists of strings are sorted
+    (they are used as sets by the queries) and other values are converted to strings.
+
+    Args:
+        value: The validated data.
+
+    Returns:
+        The canonical form of value.
+    """
+    if isinstance(value, dict):
+        return {
+            str(key): canonicalize(item)
+            for key, item in sorted(value.items(), key=lambda pair: str(pair[0]))
+            if item not in (None, '', [], {})
+        }
+    if isinstance(value, (list, tuple)):
+        items = [canonicalize(item) for item in value]
+        return sorted(items) if all(isinstance(item, str) for item in items) else items
+    if isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+class SearchResultCache:
+    """
+    Two tier cache of search results, an in-process LRU cache in front of the SEARCH_SHARED_CACHE.
+
+    Every entry carries the index generation read before its search ran, so a change committed while the
+    search runs makes it stale. The shared cache is required, it holds the generation bumped by the
+    changes of every process. Results without hits are kept for NEGATIVE_TIMEOUT seconds.
+
+    Attributes:
+        stats (dict): Counters of local hits, shared hits, misses and stored entries.
+    """
+
+    def __init__(self, max_entries=1024, timeout=300, negative_timeout=60, enabled=False):
+        self.enabled = enabled
+        self.timeout = timeout
+        self.negative_timeout = negative_timeout
+        self.local = LRUCache(max_entries)
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'sets': 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Creates a cache configured by the SEARCH_RESULT_CACHE setting.
+
+        Returns:
+            SearchResultCache: The configured cache.
+        """
+        config = {**DEFAULT_SEARCH_RESULT_CACHE_SETTINGS, **getattr(settings, 'SEARCH_RESULT_CACHE', {})}
+        if config['ENABLED'] and not index_generation.is_shared:
+            raise ImproperlyConfigured(
+                'SEARCH_RESULT_CACHE requires SEARCH_SHARED_CACHE, without it the changes made by the other '
+                'processes are not seen'
+            )
+        return cls(
+            max_entries=config['MAX_ENTRIES'],
+            timeout=config['TIMEOUT'],
+            negative_timeout=config['NEGATIVE_TIMEOUT'],
+            enabled=config['ENABLED'],
+        )
+
+    @staticmethod
+    def make_key(namespace, params):
+        """
+        Builds the cache key of a query.
+
+        Args:
+            namespace (str): The name of the query, e.g. the search query class name.
+            params (dict): The validated data, pagination and any other value the result depends on.
+
+        Returns:
+            str: The cache key.
+        """
+        payload = json.dumps(canonicalize(params), sort_keys=True, separators=(',', ':'))
+        return f'search:result:{namespace}:{hashlib.sha1(payload.encode()).hexdigest()}'
+
+    def get(self, key, generation):
+        """
+        Returns the cached value of key, or None on a miss.
+
+        Args:
+            key (str): The key built by make_key().
+            generation (int): The current index generation, read with index_generation.get().
+
+        Returns:
+            The cached value or None.
+        """
+        if not self.enabled:
+            return None
+
+        entry = self.local.get(key)
+        if entry is not None and entry[0] == generation:
+            self._count(local_hits=1)
+            return entry[1]
+
+        if shared := get_shared_cache():
+            entry = shared.get(key)
+            if entry is not None and entry[0] == generation:
+                self.local.set(key, entry, self.timeout)
+                self._count(shared_hits=1)
+                return entry[1]
+
+        self._count(misses=1)
+        return None
+
+    def set(self, key, value, generation, is_empty=False):
+        """
+        Stores the value of key.
+
+        Args:
+            key (str): The key built by make_key().
+            value: The value, must not be None.
+            generation (int): The index generation read before the search of value ran.
+            is_empty (bool): Whether the value is an empty result, stored for NEGATIVE_TIMEOUT seconds.
+        """
+        if not self.enabled:
+            return
+
+        timeout = self.negative_timeout if is_empty else self.timeout
+        entry = (generation, value)
+        self.local.set(key, entry, timeout)
+        if shared := get_shared_cache():
+            shared.set(key, entry, timeout=timeout)
+        self._count(sets=1)
+
+    def _count(self, **counts):
+        # stats are updated by the request threads and the worker threads of the async views
+        with self._stats_lock:
+            for name, count in counts.items():
+                self.stats[name] += count
+
+    async def aget(self, key, generation):
+        """
+        Async version of get(), the shared tier is read in a worker thread.
+        """
+        return await sync_to_async(self.get)(key, generation)
+
+    async def aset(self, key, value, generation, is_empty=False):
+        """
+        Async version of set(), the shared tier is written in a worker thread.
+        """
+        return await sync_to_async(self.set)(key, value, generation, is_empty=is_empty)
+
+
+_search_result_cache = None
+_search_result_cache_lock = threading.Lock()
+
+
+def get_search_result_cache():
+    """
+    Returns the process wide search result cache, created from the SEARCH_RESULT_CACHE setting.
+
+    Returns:
+        SearchResultCache: The search result cache.
+    """
+    global _search_result_cache
+    if _search_result_cache is None:
+        with _search_result_cache_lock:
+            if _search_result_cache is None:
+                _search_result_cache = SearchResultCache.from_settings()
+    return _search_result_cache
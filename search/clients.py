@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import weakref
+
+from django.conf import settings
+from elasticsearch import AsyncElasticsearch
+
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_elasticsearch(alias='default'):
+    """
+    Returns the process wide AsyncElasticsearch client, configured like the django_elasticsearch_dsl
+    connection of the same alias in the ELASTICSEARCH_DSL setting.
+
+    The client keeps a pool of connections bound to the event loop which created it, so a client is
+    created per running event loop: a single one under an ASGI server, which runs one loop per worker.
+
+    Args:
+        alias (str): The ELASTICSEARCH_DSL connection alias.
+
+    Returns:
+        AsyncElasticsearch: The client of the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None or alias not in clients:
+        with _async_clients_lock:
+            clients = _async_clients.setdefault(loop, {})
+            if alias not in clients:
+                clients[alias] = AsyncElasticsearch(**settings.ELASTICSEARCH_DSL[alias])
+    return clients[alias]
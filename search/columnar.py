@@ -0,0 +1,387 @@
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+
+from search.analysis import analyze_html_strip
+from search.constants import RANKING_ENGINE_ELASTICSEARCH, RANKING_ENGINE_COLUMNAR
+from search.documents import FrameworkDocument
+from search.memory import BM25_K1, BM25_B, DEFAULT_TRACK_TOTAL_HITS, MemorySearchIndex, format_millis
+
+# numpy units of the calendar intervals of date_histogram aggregations
+DATE_UNITS = {'year': 'Y', '1y': 'Y', 'month': 'M', '1M': 'M', 'day': 'D', '1d': 'D'}
+
+# the top level _source fields kept to build the _source of the hits
+STORED_FIELDS = (
+    'id', 'name', 'number', 'description', 'value', 'value_number', 'logo_path', 'industry_or_category',
+    'sub_category', 'start_date', 'end_date', 'is_available',
+)
+
+
+class PostingColumn:
+    """
+    Postings of a field in compressed sparse row (CSR) layout: the postings of the term with id t are
+    rows[indptr[t]:indptr[t + 1]]. A keyword field has the whole value as only term and no norms.
+
+    Attributes:
+        vocabulary (dict): Mapping of term to term id.
+        indptr (numpy.ndarray): The offset of the postings of every term, and their total count last.
+        rows (numpy.ndarray): The row of every posting.
+        weights (numpy.ndarray): freq / (freq + k1 * (1 - b + b * length / average_length)) of every posting.
+        doc_count (int): The number of rows with a value, the N of the inverse document frequency.
+    """
+
+    def __init__(self, values, analyzer=None):
+        """
+        Args:
+            values (list): The value of every row, None when missing.
+            analyzer (callable, optional): Returns the (position, term) pairs of a value. None for a keyword
+                field.
+        """
+        self.analyzer = analyzer
+        self.vocabulary = {}
+        term_ids, rows, frequencies, lengths = [], [], [], []
+        # like in Elasticsearch, an empty string is a keyword term, and counts in the statistics of the field
+        self.doc_count = 0
+        for row, value in enumerate(values):
+            if value is None:
+                lengths.append(0)
+                continue
+            self.doc_count += 1
+            if analyzer is None:
+                counts = {value: 1}
+                lengths.append(1)
+            else:
+                counts = {}
+                tokens = analyzer(value)
+                for _, term in tokens:
+                    counts[term] = counts.get(term, 0) + 1
+                lengths.append(len(tokens))
+            for term, count in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                rows.append(row)
+                frequencies.append(count)
+
+        term_ids = np.array(term_ids, dtype=np.int64)
+        # rows are in increasing order within every term, the sort is stable
+        order = np.argsort(term_ids, kind='stable')
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocabulary)), out=self.indptr[1:])
+        self.rows = np.array(rows, dtype=np.int32)[order]
+
+        frequencies = np.array(frequencies, dtype=np.float64)[order]
+        lengths = np.array(lengths, dtype=np.float64)
+        if analyzer is None:
+            norms = BM25_K1
+        else:
+            average_length = lengths.sum() / max(self.doc_count, 1)
+            norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths[self.rows] / average_length)
+        self.weights = frequencies / (frequencies + norms)
+
+    def get_terms(self, text):
+        return [text] if self.analyzer is None else [term for _, term in self.analyzer(text)]
+
+    def score(self, text, scores):
+        """
+        Adds the BM25 score of the match query of text, whose terms are optional, to scores.
+
+        Returns:
+            bool: Whether a row matched.
+        """
+        matched = False
+        for term in self.get_terms(text):
+            if (term_id := self.vocabulary.get(term)) is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            idf = math.log(1 + (self.doc_count - (end - start) + 0.5) / ((end - start) + 0.5))
+            # the rows of a term are distinct, so the fancy indexed addition adds every posting
+            scores[self.rows[start:end]] += idf * self.weights[start:end]
+            matched = True
+        return matched
+
+
+class CategoryColumn:
+    """
+    Categorical codes of a keyword field with one value per row.
+
+    Attributes:
+        codes (numpy.ndarray): The code of the value of every row, -1 when missing.
+        labels (list): The value of every code.
+    """
+
+    def __init__(self, values):
+        codes_by_label = {}
+        self.codes = np.array(
+            [-1 if value is None else codes_by_label.setdefault(value, len(codes_by_label)) for value in values],
+            dtype=np.int32
+        )
+        self.labels = list(codes_by_label)
+        self.codes_by_label = codes_by_label
+
+    def equals(self, value):
+        if (code := self.codes_by_label.get(value)) is None:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+
+class ColumnarSnapshot:
+    """
+    Immutable columnar snapshot of the framework documents, ranking the search_all queries of
+    FrameworkSearchQuery with vectorized operations.
+
+    search() returns a response shaped like the Elasticsearch one for the query FrameworkSearchQuery.full_query()
+    compiles, scored with BM25 like the multi_match fields.
+
+    Attributes:
+        name (str): The index name set in the hits.
+    """
+
+    def __init__(self, sources, name=None):
+        """
+        Args:
+            sources (iterable): The _source of every document, prepared like it is indexed.
+            name (str, optional): The index name set in the hits.
+        """
+        started = time.monotonic()
+        self.name = name
+        sources = sorted(sources, key=lambda source: source['id'])
+        self.ids = np.array([source['id'] for source in sources], dtype=np.int64)
+        self.stored = {field: [source.get(field) for source in sources] for field in STORED_FIELDS}
+        self.available = np.array([value is not False for value in self.stored['is_available']], dtype=bool)
+        self.value_number = np.array(
+            [np.nan if value is None else value for value in self.stored['value_number']], dtype=np.float64
+        )
+        self.dates = {
+            field: np.array(self.stored[field], dtype='datetime64[D]') for field in ('start_date', 'end_date')
+        }
+        self.categories = {
+            field: CategoryColumn(self.stored[field]) for field in ('industry_or_category', 'sub_category')
+        }
+        self.postings = {
+            'name': PostingColumn(self.stored['name'], analyzer=analyze_html_strip),
+            'description': PostingColumn(self.stored['description']),
+            'number.raw': PostingColumn(self.stored['number']),
+        }
+
+        cpv_rows, cpv_codes = [], []
+        for row, source in enumerate(sources):
+            for cpv in source.get('cpvs') or ():
+                if cpv.get('code') is not None:
+                    cpv_rows.append(row)
+                    cpv_codes.append(cpv['code'])
+        self.cpv_rows = np.array(cpv_rows, dtype=np.int64)
+        self.cpv_codes = np.array(cpv_codes, dtype=np.int64)
+        self.build_time = time.monotonic() - started
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_scores(self, value, preference_ids):
+        """
+        Scores the rows for the query clauses of a search_all query.
+
+        Returns:
+            tuple: The score and the match mask of every row.
+        """
+        scores = np.zeros(len(self), dtype=np.float64)
+        matched = np.zeros(len(self), dtype=bool)
+        if value:
+            # best_fields multi_match: the best score of its fields
+            best = np.zeros(len(self), dtype=np.float64)
+            for column in self.postings.values():
+                field_scores = np.zeros(len(self), dtype=np.float64)
+                if column.score(value, field_scores):
+                    np.maximum(best, field_scores, out=best)
+            if value.isdigit():
+                # the value_number term query of the multi_match and the match query next to it score 1,
+                # while cpvs.code, a nested field, matches nothing outside a nested query
+                exact = self.value_number == int(value)
+                np.maximum(best, exact, out=best)
+                scores += exact
+            scores += best
+            matched |= best > 0
+
+        if preference_ids:
+            preferred = np.isin(self.ids, np.fromiter(preference_ids, dtype=np.int64))
+            matched |= preferred
+            if value:
+                # a constant_score next to the scoring clause, alone it runs in filter context
+                scores += preferred
+        return scores, matched
+
+    def get_filter_mask(self, filters):
+        """
+        Builds the mask of the rows matching any of the selected filters.
+
+        Args:
+            filters (dict): The filter data of FrameworkSearchQuery.
+
+        Returns:
+            numpy.ndarray: The mask, None when no filter is selected.
+        """
+        masks = []
+        if filters.get('cpv_code'):
+            mask = np.zeros(len(self), dtype=bool)
+            mask[self.cpv_rows[self.cpv_codes == int(filters['cpv_code'])]] = True
+            masks.append(mask)
+        if filters.get('industry_category_type'):
+            masks.append(self.categories['industry_or_category'].equals(filters['industry_category_type']))
+        if filters.get('sub_category'):
+            masks.append(self.categories['sub_category'].equals(filters['sub_category']))
+        for field in ('start_date', 'end_date'):
+            if filters.get(field):
+                masks.append(self.dates[field] == np.datetime64(filters[field], 'D'))
+        return np.logical_or.reduce(masks) if masks else None
+
+    def get_top(self, scores, rows, count):
+        """
+        Selects the count best rows of rows, by decreasing score then increasing id.
+
+        Returns:
+            numpy.ndarray: The rows, in order.
+        """
+        if count < len(rows):
+            row_scores = scores[rows]
+            # the count-th best score, the rows scored above it are all selected and the tied ones by id
+            threshold = row_scores[np.argpartition(-row_scores, count - 1)[count - 1]]
+            above = rows[row_scores > threshold]
+            tied = rows[row_scores == threshold][:count - len(above)]
+            rows = np.concatenate([above, tied])
+        # rows and ids are in the same order
+        return rows[np.lexsort((rows, -scores[rows]))][:count]
+
+    def aggregate(self, aggregations, mask):
+        """
+        Computes the facet aggregations of FrameworkSearchQuery on the rows of mask.
+
+        Raises:
+            ValueError: If an aggregation is not supported.
+        """
+        results = {}
+        for name, aggregation in (aggregations or {}).items():
+            (kind, body), = aggregation.items()
+            field = body['field']
+            if kind == 'terms' and field in self.categories:
+                column = self.categories[field]
+                codes = column.codes[mask]
+                counts = np.bincount(codes[codes >= 0], minlength=len(column.labels))
+                buckets = sorted(
+                    ({'key': column.labels[code], 'doc_count': int(counts[code])} for code in np.flatnonzero(counts)),
+                    key=lambda bucket: (-bucket['doc_count'], bucket['key'])
+                )
+                size = body.get('size', 10)
+                results[name] = {
+                    'doc_count_error_upper_bound': 0,
+                    'sum_other_doc_count': sum(bucket['doc_count'] for bucket in buckets[size:]),
+                    'buckets': buckets[:size],
+                }
+            elif kind == 'range' and field == 'value_number':
+                values = self.value_number[mask]
+                values = values[~np.isnan(values)]
+                buckets = []
+                for value_range in body['ranges']:
+                    bucket, in_range = {'key': value_range['key']}, np.ones(len(values), dtype=bool)
+                    if value_range.get('from') is not None:
+                        bucket['from'] = float(value_range['from'])
+                        in_range &= values >= value_range['from']
+                    if value_range.get('to') is not None:
+                        bucket['to'] = float(value_range['to'])
+                        in_range &= values < value_range['to']
+                    bucket['doc_count'] = int(np.count_nonzero(in_range))
+                    buckets.append(bucket)
+                results[name] = {'buckets': buckets}
+            elif kind == 'date_histogram' and field in self.dates and body.get('min_doc_count', 0) >= 1 \
+                    and (unit := DATE_UNITS.get(body.get('calendar_interval', body.get('interval')))):
+                # empty buckets are not returned, they are not filled in
+                dates = self.dates[field][mask]
+                keys, counts = np.unique(dates[~np.isnat(dates)].astype(f'datetime64[{unit}]'), return_counts=True)
+                results[name] = {'buckets': [
+                    {'key_as_string': format_millis(key, body.get('format')), 'key': key, 'doc_count': int(count)}
+                    for key, count in zip(keys.astype('datetime64[ms]').astype(np.int64).tolist(), counts)
+                    if count >= body['min_doc_count']
+                ]}
+            else:
+                raise ValueError(f'{kind} aggregations on {field} are not supported by the columnar engine')
+        return results
+
+    def get_source(self, row, source_fields):
+        return {field: self.stored[field][row] for field in source_fields or STORED_FIELDS if field in self.stored}
+
+    def search(self, params):
+        """
+        Executes a search_all query.
+
+        Args:
+            params (dict): The search parameters, see FrameworkSearchQuery.get_ranking_params().
+
+        Returns:
+            dict: The search response, shaped like the Elasticsearch one.
+        """
+        started = time.monotonic()
+        scores, matched = self.get_scores(params.get('value'), params.get('preference_ids'))
+        matched &= self.available
+
+        filter_mask = self.get_filter_mask(params.get('filters') or {})
+        if filter_mask is not None and not params.get('post_filter'):
+            matched &= filter_mask
+        aggregations = self.aggregate(params.get('aggregations'), matched) if params.get('aggregations') else None
+        if filter_mask is not None and params.get('post_filter'):
+            matched &= filter_mask
+
+        total = int(np.count_nonzero(matched))
+        max_score = float(scores[matched].max()) if total else None
+        if search_after := params.get('search_after'):
+            after_score, after_id = search_after
+            matched &= (scores < after_score) | ((scores == after_score) & (self.ids > after_id))
+
+        start, size = params.get('from', 0), params.get('size', 10)
+        hits = []
+        for row in self.get_top(scores, np.flatnonzero(matched), start + size)[start:]:
+            hit = {
+                '_index': self.name, '_type': '_doc', '_id': str(self.ids[row]), '_score': float(scores[row]),
+                '_source': self.get_source(row, params.get('source_fields')),
+            }
+            if params.get('sort'):
+                hit['sort'] = [float(scores[row]), int(self.ids[row])]
+            hits.append(hit)
+
+        response = {
+            'took': int((time.monotonic() - started) * 1000),
+            'timed_out': False,
+            '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+            'hits': {
+                'total': {
+                    'value': min(total, DEFAULT_TRACK_TOTAL_HITS),
+                    'relation': 'gte' if total > DEFAULT_TRACK_TOTAL_HITS else 'eq',
+                },
+                'max_score': max_score,
+                'hits': hits,
+            },
+        }
+        if aggregations is not None:
+            response['aggregations'] = aggregations
+        return response
+
+
+class ColumnarRankingEngine(MemorySearchIndex):
+    """
+    Process-local ColumnarSnapshot of a Document, built on first use and rebuilt in a background thread
+    when the index generation changes, like MemorySearchIndex. A snapshot is immutable, so changes are
+    seen once it is rebuilt.
+    """
+
+    supports_updates = False
+
+    def load(self):
+        return ColumnarSnapshot((source for _, source in self.iter_sources()), name=self.document._index._name)
+
+
+def is_columnar_engine_enabled():
+    """
+    Returns whether the search_all framework searches are ranked by the columnar engine.
+    """
+    return getattr(settings, 'SEARCH_RANKING_ENGINE', RANKING_ENGINE_ELASTICSEARCH) == RANKING_ENGINE_COLUMNAR
+
+
+framework_columnar_engine = ColumnarRankingEngine(FrameworkDocument, prefetch_related=['cpvs'])
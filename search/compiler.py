@@ -0,0 +1,79 @@
+from elasticsearch_dsl import Q
+
+
+class QueryCompiler:
+    """
+    Compiles the clauses of a search into a bool query, running the clauses which do not need a score in
+    filter context, where Elasticsearch skips scoring them and caches their matches.
+
+    Attributes:
+        non_scoring_queries (frozenset): The query types classified as non-scoring.
+    """
+
+    non_scoring_queries = frozenset({'term', 'terms', 'range', 'exists', 'ids'})
+
+    def __init__(self, queries, filters=None, exclusions=None):
+        """
+        Args:
+            queries (list): The query clauses, Q objects or dictionaries.
+            filters (list, optional): The filter clauses, Q objects or dictionaries.
+            exclusions (list, optional): Clauses matching the documents which are never returned.
+        """
+        self.queries = [Q(query) for query in queries]
+        self.filters = [Q(query) for query in filters or []]
+        self.exclusions = [Q(query) for query in exclusions or []]
+
+    def is_scoring(self, query):
+        """
+        Returns whether the score of query is used to rank the results.
+        """
+        return query.name not in self.non_scoring_queries
+
+    @staticmethod
+    def any_of(queries):
+        """
+        Returns a query matching any of queries.
+        """
+        return queries[0] if len(queries) == 1 else Q('bool', should=queries)
+
+    def compile(self, use_post_filter=False):
+        """
+        Compiles the clauses.
+
+        Args:
+            use_post_filter (bool): Whether the filter clauses are returned as post_filter instead of being
+                part of the query.
+
+        Returns:
+            dict: The query, and the post_filter when use_post_filter is set and there are filter clauses.
+
+        Raises:
+            ValueError: If there is no query clause.
+        """
+        if not self.queries:
+            raise ValueError('QueryCompiler needs at least one query clause')
+
+        scoring = [query for query in self.queries if self.is_scoring(query)]
+        non_scoring = [query for query in self.queries if not self.is_scoring(query)]
+
+        bool_query = {}
+        if scoring:
+            bool_query['should'] = [*scoring, *(Q('constant_score', filter=query) for query in non_scoring)]
+        else:
+            bool_query['filter'] = [self.any_of(non_scoring)]
+
+        compiled = {}
+        if self.filters and use_post_filter:
+            compiled['post_filter'] = self.any_of(self.filters).to_dict()
+        elif self.filters:
+            bool_query.setdefault('filter', []).append(self.any_of(self.filters))
+
+        if self.exclusions:
+            bool_query['must_not'] = self.exclusions
+
+        if 'should' in bool_query and 'filter' in bool_query:
+            # should clauses are optional next to filter clauses unless a match is required
+            bool_query['minimum_should_match'] = 1
+
+        compiled['query'] = Q('bool', **bool_query).to_dict()
+        return compiled
@@ -12,9 +12,27 @@ QUERY_TYPE_CHOICES = (
     (QUERY_TYPE_CHOICE_SEARCH_ALL, QUERY_TYPE_CHOICE_SEARCH_ALL),
 )
 
+HYDRATION_MODE_DATABASE = 'database'
+HYDRATION_MODE_SOURCE = 'source'
+
+SEARCH_BACKEND_ELASTICSEARCH = 'elasticsearch'
+SEARCH_BACKEND_MEMORY = 'memory'
+RANKING_ENGINE_ELASTICSEARCH = 'elasticsearch'
+RANKING_ENGINE_COLUMNAR = 'columnar'
+
 DEFAULT_RESULTS_PER_PAGE = 10
 DEFAULT_SUGGESTIONS_NUMBER = 10
 
+BATCH_SEARCH_TYPE_FRAMEWORK = 'framework'
+BATCH_SEARCH_TYPE_FRAMEWORK_NAMES = 'framework_names'
+BATCH_SEARCH_TYPE_FRAMEWORK_NUMBERS = 'framework_numbers'
+MAX_BATCH_SEARCH_REQUESTS = 25
+
+FACET_TERMS_SIZE = 50
+FACET_DATE_INTERVAL = 'year'
+FACET_DATE_FORMAT = 'yyyy'
+FACET_NAMES = ('industry_types', 'sub_categories', 'values', 'start_dates', 'end_dates')
+
 INQUIRY_EMAIL_SENT = "Sent email regarding inquiry"
 PREFERENCE_DELETED = "Preference deleted successfully"
 PREFERENCE_CREATED = "Preference created successfully"
@@ -23,3 +41,6 @@ INVALID_FRAMEWORK_SEARCH = "Invalid data"
 EMPTY_QUERY_EXCEPTION_MSG = "The query returned zero results"
 
 INVALID_CPV_CODE = "cpv_code is not valid"
+INVALID_CURSOR = "cursor is not valid"
+INVALID_BATCH_SEARCH_TYPE = "type is not valid"
+BATCH_SEARCH_FAILED = "Search failed"
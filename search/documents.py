@@ -1,4 +1,5 @@
 from .models import Framework
+from .utils import get_framework_logo_path
 from django_elasticsearch_dsl import Document, fields
 from elasticsearch_dsl import analyzer
 from django_elasticsearch_dsl.registries import registry
@@ -24,13 +25,17 @@ class FrameworkDocument(Document):
         raw: To search exact value
         search_as_you_type: To get suggestions as you type
 
-    value: To get exact framework value
-        Note: It should be used for range search so this value should be integer but as for now
-        we use char field.
+    value: Framework value as displayed in search results (not indexed)
 
-    industry_or_category: To get exact framework industry_or_category
+    value_number: Numeric framework value, used for range search
 
-    sub_category: To get exact framework sub_category
+    logo_path: Logo path resolved with the default logo, relative to BACK_END_DOMAIN (not indexed)
+
+    industry_or_category: To get exact framework industry_or_category, and its facet counts
+        Note: global ordinals are built eagerly on refresh, so terms aggregations do not build them
+
+    sub_category: To get exact framework sub_category, and its facet counts
+        Note: global ordinals are built eagerly on refresh, so terms aggregations do not build them
 
     start_date: To get exact framework start_date
         Note: date field is always used as range search
@@ -38,6 +43,8 @@ class FrameworkDocument(Document):
     end_date: To get exact framework end_date
         Note: date field is always used as range search
 
+    is_available: False once the framework is soft deleted, such documents are excluded from the searches
+
     cpvs:
         code: To get exact code related to framework
 
@@ -62,11 +69,14 @@ class FrameworkDocument(Document):
     )
 
     description = fields.KeywordField()
+    value = fields.KeywordField(index=False)
     value_number = fields.LongField()
-    industry_or_category = fields.KeywordField()
-    sub_category = fields.KeywordField()
+    logo_path = fields.KeywordField(index=False)
+    industry_or_category = fields.KeywordField(eager_global_ordinals=True)
+    sub_category = fields.KeywordField(eager_global_ordinals=True)
     start_date = fields.DateField()
     end_date = fields.DateField()
+    is_available = fields.BooleanField()
 
     cpvs = fields.NestedField(
         properties={
@@ -74,6 +84,9 @@ class FrameworkDocument(Document):
         }
     )
 
+    def prepare_logo_path(self, instance):
+        return get_framework_logo_path(instance.logo)
+
     class Index:
         name = settings.FRAMEWORK_INDEX_NAME
         settings = {
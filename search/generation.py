@@ -0,0 +1,289 @@
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+GENERATION_KEY = 'search:index_generation'
+
+# Seconds the in-process indexes reuse the generation they read, so a search does not read the shared cache
+CHECK_INTERVAL = 1
+
+# Seconds after which the in-process indexes are rebuilt when there is no shared cache
+MAX_AGE = 300
+
+
+def get_shared_cache():
+    """
+    Returns the Django cache shared by the web workers and the management commands, set by the
+    SEARCH_SHARED_CACHE alias, or None when there is none.
+    """
+    alias = getattr(settings, 'SEARCH_SHARED_CACHE', None)
+    return caches[alias] if alias else None
+
+
+class IndexGeneration:
+    """
+    Counter of the changes of the indexed frameworks, kept in the shared cache when there is one so every
+    process sees the changes of the others.
+    """
+
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._local = 0
+        self._recent = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_shared(self):
+        return get_shared_cache() is not None
+
+    def get(self):
+        """
+        Returns the current generation.
+
+        Returns:
+            int: The index generation.
+        """
+        if shared := get_shared_cache():
+            generation = shared.get(GENERATION_KEY)
+            if generation is None:
+                generation = self.seed(shared)
+        else:
+            generation = self._local
+        self._recent = (generation, time.monotonic())
+        return generation
+
+    @staticmethod
+    def seed(shared):
+        """
+        Creates the shared counter when it is missing, e.g. evicted, from the clock in nanoseconds, so the
+        generations counted before the eviction are never reused.
+
+        Returns:
+            int: The current generation.
+        """
+        generation = time.time_ns()
+        if shared.add(GENERATION_KEY, generation, timeout=None):
+            return generation
+        return shared.get(GENERATION_KEY, generation)
+
+    async def aget(self):
+        """
+        Async version of get(), the shared cache is read in a worker thread.
+        """
+        if self.is_shared:
+            return await sync_to_async(self.get)()
+        return self.get()
+
+    def get_recent(self):
+        """
+        Returns the generation read at most check_interval seconds ago, read again when it is older.
+
+        Returns:
+            int: The index generation.
+        """
+        recent = self._recent
+        if recent is not None and time.monotonic() - recent[1] < self.check_interval:
+            return recent[0]
+        return self.get()
+
+    async def aget_recent(self):
+        """
+        Async version of get_recent().
+        """
+        recent = self._recent
+        if recent is not None and time.monotonic() - recent[1] < self.check_interval:
+            return recent[0]
+        return await self.aget()
+
+    def bump(self):
+        """
+        Makes the data read at older generations stale. Called once a change of the indexed frameworks is
+        committed, so no search can read the generation after the bump and the data before the change.
+
+        Returns:
+            int: The generation after the bump.
+        """
+        with self._lock:
+            self._local += 1
+            generation = self._local
+        if shared := get_shared_cache():
+            self.seed(shared)
+            generation = shared.incr(GENERATION_KEY)
+        self._recent = (generation, time.monotonic())
+        return generation
+
+
+index_generation = IndexGeneration()
+
+
+class InProcessIndex:
+    """
+    Base of the indexes held by each process, built from the database and rebuilt in a background thread
+    when the index generation moves past the changes they applied. The data is never changed in place.
+
+    Attributes:
+        name (str): The name of the index, given to its build thread.
+        data: The data searched, None before the first build.
+        generation (int): The index generation the data reflects, None before the first build.
+        supports_updates (bool): Whether changes are applied by update(), otherwise they cause a rebuild.
+        max_update_size (int): The number of changes update() applies, more cause a rebuild.
+        max_age (float): Seconds after which the data is rebuilt when there is no shared cache, as the
+            generation then only counts the changes of this process.
+    """
+
+    supports_updates = True
+    max_update_size = 1000
+
+    def __init__(self, name, max_age=MAX_AGE):
+        self.name = name
+        self.max_age = max_age
+        self.data = None
+        self.generation = None
+        self._built_at = None
+        self._building = False
+        self._pending_updates = set()
+        self._pending_advances = []
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def load(self):
+        """
+        Loads the data from the database.
+        """
+        raise NotImplementedError
+
+    def read_changes(self, pks):
+        """
+        Reads the current version of the objects pks from the database, given to apply_changes().
+
+        Returns:
+            dict: Mapping of pk to the change of the object.
+        """
+        raise NotImplementedError
+
+    def apply_changes(self, data, changes):
+        """
+        Returns a copy of data with the changes applied, data itself must not change.
+        """
+        raise NotImplementedError
+
+    def build(self):
+        """
+        Rebuilds the data from the database.
+        """
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        with self._lock:
+            self._building = True
+        try:
+            generation = index_generation.get()
+            data = self.load()
+        except BaseException:
+            with self._lock:
+                self._building = False
+            raise
+
+        with self._lock:
+            self.data = data
+            self.generation = generation
+            self._built_at = time.monotonic()
+            self._building = False
+            pending_updates, self._pending_updates = self._pending_updates, set()
+            pending_advances, self._pending_advances = self._pending_advances, []
+
+        # the objects changed during the build may have been read before their change was committed
+        self.update(pending_updates)
+        for generation in sorted(pending_advances):
+            self.advance(generation)
+
+    def build_once(self):
+        """
+        Builds the data unless another thread built it meanwhile.
+        """
+        with self._build_lock:
+            if self.generation is None:
+                self._build()
+
+    def build_in_background(self):
+        """
+        Rebuilds the data in a background thread, unless a rebuild is running already.
+        """
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+
+        def build():
+            try:
+                self.build()
+            finally:
+                self._building = False
+                connections.close_all()
+
+        threading.Thread(target=build, name=f'{self.name} index', daemon=True).start()
+
+    def is_stale(self, generation):
+        """
+        Returns whether the data is older than generation, or than max_age seconds without a shared cache.
+        """
+        if self.generation != generation:
+            return True
+        return not index_generation.is_shared and time.monotonic() - self._built_at >= self.max_age
+
+    def refresh(self, generation):
+        """
+        Builds the data when it is missing, or starts a rebuild when it is stale.
+        """
+        if self.generation is None:
+            self.build_once()
+        elif self.is_stale(generation):
+            self.build_in_background()
+
+    async def arefresh(self, generation):
+        """
+        Async version of refresh(), the first build runs in a worker thread.
+        """
+        if self.generation is None:
+            await sync_to_async(self.build_once)()
+        elif self.is_stale(generation):
+            self.build_in_background()
+
+    def update(self, pks):
+        """
+        Applies the committed changes of the objects pks to one copy of the data, before their generation
+        bump. More than max_update_size changes start a rebuild instead.
+        """
+        if not self.supports_updates:
+            return
+        pks = set(pks)
+        with self._lock:
+            if self._building:
+                self._pending_updates.update(pks)
+            if self.generation is None or not pks:
+                return
+
+        if len(pks) > self.max_update_size:
+            self.build_in_background()
+            return
+        changes = self.read_changes(pks)
+        with self._lock:
+            self.data = self.apply_changes(self.data, changes)
+
+    def advance(self, generation):
+        """
+        Marks the generation bumped for the changes applied by update() as seen, when it follows the
+        generation of the data.
+        """
+        if not self.supports_updates:
+            return
+        with self._lock:
+            if self._building:
+                self._pending_advances.append(generation)
+            if self.generation is not None and self.generation == generation - 1:
+                self.generation = generation
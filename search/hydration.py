@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from search.models import Framework
+from search.utils import get_framework_image_url, get_framework_logo_path
+
+
+class FrameworkHydrationMixin:
+    """
+    Hydrates framework search hits with the framework value and image url.
+    """
+
+    hydration_model = Framework
+    hydration_fields = ['value', 'logo']
+    hydration_source_fields = ['value', 'logo_path']
+
+    def hydrate_object(self, framework):
+        return {
+            'value': framework.value,
+            'image_url': get_framework_image_url(framework.logo),
+        }
+
+    def hydrate_source(self, source):
+        return {
+            'value': source.get('value'),
+            'image_url': settings.BACK_END_DOMAIN + (source.get('logo_path') or get_framework_logo_path(None)),
+        }
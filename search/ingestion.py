@@ -0,0 +1,423 @@
+import contextlib
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import re
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from search.documents import FrameworkDocument
+from search.models import Framework, Cpv, Document, LOT, Supplier
+from search.outbox import is_outbox_enabled, enqueue_frameworks
+
+READ_SIZE = 64 * 1024
+SEPARATOR_PATTERN = re.compile(r'[\s,]*')
+
+# Framework fields set from the scraped records
+CONTENT_FIELDS = [
+    'name', 'site_name', 'number', 'lot_number', 'value', 'value_number', 'start_date', 'end_date', 'service_type',
+    'description', 'logo', 'industry_or_category', 'sub_category',
+]
+
+
+def iter_json_records(file, read_size=READ_SIZE):
+    """
+    Yields the records of a JSON array or of NDJSON (one JSON record per line), read incrementally.
+
+    The format is detected from the first character of the input. Only the record being decoded and the
+    read buffer are held in memory, whatever the size of the input.
+
+    Args:
+        file: A text file object.
+        read_size (int): Number of characters read at once.
+
+    Yields:
+        The decoded records.
+
+    Raises:
+        ValueError: If the input is not valid JSON.
+    """
+    buffer = file.read(read_size).lstrip()
+    while not buffer and (chunk := file.read(read_size)):
+        buffer = chunk.lstrip()
+
+    if not buffer.startswith('['):
+        # complete the last line of the buffer, then read line by line
+        for line in itertools.chain(io.StringIO(buffer + file.readline()), file):
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    position, eof = 1, False
+    while True:
+        position = SEPARATOR_PATTERN.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == ']':
+            return
+
+        record, end = None, None
+        if position < len(buffer):
+            with contextlib.suppress(json.JSONDecodeError):
+                record, end = decoder.raw_decode(buffer, position)
+
+        if end is None or (end == len(buffer) and not eof):
+            # the next record is cut at the end of the buffer
+            if eof:
+                raise ValueError('Invalid or truncated JSON array')
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        yield record
+        position = end
+
+
+def format_date(string_date):
+    datetime_obj = datetime.datetime.strptime(string_date, "%d/%m/%Y")
+    return datetime_obj.strftime("%Y-%m-%d")
+
+
+def get_site_name(name, number):
+    """
+    Builds the site_name of a scraped framework, the same for every scrape of the framework.
+
+    Returns:
+        str: The name with underscores instead of spaces, followed by a hash of the name and number.
+    """
+    key = hashlib.sha1(f'{name}\n{number or ""}'.encode()).hexdigest()[:10]
+    return "_".join(name.split(' '))[:245] + key
+
+
+def get_content_hash(framework, cpvs, documents, lots, suppliers):
+    """
+    Computes the hash of the scraped content of a framework and its children, which changes only when
+    a value stored in the database changes. The order of cpvs, documents and suppliers is not significant.
+
+    Returns:
+        str: The SHA-256 hex digest.
+    """
+    content = {
+        'framework': [getattr(framework, field) for field in CONTENT_FIELDS],
+        'cpvs': sorted(str(cpv.code) for cpv in cpvs),
+        'documents': sorted([document.name, document.link] for document in documents),
+        'lots': [[lot.name, lot.description] for lot in lots],
+        'suppliers': sorted([supplier.name, supplier.link] for supplier in suppliers),
+    }
+    return hashlib.sha256(json.dumps(content, default=str, separators=(',', ':')).encode()).hexdigest()
+
+
+def normalize_framework(block):
+    """
+    Converts a scraped framework record into unsaved model objects, with their content hash set.
+
+    Args:
+        block (dict): The scraped record.
+
+    Returns:
+        tuple: The Framework and the lists of its Cpv, Document, LOT and Supplier objects, or None when the
+            record has no framework name.
+    """
+    framework_name = block.get('framework_name')
+    if not framework_name:
+        return None
+
+    framework_value = block.get('framework_value')
+    description = block.get('description')
+    framework = Framework(
+        name=framework_name,
+        site_name=get_site_name(framework_name, block.get('framework_number')),
+        number=block.get('framework_number'),
+        lot_number=block.get('number_of_lots'),
+        value=framework_value,
+        value_number=int(''.join(filter(str.isdigit, framework_value))) if framework_value else None,
+        start_date=format_date(block.get('start_date')),
+        end_date=format_date(block.get('end_date')),
+        service_type=block.get('service_type'),
+        description=description if isinstance(description, str) else "\n".join(description or []),
+        logo=block.get('logo'),
+        industry_or_category=block.get('category_name'),
+        sub_category=block.get('subcategory'),
+    )
+
+    cpvs = [
+        Cpv(code=code)
+        for cpv in block.get('cpv_code_details', [])
+        for code in cpv.get('other_cpv_codes') or []
+    ]
+
+    documents = [Document(name=doc_name, link=doc_link) for doc_name, doc_link in block.get('documents', {}).items()]
+
+    lots = []
+    lot_name, lot_description = block.get('lot_name'), block.get('lot_description')
+    if isinstance(lot_name, str) and isinstance(lot_description, str):
+        lots.append(LOT(name=lot_name[:250], description=lot_description))
+    elif isinstance(lot_name, list) and isinstance(lot_description, list):
+        lots.extend(LOT(name=name, description=description) for name, description in zip(lot_name, lot_description))
+
+    suppliers = [
+        Supplier(name=supplier_name, link=supplier_link)
+        for supplier_name, supplier_link in block.get('suppliers', {}).items()
+    ]
+
+    framework.content_hash = get_content_hash(framework, cpvs, documents, lots, suppliers)
+    return framework, cpvs, documents, lots, suppliers
+
+
+class FrameworkLoader:
+    """
+    Loads scraped framework records into the database in batches.
+
+    Each batch is saved in one transaction with bulk inserts. Frameworks saved already are skipped,
+    FrameworkUpserter updates them instead. When reindex is set, the frameworks inserted are indexed by
+    reindex(), as bulk inserts send no post_save signal.
+
+    Attributes:
+        batch_size (int): The number of records per batch.
+        counts (dict): The number of objects created, per model name, and of frameworks skipped.
+        document (FrameworkDocument): The document the frameworks written are indexed into, None when they
+            are not indexed.
+    """
+
+    child_models = (Cpv, Document, LOT, Supplier)
+
+    def __init__(self, batch_size=1000, reindex=True):
+        self.batch_size = batch_size
+        self.counts = {model.__name__: 0 for model in (Framework, *self.child_models)}
+        self.counts['skipped'] = 0
+        autosync = getattr(settings, 'ELASTICSEARCH_DSL_AUTOSYNC', True)
+        self.document = FrameworkDocument() if reindex and autosync else None
+
+    def load(self, records, report=None):
+        """
+        Loads the records.
+
+        Args:
+            records (iterable): The scraped records.
+            report (callable, optional): Called after each batch with the number of records read and the
+                elapsed seconds.
+
+        Returns:
+            dict: The counts of the load.
+        """
+        records = iter(records)
+        read = 0
+        started = time.monotonic()
+        while batch := list(itertools.islice(records, self.batch_size)):
+            read += len(batch)
+            self.load_batch(batch)
+            if report:
+                report(read, time.monotonic() - started)
+        self.finish()
+        return self.counts
+
+    def load_batch(self, records):
+        """
+        Saves the frameworks of the records and their children in one transaction.
+        """
+        normalized = self.exclude_saved([entry for entry in map(normalize_framework, records) if entry is not None])
+        if not normalized:
+            return
+
+        with transaction.atomic():
+            frameworks = self.create(normalized)
+            self.counts['Framework'] += len(frameworks)
+            for model_name, count in self.create_children(normalized).items():
+                self.counts[model_name] += count
+            self.reindex([framework.id for framework in frameworks])
+
+    def exclude_saved(self, normalized):
+        """
+        Drops the frameworks whose name and number are saved already, or appear earlier in the batch. The
+        site_name is not compared, the previous loader gave it a random suffix.
+
+        Returns:
+            list: The normalized frameworks to insert.
+        """
+        keys = set(
+            Framework.objects.filter(name__in={entry[0].name for entry in normalized}).values_list('name', 'number')
+        )
+        new = []
+        for entry in normalized:
+            key = (entry[0].name, entry[0].number)
+            if key in keys:
+                self.counts['skipped'] += 1
+            else:
+                keys.add(key)
+                new.append(entry)
+        return new
+
+    def create(self, normalized):
+        """
+        Inserts the normalized frameworks.
+
+        Returns:
+            list: The created frameworks, their ids are set.
+        """
+        return Framework.objects.bulk_create([entry[0] for entry in normalized], batch_size=self.batch_size)
+
+    def create_children(self, normalized):
+        """
+        Inserts the children of the normalized frameworks, whose ids are set.
+
+        Returns:
+            dict: The number of children created, per model name.
+        """
+        counts = {}
+        for index, model in enumerate(self.child_models, start=1):
+            children = []
+            for entry in normalized:
+                for child in entry[index]:
+                    child.framework = entry[0]
+                    children.append(child)
+            model.objects.bulk_create(children, batch_size=self.batch_size)
+            counts[model.__name__] = len(children)
+        return counts
+
+    def finish(self):
+        """
+        Called once all records are loaded.
+        """
+
+    def reindex(self, framework_ids):
+        """
+        Indexes the frameworks again, or adds them to the index outbox when it is enabled.
+        """
+        if self.document is None or not framework_ids:
+            return
+        if is_outbox_enabled():
+            enqueue_frameworks(framework_ids)
+        else:
+            self.document.update(Framework.objects.filter(id__in=framework_ids).prefetch_related('cpvs'))
+
+
+
+class FrameworkUpserter(FrameworkLoader):
+    """
+    Loads a full scrape of the catalog, writing only the frameworks which changed since the last load.
+
+    Scraped frameworks are matched to the saved ones by their site_name, and changes are detected by
+    comparing content hashes. Unless keep_missing is set, available frameworks missing from the scrape are
+    made unavailable.
+
+    Attributes:
+        keep_missing (bool): Whether the frameworks missing from the scrape are left available.
+        counts (dict): The number of frameworks created, updated, unchanged and made unavailable.
+    """
+
+    def __init__(self, batch_size=1000, keep_missing=False, reindex=True):
+        super().__init__(batch_size, reindex)
+        self.keep_missing = keep_missing
+        self.counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'unavailable': 0}
+        self.seen_ids = set()
+
+    def load_batch(self, records):
+        """
+        Upserts the frameworks of the records.
+        """
+        # a framework scraped twice is loaded once, with its last record
+        entries = {}
+        for entry in map(normalize_framework, records):
+            if entry is not None:
+                entries[entry[0].site_name] = entry
+        if not entries:
+            return
+
+        saved = self.get_saved(entries)
+        created, updated = [], []
+        for site_name, entry in entries.items():
+            if site_name not in saved:
+                created.append(entry)
+                continue
+
+            framework_id, content_hash, is_available = saved[site_name]
+            self.seen_ids.add(framework_id)
+            if content_hash == entry[0].content_hash and is_available:
+                self.counts['unchanged'] += 1
+            else:
+                entry[0].id = framework_id
+                updated.append(entry)
+
+        with transaction.atomic():
+            frameworks = []
+            if created:
+                frameworks = self.create(created)
+                self.create_children(created)
+            if updated:
+                self.update(updated)
+            self.reindex([framework.id for framework in frameworks] + [entry[0].id for entry in updated])
+
+        self.seen_ids.update(framework.id for framework in frameworks)
+        self.counts['created'] += len(created)
+        self.counts['updated'] += len(updated)
+
+    def get_saved(self, entries):
+        """
+        Looks up the saved frameworks of the entries.
+
+        Returns:
+            dict: Mapping of site_name to the id, content_hash and is_available of the saved framework.
+        """
+        saved = {
+            site_name: (framework_id, content_hash, is_available)
+            for site_name, framework_id, content_hash, is_available in Framework.objects.filter(
+                site_name__in=list(entries)
+            ).values_list('site_name', 'id', 'content_hash', 'is_available')
+        }
+
+        if missing := [site_name for site_name in entries if site_name not in saved]:
+            legacy = {}
+            for framework_id, name, number, is_available in Framework.objects.filter(
+                    content_hash__isnull=True, name__in={entries[site_name][0].name for site_name in missing}
+            ).order_by('id').values_list('id', 'name', 'number', 'is_available'):
+                legacy.setdefault((name, number), (framework_id, None, is_available))
+            for site_name in missing:
+                framework = entries[site_name][0]
+                if (match := legacy.pop((framework.name, framework.number), None)) is not None:
+                    saved[site_name] = match
+        return saved
+
+    def update(self, normalized):
+        """
+        Updates the normalized frameworks, whose ids are set, and replaces their children.
+        """
+        today = datetime.date.today()
+        for entry in normalized:
+            entry[0].is_available = True
+            entry[0].updated_at = today
+
+        Framework.objects.bulk_update(
+            [entry[0] for entry in normalized], [*CONTENT_FIELDS, 'content_hash', 'is_available', 'updated_at'],
+            batch_size=self.batch_size
+        )
+        framework_ids = [entry[0].id for entry in normalized]
+        for model in self.child_models:
+            # sends post_delete, so the outbox and the in-process indexes see the deleted children
+            model.objects.filter(framework_id__in=framework_ids).delete()
+        self.create_children(normalized)
+
+    def finish(self):
+        """
+        Makes the available frameworks missing from the scrape unavailable.
+        """
+        if self.keep_missing:
+            return
+
+        missing_ids = [
+            framework_id
+            for framework_id in Framework.objects.filter(is_available=True).values_list('id', flat=True).iterator()
+            if framework_id not in self.seen_ids
+        ]
+        for start in range(0, len(missing_ids), self.batch_size):
+            framework_ids = missing_ids[start:start + self.batch_size]
+            with transaction.atomic():
+                Framework.objects.filter(id__in=framework_ids).update(
+                    is_available=False, updated_at=datetime.date.today()
+                )
+                self.reindex(framework_ids)
+        self.counts['unavailable'] = len(missing_ids)
+
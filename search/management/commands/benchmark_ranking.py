@@ -0,0 +1,224 @@
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from django.conf import settings
+from django.core.management import BaseCommand
+from elasticsearch.helpers import bulk
+
+from search.columnar import ColumnarSnapshot
+from search.constants import QUERY_TYPE_CHOICE_SEARCH_ALL
+from search.documents import FrameworkDocument
+from search.ingestion import format_date
+from search.memory import InvertedIndex
+from search.mixins import FrameworkSearchQuery
+from search.snapshots import PreferenceSet
+from search.synthetic import SyntheticCatalog
+from search.utils import get_framework_logo_path
+
+NO_FILTER = {'cpv_code': '', 'industry_category_type': '', 'sub_category': '', 'start_date': None, 'end_date': None}
+
+
+def get_source(framework_id, record):
+    """
+    Prepares the _source of a scraped record like FrameworkDocument prepares the framework
+    normalize_framework() builds from it, without building the model objects.
+
+    Returns:
+        dict: The _source.
+    """
+    description, value = record.get('description'), record.get('framework_value')
+    return {
+        'id': framework_id,
+        'name': record['framework_name'],
+        'number': record.get('framework_number'),
+        'description': description if isinstance(description, str) else '\n'.join(description or []),
+        'value': value,
+        'value_number': int(''.join(filter(str.isdigit, value))) if value else None,
+        'logo_path': get_framework_logo_path(record.get('logo')),
+        'industry_or_category': record.get('category_name'),
+        'sub_category': record.get('subcategory'),
+        'start_date': format_date(record['start_date']),
+        'end_date': format_date(record['end_date']),
+        'is_available': True,
+        'cpvs': [
+            {'code': int(code)}
+            for cpv in record.get('cpv_code_details', []) for code in cpv.get('other_cpv_codes') or []
+        ],
+    }
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the columnar ranking engine, and optionally Elasticsearch and the memory index, on synthetic
+    catalogs.
+
+    The same search_all queries are run on a ColumnarSnapshot of a SyntheticCatalog of every size and, with
+    --elasticsearch or --memory, on a temporary index or an InvertedIndex, reporting the share of top hits
+    both return.
+    """
+
+    help = 'Benchmark the columnar ranking engine on synthetic catalogs, against Elasticsearch with --elasticsearch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], dest='sizes',
+            help='Numbers of frameworks of the catalogs.'
+        )
+        parser.add_argument(
+            '--queries', type=int, default=200, dest='queries',
+            help='Number of queries run per catalog.'
+        )
+        parser.add_argument(
+            '--results-per-page', type=int, default=10, dest='results_per_page',
+            help='Number of hits per query.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0, dest='seed',
+            help='Seed of the catalogs and of the queries.'
+        )
+        parser.add_argument(
+            '--elasticsearch',
+            action='store_true',
+            dest='elasticsearch',
+            help='Also index every catalog into a temporary index and run the queries on Elasticsearch.',
+        )
+        parser.add_argument(
+            '--memory',
+            action='store_true',
+            dest='memory',
+            help='Also load every catalog into a memory index and run the query bodies on it.',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.value_ranges = self.load_value_ranges()
+        for size in options.get('sizes'):
+            self.benchmark(size)
+
+    @staticmethod
+    def load_value_ranges():
+        with open(settings.BASE_DIR / 'search/fixture/framework_values.json', 'r') as f:
+            return {
+                value['value']: (value.get('minimum_value'), value.get('maximum_value')) for value in json.load(f)
+            }
+
+    def benchmark(self, size):
+        print(f'Generating {size} frameworks ...')
+        started = time.monotonic()
+        catalog = SyntheticCatalog(seed=self.options.get('seed'))
+        sources = [
+            get_source(framework_id, record) for framework_id, record in enumerate(catalog.generate(size), start=1)
+        ]
+        print(f'Generated in {time.monotonic() - started:.1f}s')
+
+        snapshot = ColumnarSnapshot(sources, name='benchmark')
+        print(f'Columnar snapshot built in {snapshot.build_time:.1f}s')
+
+        search_queries = [self.build_search_query(query) for query in self.get_queries(sources)]
+        columnar_hits, latencies = [], []
+        for search_query in search_queries:
+            started = time.perf_counter()
+            response = snapshot.search(search_query.get_ranking_params())
+            latencies.append(time.perf_counter() - started)
+            columnar_hits.append([hit['_id'] for hit in response['hits']['hits']])
+        self.report('columnar', size, latencies)
+
+        if self.options.get('elasticsearch'):
+            self.benchmark_elasticsearch(size, sources, search_queries, columnar_hits)
+        if self.options.get('memory'):
+            self.benchmark_memory(size, sources, search_queries, columnar_hits)
+
+    def get_queries(self, sources):
+        """
+        Builds the data of the benchmark queries: single and pairs of words of the names, numbers and
+        exact descriptions, with a filter for one query in four and facets for one in three.
+        """
+        generator = random.Random(self.options.get('seed'))
+        categories = sorted({source['industry_or_category'] for source in sources if source['industry_or_category']})
+        queries = []
+        for _ in range(self.options.get('queries')):
+            source = generator.choice(sources)
+            words = source['name'].lower().split()
+            value = generator.choice([
+                generator.choice(words),
+                ' '.join(generator.sample(words, min(2, len(words)))),
+                source['number'],
+            ])
+            filters = dict(NO_FILTER)
+            if generator.random() < 0.25 and categories:
+                filters['industry_category_type'] = generator.choice(categories)
+            queries.append({
+                'query_type': QUERY_TYPE_CHOICE_SEARCH_ALL,
+                'query': {'value': value, 'preference_frameworks': []},
+                'filter': filters,
+                'facets': generator.random() < 1 / 3,
+            })
+        return queries
+
+    def build_search_query(self, data):
+        search_query = FrameworkSearchQuery()
+        search_query.request = SimpleNamespace(user=SimpleNamespace(id=0), data={})
+        search_query.framework_value_ranges = self.value_ranges
+        search_query.preferences = PreferenceSet(ids=frozenset(), ids_by_name={})
+        search_query.data = data
+        search_query.query_name = 'full'
+        search_query.set_pagination({'page': 1, 'results_per_page': self.options.get('results_per_page')})
+        search_query.query = search_query.prepare_query()
+        return search_query
+
+    def benchmark_elasticsearch(self, size, sources, search_queries, columnar_hits):
+        es = FrameworkDocument._get_connection()
+        index = FrameworkDocument._index.clone(f'{FrameworkDocument._index._name}_benchmark_{size}')
+        index.delete(ignore=404)
+        index.create()
+        try:
+            started = time.monotonic()
+            bulk(es, (
+                {'_index': index._name, '_id': source['id'], '_source': source} for source in sources
+            ), chunk_size=2000, request_timeout=120)
+            index.refresh()
+            print(f'Elasticsearch index built in {time.monotonic() - started:.1f}s')
+
+            self.compare('elasticsearch', size, search_queries, columnar_hits, lambda body: es.search(
+                index=index._name, body=body, request_cache=False
+            ))
+        finally:
+            index.delete(ignore=404)
+
+    def benchmark_memory(self, size, sources, search_queries, columnar_hits):
+        started = time.monotonic()
+        index = InvertedIndex(FrameworkDocument._doc_type.mapping.to_dict()['properties'], name='benchmark')
+        for source in sources:
+            index.add(source['id'], source)
+        index.sort_appended()
+        print(f'Memory index built in {time.monotonic() - started:.1f}s')
+
+        self.compare('memory', size, search_queries, columnar_hits, index.search)
+
+    def compare(self, engine, size, search_queries, columnar_hits, search):
+        """
+        Runs the query bodies with search and reports its latencies and the share of its top hits the
+        columnar engine returned too.
+        """
+        latencies, shared = [], []
+        for search_query, hits in zip(search_queries, columnar_hits):
+            started = time.perf_counter()
+            response = search(search_query.query)
+            latencies.append(time.perf_counter() - started)
+            engine_hits = [hit['_id'] for hit in response['hits']['hits']]
+            if engine_hits:
+                shared.append(len(set(hits) & set(engine_hits)) / len(engine_hits))
+        self.report(engine, size, latencies)
+        if shared:
+            print(f'Top hits returned by both: {100 * sum(shared) / len(shared):.1f}%')
+
+    @staticmethod
+    def report(engine, size, latencies):
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(
+            f'{engine} {size} frameworks: {len(latencies) / sum(latencies):.0f} queries/sec, '
+            f'p50 {p50:.2f}ms, p95 {p95:.2f}ms, p99 {p99:.2f}ms'
+        )
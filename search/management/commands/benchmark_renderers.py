@@ -0,0 +1,126 @@
+import datetime
+import decimal
+import io
+import time
+import uuid
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from search.management.commands.benchmark_ranking import get_source
+from search.models import Framework
+from search.synthetic import SyntheticCatalog
+
+
+class Command(BaseCommand):
+    """
+    Microbenchmarks ORJSONRenderer and ORJSONParser against JSONRenderer and JSONParser.
+
+    The payloads are shaped like the responses of the search and analytics views, and every payload is
+    checked to render and parse the same with both classes.
+    """
+
+    help = 'Benchmark the orjson renderer and parser against the DRF JSON renderer and parser'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=200, dest='iterations',
+            help='Number of times every payload is rendered and parsed.'
+        )
+        parser.add_argument(
+            '--results-per-page', type=int, default=100, dest='results_per_page',
+            help='Number of frameworks of the search page.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0, dest='seed',
+            help='Seed of the synthetic frameworks.'
+        )
+
+    def handle(self, *args, **options):
+        self.iterations = options.get('iterations')
+        payloads = self.get_payloads(options.get('results_per_page'), options.get('seed'))
+
+        print(f'{"payload":<20}{"bytes":>10}{"render stdlib":>16}{"render orjson":>16}{"parse stdlib":>16}'
+              f'{"parse orjson":>16}')
+        for name, data in payloads.items():
+            rendered = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != rendered:
+                raise CommandError(f'The {name} payload renders differently with ORJSONRenderer')
+            if ORJSONParser().parse(io.BytesIO(rendered)) != JSONParser().parse(io.BytesIO(rendered)):
+                raise CommandError(f'The {name} payload parses differently with ORJSONParser')
+
+            timings = [
+                self.measure(lambda: JSONRenderer().render(data)),
+                self.measure(lambda: ORJSONRenderer().render(data)),
+                self.measure(lambda: JSONParser().parse(io.BytesIO(rendered))),
+                self.measure(lambda: ORJSONParser().parse(io.BytesIO(rendered))),
+            ]
+            print(f'{name:<20}{len(rendered):>10}' + ''.join(f'{timing:>14.1f}us' for timing in timings))
+            print(f'{"":<30}{"":>16}{timings[0] / timings[1]:>15.1f}x{"":>16}{timings[2] / timings[3]:>15.1f}x')
+
+    def measure(self, function):
+        """
+        Returns the mean duration of function over the iterations, in microseconds.
+        """
+        started = time.perf_counter()
+        for _ in range(self.iterations):
+            function()
+        return (time.perf_counter() - started) / self.iterations * 1e6
+
+    @staticmethod
+    def get_payloads(results_per_page, seed):
+        records = SyntheticCatalog(seed=seed).generate(results_per_page)
+        sources = [get_source(framework_id, record) for framework_id, record in enumerate(records, start=1)]
+        search_page = {
+            'total_count': len(sources),
+            'page': 1,
+            'results_per_page': results_per_page,
+            'data': [
+                {
+                    'framework_id': source['id'],
+                    'framework_name': source['name'],
+                    'framework_number': source['number'],
+                    'framework_value': source['value'],
+                    'industry_type': source['industry_or_category'],
+                    'sub_category': source['sub_category'],
+                    'description': source['description'],
+                    'start_date': source['start_date'],
+                    'end_date': source['end_date'],
+                    'framework_image': source['logo_path'],
+                }
+                for source in sources
+            ],
+        }
+
+        first_day = datetime.date(2023, 1, 1)
+        search_volumes = [
+            {'day': (first_day + datetime.timedelta(days=day)).strftime('%d %b'), 'volume': day * 7 % 113}
+            for day in range(365)
+        ]
+        typed_rows = [
+            {
+                'id': uuid.UUID(int=index),
+                'searched_date': timezone.now() - datetime.timedelta(minutes=index),
+                'start_date': first_day + datetime.timedelta(days=index),
+                'value': decimal.Decimal(index * 1000) / 8,
+                'message': gettext_lazy('Search with value'),
+            }
+            for index in range(results_per_page)
+        ]
+
+        sub_categories = Framework.objects.values_list('sub_category', flat=True).distinct()
+        # fills the result cache of the queryset, rendering it does not query the database again
+        list(sub_categories)
+
+        return {
+            'search_page': search_page,
+            'framework_names': [{'id': source['id'], 'name': source['name']} for source in sources[:10]],
+            'search_volume': search_volumes,
+            'typed_rows': typed_rows,
+            'values_list': {'industry_types': ['Buildings'], 'sub_categories': sub_categories},
+        }
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import time
+
+from django.core.management import BaseCommand
+from elasticsearch.serializer import JSONSerializer
+
+from search.documents import FrameworkDocument
+
+MISSING = 'missing'
+ORPHANED = 'orphaned'
+DIVERGENT = 'divergent'
+
+
+def get_fingerprint(source):
+    """
+    Computes the fingerprint of a document _source, the same for equal documents whatever the order of
+    their keys and of their nested objects.
+
+    Args:
+        source (dict): The _source, as indexed or as returned by Elasticsearch.
+
+    Returns:
+        str: The SHA-1 hex digest.
+    """
+    def canonicalize(value):
+        if isinstance(value, dict):
+            return {key: canonicalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            items = [canonicalize(item) for item in value]
+            return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+        return value
+
+    return hashlib.sha1(json.dumps(canonicalize(source), sort_keys=True).encode()).hexdigest()
+
+
+class Command(BaseCommand):
+    """
+    Compares the framework index with the database and optionally repairs it.
+
+    The Framework rows and the documents are walked side by side in id order, and the documents are
+    reported as missing, orphaned or divergent.
+    """
+
+    help = 'Compare the framework index with the database, and repair it with --repair'
+    document = FrameworkDocument
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, dest='batch_size',
+            help='Number of frameworks and documents read at once, and of repairs sent per bulk request.'
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            dest='repair',
+            help='Index the missing and divergent frameworks and delete the orphaned documents.',
+        )
+        parser.add_argument(
+            '--show', type=int, default=20, dest='show',
+            help='Number of ids printed per kind of inconsistency.'
+        )
+
+    def handle(self, *args, **options):
+        self.es = self.document._get_connection()
+        self.index_name = self.document._index._name
+        self.batch_size = options.get('batch_size')
+        self.show = options.get('show')
+        self.counts = {'checked': 0, MISSING: 0, ORPHANED: 0, DIVERGENT: 0, 'repaired': 0}
+        repairs = []
+        started = time.monotonic()
+
+        print(f'Checking {self.index_name} ...')
+        for kind, framework_id, source in self.compare(self.iter_database(), self.iter_index()):
+            self.counts[kind] += 1
+            if self.counts[kind] <= self.show:
+                print(f'{kind}: {framework_id}')
+
+            if options.get('repair'):
+                if kind == ORPHANED:
+                    repairs.append({'_op_type': 'delete', '_index': self.index_name, '_id': framework_id})
+                else:
+                    repairs.append(
+                        {'_op_type': 'index', '_index': self.index_name, '_id': framework_id, '_source': source}
+                    )
+                if len(repairs) >= self.batch_size:
+                    self.repair(repairs)
+                    repairs = []
+        if repairs:
+            self.repair(repairs)
+
+        elapsed = time.monotonic() - started
+        print(
+            f'Done in {elapsed:.1f}s, {self.counts["checked"]} frameworks and documents checked, '
+            f'{self.counts[MISSING]} missing, {self.counts[ORPHANED]} orphaned, {self.counts[DIVERGENT]} divergent, '
+            f'{self.counts["repaired"]} repaired'
+        )
+
+    def iter_database(self):
+        """
+        Yields the id, fingerprint and _source of every framework as it is indexed, in id order.
+        """
+        document = self.document()
+        serializer = JSONSerializer()
+        queryset = document.get_queryset().prefetch_related('cpvs').order_by('id')
+        last_id = 0
+        while frameworks := list(queryset.filter(id__gt=last_id)[:self.batch_size]):
+            for framework in frameworks:
+                if document.should_index_object(framework):
+                    # serialized like the bulk request, e.g. dates as ISO strings
+                    source = json.loads(serializer.dumps(document.prepare(framework)))
+                    yield framework.id, get_fingerprint(source), source
+            last_id = frameworks[-1].id
+
+    def iter_index(self):
+        """
+        Yields the id and fingerprint of every document, in id order.
+        """
+        search_after = None
+        while True:
+            body = {'size': self.batch_size, 'sort': [{'id': 'asc'}], 'track_total_hits': False}
+            if search_after is not None:
+                body['search_after'] = search_after
+            hits = self.es.search(index=self.index_name, body=body)['hits']['hits']
+            for hit in hits:
+                yield int(hit['_id']), get_fingerprint(hit['_source'])
+            if len(hits) < self.batch_size:
+                return
+            search_after = hits[-1]['sort']
+
+    def compare(self, frameworks, documents):
+        """
+        Merges the sorted frameworks and documents.
+
+        Yields:
+            tuple: The kind of inconsistency, the id, and the _source of the framework, None when orphaned.
+        """
+        framework = next(frameworks, None)
+        document = next(documents, None)
+        while framework is not None or document is not None:
+            self.counts['checked'] += 1
+            if document is None or (framework is not None and framework[0] < document[0]):
+                yield MISSING, framework[0], framework[2]
+                framework = next(frameworks, None)
+            elif framework is None or document[0] < framework[0]:
+                yield ORPHANED, document[0], None
+                document = next(documents, None)
+            else:
+                if framework[1] != document[1]:
+                    yield DIVERGENT, framework[0], framework[2]
+                framework = next(frameworks, None)
+                document = next(documents, None)
+
+    def repair(self, actions):
+        """
+        Applies the repairs with a bulk request.
+        """
+        repaired, errors = self.document().bulk(actions, raise_on_error=False)
+        self.counts['repaired'] += repaired
+        # the orphaned document may have been deleted since
+        for error in errors:
+            if error.get('delete', {}).get('status') != 404:
+                print(f'Not repaired: {error}')
@@ -1,23 +1,170 @@
-import elasticsearch
-from django.conf import settings
-from django.core.management import BaseCommand
-from elasticsearch import Elasticsearch
+import itertools
+import re
+import sys
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from elasticsearch.helpers import bulk
+
+from search.documents import FrameworkDocument
+from search.generation import index_generation
+from search.models import Framework
+
+ID_SEPARATOR_PATTERN = re.compile(r'[\s,]+')
 
 
 class Command(BaseCommand):
+    """
+    Deletes framework documents from elasticsearch, and optionally the framework rows.
+
+    Documents are selected by id, given as arguments or streamed from a file or stdin, or by selectors.
+    Ids are deleted in batches through the bulk API. Selectors on indexed fields are run as a single
+    delete by query request, unless the rows are deleted too or site_name is used, which is not indexed:
+    the ids are then read from the database in batches of increasing id.
+
+    With --delete-rows, the rows of each batch are deleted in their own transaction.
+    """
+
     help = 'Delete documents from elasticsearch'
-    index_name = settings.FRAMEWORK_INDEX_NAME
+    document = FrameworkDocument
 
     def add_arguments(self, parser):
-        parser.add_argument('ids', nargs='+', type=int, help='List of documents ids comma separated')
+        parser.add_argument('ids', nargs='*', type=int, help='List of documents ids comma separated')
+        parser.add_argument(
+            '--file', dest='file',
+            help='File of documents ids separated by commas or whitespace, - to read them from stdin.'
+        )
+        parser.add_argument(
+            '--expired-before', dest='expired_before',
+            help='Select the frameworks whose end_date is before this date (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--site-name', action='append', dest='site_names', default=[],
+            help='Select the frameworks of this site_name, can be repeated.'
+        )
+        parser.add_argument(
+            '--unavailable',
+            action='store_true',
+            dest='unavailable',
+            help='Select the frameworks which are not available.',
+        )
+        parser.add_argument(
+            '--delete-rows',
+            action='store_true',
+            dest='delete_rows',
+            help='Delete the framework rows from the database too.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, dest='batch_size',
+            help='Number of documents deleted per bulk request and rows per transaction.'
+        )
 
     def handle(self, *args, **options):
-        ids = set(options.get('ids'))
-        es = Elasticsearch(settings.ELASTIC_SEARCH_URL)
-
-        for document_id in ids:
-            try:
-                es.delete(index=self.index_name, id=document_id)
-                print(f'{document_id} is deleted successfully')
-            except elasticsearch.exceptions.NotFoundError:
-                print(f'{document_id} is not found')
+        self.es = self.document._get_connection()
+        self.index_name = self.document._index._name
+        self.batch_size = options.get('batch_size')
+        self.delete_rows = options.get('delete_rows')
+        self.counts = {'deleted': 0, 'not_found': 0, 'rows': 0}
+        started = time.monotonic()
+
+        has_selectors = options.get('expired_before') or options.get('site_names') or options.get('unavailable')
+        if options.get('ids') or options.get('file'):
+            if has_selectors:
+                raise CommandError('Ids and selectors cannot be used together')
+            self.delete_ids(self.iter_ids(options))
+        elif not has_selectors:
+            raise CommandError('Give ids, --file or a selector')
+        elif self.delete_rows or options.get('site_names'):
+            self.delete_ids(self.iter_selected_ids(options))
+        else:
+            self.delete_by_query(options)
+
+        # the documents are deleted without the document bulk(), which sends post_index
+        index_generation.bump()
+        elapsed = time.monotonic() - started
+        print(
+            f'Done in {elapsed:.1f}s, {self.counts["deleted"]} documents deleted, '
+            f'{self.counts["not_found"]} not found, {self.counts["rows"]} rows deleted'
+        )
+
+    @staticmethod
+    def iter_ids(options):
+        """
+        Yields the ids given as arguments, then those of the file, read line by line.
+        """
+        yield from options.get('ids')
+        if not options.get('file'):
+            return
+
+        file = sys.stdin if options.get('file') == '-' else open(options.get('file'), 'r')
+        try:
+            for line in file:
+                for value in ID_SEPARATOR_PATTERN.split(line.strip()):
+                    if value:
+                        try:
+                            yield int(value)
+                        except ValueError as e:
+                            raise CommandError(f'{value} is not a document id') from e
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+    def iter_selected_ids(self, options):
+        """
+        Yields the ids of the frameworks matching the selectors, read in batches of increasing id.
+        """
+        queryset = Framework.objects.all()
+        if options.get('expired_before'):
+            queryset = queryset.filter(end_date__lt=options.get('expired_before'))
+        if options.get('site_names'):
+            queryset = queryset.filter(site_name__in=options.get('site_names'))
+        if options.get('unavailable'):
+            queryset = queryset.filter(is_available=False)
+
+        last_id = 0
+        queryset = queryset.order_by('id').values_list('id', flat=True)
+        while ids := list(queryset.filter(id__gt=last_id)[:self.batch_size]):
+            yield from ids
+            last_id = ids[-1]
+
+    def delete_ids(self, ids):
+        """
+        Deletes the documents of ids, and their rows with --delete-rows, one batch at a time.
+        """
+        ids = iter(ids)
+        while batch := list(itertools.islice(ids, self.batch_size)):
+            actions = ({'_op_type': 'delete', '_index': self.index_name, '_id': document_id} for document_id in batch)
+            deleted, errors = bulk(self.es, actions, raise_on_error=False)
+            not_found = [error for error in errors if error.get('delete', {}).get('status') == 404]
+            if len(not_found) < len(errors):
+                raise CommandError(
+                    f'{len(errors) - len(not_found)} documents were not deleted, first error: {errors[0]}'
+                )
+
+            self.counts['deleted'] += deleted
+            self.counts['not_found'] += len(not_found)
+            if self.delete_rows:
+                with transaction.atomic():
+                    self.counts['rows'] += Framework.objects.filter(id__in=batch).delete()[1].get(
+                        Framework._meta.label, 0
+                    )
+            print(f'{self.counts["deleted"]} documents deleted, {self.counts["not_found"]} not found')
+
+    def delete_by_query(self, options):
+        """
+        Deletes the documents matching the selectors with a single delete by query request.
+        """
+        filters = []
+        if options.get('expired_before'):
+            filters.append({'range': {'end_date': {'lt': options.get('expired_before')}}})
+        if options.get('unavailable'):
+            filters.append({'term': {'is_available': False}})
+
+        response = self.es.delete_by_query(
+            index=self.index_name, body={'query': {'bool': {'filter': filters}}},
+            conflicts='proceed', slices='auto', refresh=True
+        )
+        if response.get('failures'):
+            raise CommandError(f'{len(response["failures"])} documents were not deleted: {response["failures"][0]}')
+        self.counts['deleted'] += response['deleted']
@@ -5,7 +5,9 @@ import uuid
 from django.conf import settings
 from django.core.management import BaseCommand
 
+from search.generation import index_generation
 from search.models import Framework, Cpv, Document, LOT, Supplier, FrameworkValue
+from search.snapshots import framework_value_ranges
 
 
 class Command(BaseCommand):
@@ -16,4 +18,7 @@ class Command(BaseCommand):
         with open(settings.BASE_DIR / 'search/fixture/framework_values.json', 'r') as f:
             data = json.load(f)
             FrameworkValue.objects.bulk_create([FrameworkValue(**block) for block in data])
+            # bulk_create sends no post_save signal
+            framework_value_ranges.invalidate()
+            index_generation.bump()
             print('Done')
@@ -0,0 +1,126 @@
+import json
+import random
+import sys
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from administrator.models import SearchEvent
+from search.constants import QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_SEARCH_ALL
+from search.generation import index_generation
+from search.ingestion import FrameworkLoader
+from search.models import Framework
+from search.synthetic import SyntheticCatalog
+
+
+class Command(BaseCommand):
+    """
+    Generates a synthetic catalog of frameworks with SyntheticCatalog, drawn from the distributions of the
+    fixture, at any size.
+
+    The records are loaded with FrameworkLoader or written as NDJSON with --output. With --search-events,
+    search events of the users on the loaded frameworks are also created.
+    """
+
+    help = 'Generate a synthetic catalog of frameworks, loaded into the database or written as NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('size', type=int, help='Number of frameworks.')
+        parser.add_argument(
+            '--seed', type=int, default=0, dest='seed',
+            help='Seed of the generator, the same seed generates the same catalog.'
+        )
+        parser.add_argument(
+            '--start', type=int, default=0, dest='start',
+            help='Sequence number of the first framework, to extend a generated catalog.'
+        )
+        parser.add_argument(
+            '--output', dest='output',
+            help='NDJSON file the records are written to instead of the database, - for stdout.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, dest='batch_size',
+            help='Number of frameworks saved per transaction.'
+        )
+        parser.add_argument(
+            '--search-events', type=int, default=0, dest='search_events',
+            help='Number of search events created over the last year.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        catalog = SyntheticCatalog(seed=options.get('seed'))
+        records = catalog.generate(options.get('size'), start=options.get('start'))
+
+        if output := options.get('output'):
+            if output == '-':
+                self.write(records, sys.stdout)
+            else:
+                with open(output, 'w') as f:
+                    self.write(records, f)
+        else:
+            self.load(records)
+
+        if options.get('search_events'):
+            self.create_search_events(options.get('search_events'))
+
+    def write(self, records, file):
+        started = time.monotonic()
+        for written, record in enumerate(records, start=1):
+            file.write(json.dumps(record) + '\n')
+            if written % self.options.get('batch_size') == 0:
+                self.report(written, time.monotonic() - started)
+
+    def load(self, records):
+        print('Populating ...')
+        # indexed as a whole by reindex_frameworks rather than one outbox row per framework
+        counts = FrameworkLoader(batch_size=self.options.get('batch_size'), reindex=False).load(
+            records, report=lambda read, elapsed: self.report(read, elapsed)
+        )
+        # bulk_create sends no post_save signal
+        index_generation.bump()
+        print('Done, ' + ', '.join(f'{name}: {count}' for name, count in counts.items()))
+        print('Run reindex_frameworks to index the catalog.')
+
+    @staticmethod
+    def report(count, elapsed):
+        # progress goes to stderr, stdout may hold the records
+        print(f'{count} records generated ({count / max(elapsed, 0.001):.0f} records/sec)', file=sys.stderr)
+
+    def create_search_events(self, count):
+        """
+        Creates count search events, by the users at random, for the names and words of frameworks at
+        random with some other frameworks as results, at times spread over the last year.
+        """
+        generator = random.Random(self.options.get('seed'))
+        user_ids = list(get_user_model().objects.values_list('id', flat=True))
+        frameworks = list(Framework.objects.order_by('?').values_list('id', 'name', 'industry_or_category')[:10000])
+        if not user_ids or not frameworks:
+            print('Search events need users and frameworks in the database.')
+            return
+
+        now = timezone.now()
+        batch_size = self.options.get('batch_size')
+        for start in range(0, count, batch_size):
+            events = []
+            for _ in range(min(batch_size, count - start)):
+                framework_id, name, category = generator.choice(frameworks)
+                by_name = generator.random() < 0.5
+                # the searched framework first, then other results
+                framework_ids = [framework_id, *(other[0] for other in generator.sample(
+                    frameworks, min(len(frameworks), generator.randrange(10))
+                ) if other[0] != framework_id)]
+                events.append(SearchEvent(
+                    user_id=generator.choice(user_ids),
+                    searched_date=now - timedelta(seconds=generator.randrange(365 * 24 * 3600)),
+                    query=name.lower() if by_name else generator.choice(name.lower().split()),
+                    query_type=QUERY_TYPE_CHOICE_BY_NAME if by_name else QUERY_TYPE_CHOICE_SEARCH_ALL,
+                    filters={'industry_category_type': category} if category and generator.random() < 0.25 else {},
+                    total_count=len(framework_ids),
+                    framework_ids=framework_ids,
+                ))
+            SearchEvent.objects.bulk_create(events)
+        print(f'{count} search events created')
@@ -0,0 +1,308 @@
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from administrator.constants import MONTHLY, YEARLY
+from search.constants import (
+    QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_BY_NUMBER, QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICE_SEARCH_ALL
+)
+from search.models import Framework, FrameworkValue
+
+# default share of the requests of every endpoint
+DEFAULT_MIX = {
+    'framework': 55,
+    'framework-names': 20,
+    'framework-numbers': 10,
+    'volume-data': 5,
+    'top-searches': 5,
+    'top-industries': 5,
+}
+ENDPOINT_PATHS = {
+    'framework': '/search/framework/',
+    'framework-names': '/search/framework-names/',
+    'framework-numbers': '/search/framework-numbers/',
+    'volume-data': '/administrator/volume-data/',
+    'top-searches': '/administrator/top-searches/',
+    'top-industries': '/administrator/top-industries/',
+}
+
+# number of frameworks the search terms are drawn from
+SAMPLE_SIZE = 1000
+
+
+class SearchRequests:
+    """
+    Builds the bodies of the requests of the load test from a sample of the frameworks of the database,
+    like the search page of the front end sends them.
+
+    Mixes searches by words, name, number and value with filters, facets and later pages, suggestions and
+    analytics requests.
+    """
+
+    def __init__(self, seed=0):
+        frameworks = list(
+            Framework.objects.order_by('?').values_list('name', 'number', 'industry_or_category')[:SAMPLE_SIZE]
+        )
+        if not frameworks:
+            raise CommandError('The database has no framework, generate a catalog with generate_catalog first.')
+        self.names = [name for name, _, _ in frameworks if name]
+        self.words = [word for name in self.names for word in name.lower().split() if len(word) > 3]
+        self.numbers = [number for _, number, _ in frameworks if number]
+        self.categories = sorted({category for _, _, category in frameworks if category})
+        self.values = list(FrameworkValue.objects.values_list('value', flat=True))
+        self.seed = seed
+
+    def get_generator(self, worker):
+        return random.Random(f'{self.seed}-{worker}')
+
+    def build(self, endpoint, generator):
+        """
+        Builds the body of a request to endpoint.
+
+        Returns:
+            dict: The JSON body.
+        """
+        return getattr(self, f'build_{endpoint.replace("-", "_")}')(generator)
+
+    def build_framework(self, generator):
+        query_type = generator.choices(
+            [QUERY_TYPE_CHOICE_SEARCH_ALL, QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_BY_NUMBER,
+             QUERY_TYPE_CHOICE_BY_VALUE],
+            weights=[50, 25, 15, 10 if self.values else 0],
+        )[0]
+        if query_type == QUERY_TYPE_CHOICE_SEARCH_ALL:
+            value = ' '.join(generator.sample(self.words, generator.choice([1, 1, 2])))
+        elif query_type == QUERY_TYPE_CHOICE_BY_NAME:
+            value = generator.choice(self.names)
+        elif query_type == QUERY_TYPE_CHOICE_BY_NUMBER:
+            value = generator.choice(self.numbers)
+        else:
+            value = generator.choice(self.values)
+
+        data = {
+            'query_type': query_type,
+            'query': {'value': value, 'preference_frameworks': []},
+            'page': 2 if generator.random() < 0.1 else 1,
+        }
+        if self.categories and generator.random() < 0.25:
+            data['filter'] = {'industry_category_type': generator.choice(self.categories)}
+        if generator.random() < 1 / 3:
+            data['facets'] = True
+        return data
+
+    def build_framework_names(self, generator):
+        name = generator.choice(self.names)
+        return {'framework_name': name[:generator.randint(2, max(2, min(len(name), 12)))]}
+
+    def build_framework_numbers(self, generator):
+        number = generator.choice(self.numbers)
+        return {'framework_number': number[:generator.randint(3, max(3, len(number)))]}
+
+    @staticmethod
+    def build_volume_data(generator):
+        return {'duration': generator.choice([MONTHLY, YEARLY])}
+
+    build_top_searches = build_volume_data
+    build_top_industries = build_volume_data
+
+
+def get_latency_summary(latencies):
+    """
+    Summarizes latencies in seconds.
+
+    Returns:
+        dict: The mean, p50, p95, p99 and maximum latencies in milliseconds.
+    """
+    if not latencies:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    milliseconds = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    return {
+        'mean': round(float(milliseconds.mean()), 3),
+        'p50': round(float(p50), 3),
+        'p95': round(float(p95), 3),
+        'p99': round(float(p99), 3),
+        'max': round(float(milliseconds.max()), 3),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Drives the search and analytics endpoints of a running server with a realistic mix of requests and
+    concurrency, and reports the throughput and latencies as JSON, to be compared between versions.
+
+    Every worker thread sends its requests one after the other on a keep-alive connection, so the
+    concurrency is the number of requests in flight. Requests sent during the warm-up are not counted.
+    """
+
+    help = 'Load test the search and analytics endpoints of a running server, and report the latencies as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default='http://localhost:8000', dest='base_url',
+            help='URL of the server.'
+        )
+        parser.add_argument(
+            '--email', dest='email',
+            help='Email of the user the requests are sent as, an access token is issued for it.'
+        )
+        parser.add_argument(
+            '--token', dest='token',
+            help='Access token the requests are sent with, instead of --email.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8, dest='concurrency',
+            help='Number of requests in flight.'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=30, dest='duration',
+            help='Seconds the requests are counted for, after the warm-up.'
+        )
+        parser.add_argument(
+            '--warmup', type=float, default=5, dest='warmup',
+            help='Seconds of requests sent before counting.'
+        )
+        parser.add_argument(
+            '--mix', nargs='+', dest='mix', metavar='ENDPOINT=WEIGHT',
+            help=f'Share of the requests of the endpoints, among {", ".join(ENDPOINT_PATHS)}. '
+                 f'Defaults to {" ".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items())}.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0, dest='seed',
+            help='Seed of the request bodies.'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30, dest='timeout',
+            help='Seconds before a request fails.'
+        )
+        parser.add_argument(
+            '--output', dest='output',
+            help='File the JSON report is written to. Defaults to stdout.'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.mix = self.get_mix(options.get('mix'))
+        self.token = options.get('token') or self.get_token(options.get('email'))
+        self.requests = SearchRequests(seed=options.get('seed'))
+        url = urlsplit(options.get('base_url'))
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.netloc, self.path_prefix = url.netloc, url.path.rstrip('/')
+
+        self.results = []
+        self.results_lock = threading.Lock()
+        started = time.monotonic()
+        self.counted_from = started + options.get('warmup')
+        self.deadline = self.counted_from + options.get('duration')
+
+        print(
+            f'Load testing {options.get("base_url")} with {options.get("concurrency")} workers for '
+            f'{options.get("warmup")}s + {options.get("duration")}s ...',
+            file=sys.stderr
+        )
+        workers = [
+            threading.Thread(target=self.run_worker, args=(worker,), daemon=True)
+            for worker in range(options.get('concurrency'))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        report = json.dumps(self.get_report(), indent=2, sort_keys=True)
+        if options.get('output'):
+            with open(options.get('output'), 'w') as f:
+                f.write(report + '\n')
+        else:
+            print(report)
+
+    @staticmethod
+    def get_mix(mix):
+        if not mix:
+            return dict(DEFAULT_MIX)
+        weights = {}
+        for item in mix:
+            endpoint, _, weight = item.partition('=')
+            if endpoint not in ENDPOINT_PATHS or not weight.replace('.', '', 1).isdigit():
+                raise CommandError(f'Invalid mix {item}, expected ENDPOINT=WEIGHT with ENDPOINT among '
+                                   f'{", ".join(ENDPOINT_PATHS)}')
+            weights[endpoint] = float(weight)
+        return weights
+
+    @staticmethod
+    def get_token(email):
+        if not email:
+            raise CommandError('Either --email or --token is required.')
+        try:
+            user = get_user_model().objects.get(email=email)
+        except get_user_model().DoesNotExist as e:
+            raise CommandError(f'No user with email {email}') from e
+        return str(RefreshToken.for_user(user).access_token)
+
+    def run_worker(self, worker):
+        generator = self.requests.get_generator(worker)
+        endpoints, weights = list(self.mix), list(self.mix.values())
+        connection = self.connection_class(self.netloc, timeout=self.options.get('timeout'))
+        headers = {'Authorization': f'Bearer {self.token}', 'Content-Type': 'application/json'}
+        results = []
+        try:
+            while (sent := time.monotonic()) < self.deadline:
+                endpoint = generator.choices(endpoints, weights=weights)[0]
+                body = json.dumps(self.requests.build(endpoint, generator))
+                try:
+                    connection.request('POST', self.path_prefix + ENDPOINT_PATHS[endpoint], body, headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    # the connection is reopened by the next request
+                    connection.close()
+                    status = None
+                if sent >= self.counted_from:
+                    results.append((endpoint, status, time.monotonic() - sent))
+        finally:
+            connection.close()
+            with self.results_lock:
+                self.results.extend(results)
+
+    def get_report(self):
+        duration = self.options.get('duration')
+        endpoints = {}
+        for endpoint in self.mix:
+            results = [result for result in self.results if result[0] == endpoint]
+            statuses = {}
+            for _, status, _ in results:
+                statuses[str(status or 'error')] = statuses.get(str(status or 'error'), 0) + 1
+            endpoints[endpoint] = {
+                'requests': len(results),
+                'errors': sum(1 for _, status, _ in results if not status or not 200 <= status < 300),
+                'statuses': statuses,
+                'throughput': round(len(results) / duration, 2),
+                'latency_ms': get_latency_summary([
+                    latency for _, status, latency in results if status and 200 <= status < 300
+                ]),
+            }
+
+        return {
+            'config': {
+                name: self.options.get(name) for name in ('base_url', 'concurrency', 'duration', 'warmup', 'seed')
+            } | {'mix': self.mix},
+            'total': {
+                'requests': len(self.results),
+                'errors': sum(summary['errors'] for summary in endpoints.values()),
+                'throughput': round(len(self.results) / duration, 2),
+                'latency_ms': get_latency_summary([
+                    latency for _, status, latency in self.results if status and 200 <= status < 300
+                ]),
+            },
+            'endpoints': endpoints,
+        }
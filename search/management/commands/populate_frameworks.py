@@ -1,81 +1,58 @@
-import datetime
-import json
-import uuid
+import sys
 
 from django.conf import settings
 from django.core.management import BaseCommand
 
-from search.models import Framework, Cpv, Document, LOT, Supplier
-
-
-def format_date(string_date):
-    datetime_obj = datetime.datetime.strptime(string_date, "%d/%m/%Y")
-    return datetime_obj.strftime("%Y-%m-%d")
+from search.generation import index_generation
+from search.ingestion import FrameworkLoader, FrameworkUpserter, iter_json_records
+from search.outbox import is_outbox_enabled
 
 
 class Command(BaseCommand):
     help = 'Populate database'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=str(settings.BASE_DIR / 'search/fixture/frameworks.json'),
+            help='JSON array or NDJSON file of scraped frameworks, - to read from stdin. Defaults to the fixture.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, dest='batch_size',
+            help='Number of frameworks saved per transaction.'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            dest='upsert',
+            help='Load a full scrape: create new frameworks, update changed ones and make missing ones unavailable.',
+        )
+        parser.add_argument(
+            '--keep-missing',
+            action='store_true',
+            dest='keep_missing',
+            help='With --upsert, leave the frameworks missing from the scrape available, for partial scrapes.',
+        )
+
     def handle(self, *args, **options):
         print('Populating ...')
-        with open(settings.BASE_DIR / 'search/fixture/frameworks.json', 'r') as f:
-            data = json.load(f)
-            for block in data:
-                if framework_name := block.get('framework_name'):
-                    framework = Framework.objects.create(
-                        name=framework_name,
-                        site_name="_".join(block.get('framework_name').split(' ')) + str(uuid.uuid4())[:10],
-                        number=block.get('framework_number'),
-                        lot_number=block.get('number_of_lots'),
-                        value=block.get('framework_value'),
-                        value_number=int(''.join(filter(str.isdigit, block.get('framework_value')))) if block.get('framework_value') else None,
-                        start_date=format_date(block.get('start_date')),
-                        end_date=format_date(block.get('end_date')),
-                        service_type=block.get('service_type'),
-                        description=block.get('description') if isinstance(block.get('description'), str) else "\n".join(block.get('description', [])),
-                        logo=block.get('logo'),
-                        industry_or_category=block.get('category_name'),
-                        sub_category=block.get('subcategory'),
-                    )
-
-                    for cpv in block.get('cpv_code_details', []):
-                        other_cpv_codes = cpv.get('other_cpv_codes')
-                        if other_cpv_codes is None:
-                            other_cpv_codes = []
-
-                        for code in other_cpv_codes:
-                            Cpv.objects.create(
-                                code=code,
-                                framework=framework,
-                            )
-
-                    for doc_name, doc_link in block.get('documents', {}).items():
-                        Document.objects.create(
-                            framework=framework,
-                            name=doc_name,
-                            link=doc_link
-                        )
-
-                    if isinstance(block.get('lot_name'), str) and isinstance(block.get('lot_description'), str):
-                        LOT.objects.create(
-                            name=block.get('lot_name')[:250],
-                            description=block.get('lot_description'),
-                            framework=framework
-                        )
-                    elif isinstance(block.get('lot_name'), list) and isinstance(block.get('lot_description'), list):
-                        length = min(len(block.get('lot_name')), len(block.get('lot_description')))
-                        for index in range(length):
-                            LOT.objects.create(
-                                name=block.get('lot_name')[index],
-                                description=block.get('lot_description')[index],
-                                framework=framework
-                            )
-
-                    for supplier_name, supplier_link in block.get('suppliers', {}).items():
-                        Supplier.objects.create(
-                            framework=framework,
-                            name=supplier_name,
-                            link=supplier_link
-                        )
-
-            print('Done')
+        if options.get('upsert'):
+            loader = FrameworkUpserter(batch_size=options.get('batch_size'), keep_missing=options.get('keep_missing'))
+        else:
+            loader = FrameworkLoader(batch_size=options.get('batch_size'))
+
+        def report(read, elapsed):
+            print(f'{read} records read ({read / max(elapsed, 0.001):.0f} records/sec)')
+
+        if options.get('path') == '-':
+            counts = loader.load(iter_json_records(sys.stdin), report=report)
+        else:
+            with open(options.get('path'), 'r') as f:
+                counts = loader.load(iter_json_records(f), report=report)
+
+        # bulk_create sends no post_save signal
+        index_generation.bump()
+        print('Done, ' + ', '.join(f'{name}: {count}' for name, count in counts.items()))
+        if loader.document is None:
+            print('The frameworks were not indexed as ELASTICSEARCH_DSL_AUTOSYNC is off, run reindex_frameworks.')
+        elif is_outbox_enabled():
+            print('The frameworks were added to the index outbox, process_index_outbox indexes them.')
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management import BaseCommand
+
+from search.outbox import OutboxProcessor
+
+
+class Command(BaseCommand):
+    help = 'Apply the pending framework index updates of the index outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500, dest='batch_size',
+            help='Number of outbox rows applied per bulk request.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1, dest='poll_interval',
+            help='Seconds to wait when the outbox has no row to apply.'
+        )
+        parser.add_argument(
+            '--max-backoff', type=float, default=300, dest='max_backoff',
+            help='Maximum seconds between two attempts of a failing update.'
+        )
+        parser.add_argument(
+            '--report-interval', type=float, default=60, dest='report_interval',
+            help='Seconds between two reports of the outbox lag.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            dest='once',
+            help='Exit once no row is left to apply instead of waiting for new ones.',
+        )
+
+    def handle(self, *args, **options):
+        processor = OutboxProcessor(batch_size=options.get('batch_size'), max_backoff=options.get('max_backoff'))
+        processed = failed = 0
+        reported_at = time.monotonic()
+
+        print('Processing the index outbox ...')
+        try:
+            while True:
+                batch_processed, batch_failed = processor.process_batch()
+                processed += batch_processed
+                failed += batch_failed
+
+                if time.monotonic() - reported_at >= options.get('report_interval'):
+                    self.report(processor, processed, failed)
+                    reported_at = time.monotonic()
+
+                if not batch_processed:
+                    if options.get('once'):
+                        break
+                    time.sleep(options.get('poll_interval'))
+        except KeyboardInterrupt:
+            pass
+        self.report(processor, processed, failed)
+
+    @staticmethod
+    def report(processor, processed, failed):
+        pending, lag = processor.get_lag()
+        print(f'{processed} rows processed, {failed} failed updates, {pending} rows pending, lag {lag:.1f}s')
@@ -0,0 +1,267 @@
+import datetime
+import time
+
+from django.core.management import BaseCommand, CommandError
+from elasticsearch.helpers import bulk, parallel_bulk
+
+from search.documents import FrameworkDocument
+from search.generation import index_generation
+
+META_KEY = 'reindex'
+STATUS_LOADING = 'loading'
+STATUS_DONE = 'done'
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the framework index without downtime.
+
+    FRAMEWORK_INDEX_NAME is used as an alias pointing to a versioned index. The new version is loaded in
+    chunks of increasing Framework ids, resumable with --resume, then the frameworks changed meanwhile are
+    indexed again and the alias is moved to it with a single atomic request.
+    """
+
+    help = 'Rebuild the framework index into a new version and switch the alias to it'
+    document = FrameworkDocument
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000, dest='chunk_size',
+            help='Number of frameworks read from the database and indexed between two checkpoints.'
+        )
+        parser.add_argument(
+            '--bulk-size', type=int, default=500, dest='bulk_size',
+            help='Number of documents sent per bulk request.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4, dest='workers',
+            help='Number of bulk requests sent in parallel.'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            dest='resume',
+            help='Continue the last interrupted rebuild instead of starting a new one.',
+        )
+        parser.add_argument(
+            '--wait-for-status', choices=['green', 'yellow'], default='yellow', dest='wait_for_status',
+            help='Cluster health status the new index must reach before the alias is switched.'
+        )
+        parser.add_argument(
+            '--delete-old',
+            action='store_true',
+            dest='delete_old',
+            help='Delete the previous versions once the alias is switched.',
+        )
+
+    def handle(self, *args, **options):
+        self.es = self.document._get_connection()
+        self.alias = self.document._index._name
+
+        if options.get('resume'):
+            index_name, meta = self.get_interrupted_index()
+            print(f'Resuming {index_name} after framework id {meta["last_id"]} ...')
+        else:
+            index_name, meta = self.create_index()
+            print(f'Created {index_name}')
+
+        started = time.monotonic()
+        indexed = self.load(index_name, meta, options)
+        indexed += self.catch_up(index_name, meta, options)
+        elapsed = time.monotonic() - started
+        print(f'Indexed {indexed} documents in {elapsed:.1f}s ({indexed / max(elapsed, 0.001):.0f} docs/sec)')
+
+        self.finalize(index_name, options.get('wait_for_status'))
+        self.delete_orphans(index_name)
+        self.verify(index_name)
+        old_indices = self.switch_alias(index_name)
+        # the writes made between the catch up and the switch only reached the previous version
+        self.catch_up(index_name, meta, options)
+        self.delete_orphans(index_name)
+
+        meta['status'] = STATUS_DONE
+        self.save_meta(index_name, meta)
+        # cached search results and the autocomplete indexes were built from the previous version
+        index_generation.bump()
+        print(f'{self.alias} now points to {index_name}')
+
+        if options.get('delete_old'):
+            for old_index in old_indices:
+                self.es.indices.delete(index=old_index)
+                print(f'Deleted {old_index}')
+
+    def get_queryset(self):
+        return self.document().get_queryset().prefetch_related('cpvs')
+
+    def create_index(self):
+        """
+        Creates the next version of the index, with refresh and replicas disabled for the load.
+
+        Returns:
+            tuple: The index name and its reindex _meta.
+        """
+        index_name = f'{self.alias}-v{datetime.datetime.now():%Y%m%d%H%M%S}'
+        index = self.document._index.clone(name=index_name)
+        index.settings(number_of_replicas=0, refresh_interval='-1')
+
+        meta = {'status': STATUS_LOADING, 'last_id': 0, 'started_on': datetime.date.today().isoformat()}
+        body = index.to_dict()
+        body.setdefault('mappings', {})['_meta'] = {META_KEY: meta}
+        self.es.indices.create(index=index_name, body=body)
+        return index_name, meta
+
+    def get_interrupted_index(self):
+        """
+        Finds the latest version whose rebuild did not complete.
+
+        Returns:
+            tuple: The index name and its reindex _meta.
+
+        Raises:
+            CommandError: If there is no interrupted rebuild.
+        """
+        indices = self.es.indices.get(index=f'{self.alias}-v*', ignore_unavailable=True)
+        for index_name in sorted(indices, reverse=True):
+            meta = indices[index_name].get('mappings', {}).get('_meta', {}).get(META_KEY)
+            if meta and meta.get('status') == STATUS_LOADING and self.alias not in indices[index_name]['aliases']:
+                return index_name, meta
+        raise CommandError(f'There is no interrupted rebuild of {self.alias} to resume')
+
+    def save_meta(self, index_name, meta):
+        self.es.indices.put_mapping(index=index_name, body={'_meta': {META_KEY: meta}})
+
+    def index_queryset(self, index_name, queryset, options, meta=None):
+        """
+        Indexes the frameworks of queryset into index_name, in chunks of increasing id.
+
+        Args:
+            index_name (str): The index written.
+            queryset (QuerySet): The frameworks to index.
+            options (dict): The command options.
+            meta (dict, optional): The reindex _meta, whose last_id is the checkpoint saved after each chunk.
+
+        Returns:
+            int: The number of documents indexed.
+
+        Raises:
+            CommandError: If a document is not indexed.
+        """
+        document = self.document()
+        last_id = meta['last_id'] if meta else 0
+        indexed = 0
+        started = time.monotonic()
+
+        while chunk := list(queryset.filter(id__gt=last_id).order_by('id')[:options.get('chunk_size')]):
+            actions = (
+                {**document._prepare_action(framework, 'index'), '_index': index_name}
+                for framework in chunk if document.should_index_object(framework)
+            )
+            errors = [
+                info for ok, info in parallel_bulk(
+                    self.es, actions, thread_count=options.get('workers'), chunk_size=options.get('bulk_size'),
+                    raise_on_error=False, raise_on_exception=False
+                ) if not ok
+            ]
+            if errors:
+                raise CommandError(f'{len(errors)} documents were not indexed, first error: {errors[0]}')
+
+            last_id = chunk[-1].id
+            indexed += len(chunk)
+            if meta:
+                meta['last_id'] = last_id
+                self.save_meta(index_name, meta)
+
+            elapsed = time.monotonic() - started
+            print(f'{indexed} documents, up to id {last_id} ({indexed / max(elapsed, 0.001):.0f} docs/sec)')
+        return indexed
+
+    def load(self, index_name, meta, options):
+        return self.index_queryset(index_name, self.get_queryset(), options, meta)
+
+    def catch_up(self, index_name, meta, options):
+        """
+        Indexes again the frameworks updated since the load started, whose changes went to the live index.
+        """
+        print('Indexing frameworks updated during the load ...')
+        queryset = self.get_queryset().filter(updated_at__gte=meta['started_on'])
+        return self.index_queryset(index_name, queryset, options)
+
+    def finalize(self, index_name, wait_for_status):
+        """
+        Restores the refresh interval and the replicas of the document index settings, force merges the
+        index and waits for its shards.
+        """
+        print('Restoring index settings and force merging ...')
+        index_settings = self.document._index._settings
+        self.es.indices.put_settings(index=index_name, body={'index': {
+            'refresh_interval': index_settings.get('refresh_interval'),
+            'number_of_replicas': index_settings.get('number_of_replicas', 1),
+        }})
+        self.es.indices.refresh(index=index_name)
+        self.es.indices.forcemerge(index=index_name, max_num_segments=1)
+        self.es.cluster.health(index=index_name, wait_for_status=wait_for_status, timeout='10m')
+
+    def delete_orphans(self, index_name, batch_size=5000):
+        """
+        Deletes the documents of index_name whose framework was deleted, or is no longer indexed, since it
+        was loaded.
+
+        Returns:
+            int: The number of documents deleted.
+        """
+        queryset = self.document().get_queryset()
+        deleted = 0
+        search_after = None
+        while True:
+            body = {'size': batch_size, 'sort': [{'id': 'asc'}], '_source': False, 'track_total_hits': False}
+            if search_after is not None:
+                body['search_after'] = search_after
+            hits = self.es.search(index=index_name, body=body)['hits']['hits']
+            ids = {int(hit['_id']) for hit in hits}
+            orphans = ids - set(queryset.filter(id__in=ids).values_list('id', flat=True))
+            if orphans:
+                deleted += bulk(self.es, (
+                    {'_op_type': 'delete', '_index': index_name, '_id': framework_id} for framework_id in orphans
+                ), raise_on_error=False, refresh=True)[0]
+            if len(hits) < batch_size:
+                break
+            search_after = hits[-1]['sort']
+
+        print(f'Deleted {deleted} documents of deleted frameworks')
+        return deleted
+
+    def verify(self, index_name):
+        """
+        Checks the document count of the index against the database.
+
+        Raises:
+            CommandError: If the counts differ, the alias is then left unchanged.
+        """
+        expected = self.document().get_queryset().count()
+        count = self.es.count(index=index_name)['count']
+        if count != expected:
+            raise CommandError(
+                f'{index_name} has {count} documents but there are {expected} frameworks, '
+                f'{self.alias} is left unchanged'
+            )
+        print(f'Verified {count} documents')
+
+    def switch_alias(self, index_name):
+        """
+        Points the alias to index_name, removing it from the previous versions in the same request.
+
+        Returns:
+            list: The previous versions.
+        """
+        old_indices = []
+        actions = []
+        if self.es.indices.exists_alias(name=self.alias):
+            old_indices = [name for name in self.es.indices.get_alias(name=self.alias) if name != index_name]
+            actions = [{'remove': {'index': name, 'alias': self.alias}} for name in old_indices]
+        elif self.es.indices.exists(index=self.alias):
+            # a concrete index created by search_index holds the name, it is replaced atomically
+            actions = [{'remove_index': {'index': self.alias}}]
+
+        actions.append({'add': {'index': index_name, 'alias': self.alias}})
+        self.es.indices.update_aliases(body={'actions': actions})
+        return old_indices
@@ -22,5 +22,5 @@ class FrameworkModelManager(Manager):
         """
         queryset = self.model.objects.filter(preferences__user=user)
         if preference_names is not None:
-            queryset.filter(name__in=preference_names)
+            queryset = queryset.filter(name__in=preference_names)
         return queryset
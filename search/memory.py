@@ -0,0 +1,1125 @@
+import bisect
+import copy
+import datetime
+import functools
+import heapq
+import itertools
+import json
+import math
+import time
+from collections import Counter, defaultdict, namedtuple
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from elasticsearch.serializer import JSONSerializer
+
+from search.analysis import ANALYZERS
+from search.constants import SEARCH_BACKEND_ELASTICSEARCH, SEARCH_BACKEND_MEMORY
+from search.documents import FrameworkDocument
+from search.generation import InProcessIndex, index_generation
+
+# BM25 parameters of the Elasticsearch default similarity
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+ANALYZED_TYPES = frozenset({'text', 'search_as_you_type'})
+NUMERIC_TYPES = frozenset({'integer', 'long', 'short', 'byte', 'float', 'double'})
+
+DATE_INTERVALS = {'year': 'year', '1y': 'year', 'month': 'month', '1M': 'month', 'day': 'day', '1d': 'day'}
+DATE_FORMATS = (('yyyy', '%Y'), ('MM', '%m'), ('dd', '%d'), ('HH', '%H'), ('mm', '%M'), ('ss', '%S'))
+DEFAULT_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+
+DEFAULT_TRACK_TOTAL_HITS = 10000
+TERM_SCORES_CACHE_SIZE = 4096
+
+IndexedField = namedtuple('IndexedField', ['name', 'type', 'analyzer', 'source', 'nested'])
+
+
+class Descending:
+    """
+    Sort key wrapper reversing the order of values which cannot be negated, e.g. strings.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def to_millis(value, round_up=False):
+    """
+    Converts a date, a datetime or an ISO 8601 string into milliseconds since the epoch.
+
+    Args:
+        value: The date.
+        round_up (bool): Whether a date without time is read as its last millisecond, like the gt and lte
+            bounds of an Elasticsearch range query.
+
+    Returns:
+        int: The milliseconds since the epoch, UTC.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace('Z', '+00:00')) if 'T' in value or ' ' in value \
+            else datetime.date.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.max if round_up else datetime.time.min)
+        value = value.replace(microsecond=999000) if round_up else value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+@functools.lru_cache(maxsize=65536)
+def truncate_millis(millis, interval):
+    """
+    Returns the start of the calendar interval holding millis, in milliseconds since the epoch.
+    """
+    date = datetime.datetime.fromtimestamp(millis / 1000, tz=datetime.timezone.utc)
+    date = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval in ('year', 'month'):
+        date = date.replace(day=1)
+    if interval == 'year':
+        date = date.replace(month=1)
+    return int(date.timestamp() * 1000)
+
+
+def next_interval(millis, interval):
+    date = datetime.datetime.fromtimestamp(millis / 1000, tz=datetime.timezone.utc)
+    if interval == 'year':
+        date = date.replace(year=date.year + 1)
+    elif interval == 'month':
+        date = date.replace(year=date.year + date.month // 12, month=date.month % 12 + 1)
+    else:
+        date += datetime.timedelta(days=1)
+    return int(date.timestamp() * 1000)
+
+
+def format_millis(millis, date_format=None):
+    """
+    Formats milliseconds since the epoch with an Elasticsearch (Joda) date format, e.g. yyyy.
+    """
+    python_format = DEFAULT_DATE_FORMAT
+    if date_format:
+        python_format = date_format
+        for joda, strftime in DATE_FORMATS:
+            python_format = python_format.replace(joda, strftime)
+    return datetime.datetime.fromtimestamp(millis / 1000, tz=datetime.timezone.utc).strftime(python_format)
+
+
+def get_indexed_fields(properties, prefix='', nested=None):
+    """
+    Lists the searchable fields of an index mapping, sub-fields and nested fields included.
+
+    Args:
+        properties (dict): The properties of the mapping.
+        prefix (str): The path of the object holding properties.
+        nested (str): The path of the nested object holding properties, if any.
+
+    Returns:
+        dict: Mapping of field path to its IndexedField.
+
+    Raises:
+        ValueError: If a text field uses an analyzer which is not in ANALYZERS.
+    """
+    fields = {}
+    for name, mapping in properties.items():
+        path = prefix + name
+        field_type = mapping.get('type', 'object')
+        if field_type in ('object', 'nested'):
+            fields.update(get_indexed_fields(
+                mapping.get('properties', {}), f'{path}.', path if field_type == 'nested' else nested
+            ))
+            continue
+
+        for field_path, field_mapping in [(path, mapping), *(
+                (f'{path}.{sub_name}', sub_mapping) for sub_name, sub_mapping in mapping.get('fields', {}).items())]:
+            if field_mapping.get('index', True) is False:
+                continue
+            analyzer = field_mapping.get('analyzer', 'standard')
+            if field_mapping['type'] in ANALYZED_TYPES and analyzer not in ANALYZERS:
+                raise ValueError(f'The {analyzer} analyzer of {field_path} is not supported by the memory index')
+            fields[field_path] = IndexedField(field_path, field_mapping['type'], analyzer, path, nested)
+    return fields
+
+
+def get_source_values(source, path):
+    """
+    Returns the values at a dotted path of a _source, going through the lists of nested objects.
+    """
+    if '.' not in path:
+        value = source.get(path)
+        return [] if value is None else [item for item in value if item is not None] if isinstance(value, list) \
+            else [value]
+
+    values = [source]
+    for key in path.split('.'):
+        found = []
+        for value in values:
+            value = value.get(key) if isinstance(value, dict) else None
+            found.extend(value if isinstance(value, list) else [value])
+        values = found
+    return [value for value in values if value is not None]
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index executing the subset of the Elasticsearch query DSL built by the search
+    queries, with Elasticsearch shaped responses. Text fields are analyzed with the analyzers of
+    search.analysis and scored with BM25.
+
+    Attributes:
+        query_types (dict): Mapping of query type to the method matching it.
+        aggregation_types (dict): Mapping of aggregation type to the method computing it.
+    """
+
+    query_types = {
+        'bool': 'match_bool',
+        'match_all': 'match_all',
+        'match_none': 'match_none',
+        'match': 'match_match',
+        'match_phrase': 'match_phrase',
+        'multi_match': 'match_multi_match',
+        'term': 'match_term',
+        'terms': 'match_terms',
+        'range': 'match_range',
+        'exists': 'match_exists',
+        'ids': 'match_ids',
+        'constant_score': 'match_constant_score',
+        'nested': 'match_nested',
+    }
+    aggregation_types = {
+        'terms': 'aggregate_terms',
+        'range': 'aggregate_range',
+        'date_histogram': 'aggregate_date_histogram',
+    }
+
+    def __init__(self, properties, name=None):
+        """
+        Args:
+            properties (dict): The properties of the index mapping.
+            name (str, optional): The index name, returned as _index of the hits.
+        """
+        self.name = name
+        self.fields = get_indexed_fields(properties)
+        self.sources = {}
+        # analyzed fields: term -> {doc id: positions}, doc id -> number of terms, sorted terms
+        self.postings = defaultdict(dict)
+        self.lengths = defaultdict(dict)
+        self.total_lengths = Counter()
+        self.vocabularies = defaultdict(list)
+        # exact fields: value -> doc ids, doc id -> values, sorted (value, doc id) of numbers and dates
+        self.exact = defaultdict(dict)
+        self.doc_values = defaultdict(dict)
+        self.sorted_values = defaultdict(list)
+        # fields whose vocabulary or sorted values got appended to, sorted on their next use
+        self.unsorted = set()
+        self.term_scores = {}
+        # (container id, key) of the postings and value sets a copy owns, None when the index is not a copy
+        self.copied = None
+
+    def __len__(self):
+        return len(self.sources)
+
+    def copy(self):
+        """
+        Returns a copy of the index to change while this one keeps serving searches. The postings of the
+        terms and the documents of the exact values are shared until the copy changes them.
+        """
+        index = copy.copy(self)
+        index.sources = dict(self.sources)
+        for name, kind in (('postings', dict), ('lengths', dict), ('exact', dict), ('doc_values', dict),
+                           ('vocabularies', list), ('sorted_values', list)):
+            copies = {field: kind(items) for field, items in getattr(self, name).items()}
+            setattr(index, name, defaultdict(kind, copies))
+        index.total_lengths = Counter(self.total_lengths)
+        index.unsorted = set(self.unsorted)
+        index.term_scores = {}
+        index.copied = set()
+        return index
+
+    def own(self, containers, key):
+        """
+        Returns containers[key] to change, copied first when it is shared with the index this one is a copy of.
+        """
+        if self.copied is not None and (id(containers), key) not in self.copied:
+            containers[key] = copy.copy(containers[key])
+            self.copied.add((id(containers), key))
+        return containers[key]
+
+    def sort_appended(self):
+        """
+        Sorts the vocabularies and values appended while the index was built, so searches only read it.
+        """
+        for kind, name in list(self.unsorted):
+            (self.vocabularies if kind == 'vocabulary' else self.sorted_values)[name].sort()
+        self.unsorted.clear()
+
+    def normalize(self, field, value, round_up=False):
+        """
+        Converts a value of field, indexed or queried, into its indexed form.
+
+        Raises:
+            ValueError: If the value cannot be converted.
+        """
+        if field.type in NUMERIC_TYPES:
+            return float(value) if field.type in ('float', 'double') else int(value)
+        if field.type == 'date':
+            return to_millis(value, round_up=round_up)
+        if field.type == 'boolean':
+            return value if isinstance(value, bool) else str(value).lower() == 'true'
+        return str(value)
+
+    @staticmethod
+    def analyze(field, values):
+        """
+        Analyzes the values of an analyzed field.
+
+        Returns:
+            tuple: Mapping of term to its positions, and the number of terms.
+        """
+        terms, length, offset = defaultdict(list), 0, 0
+        for value in values:
+            tokens = ANALYZERS[field.analyzer](str(value))
+            for position, term in tokens:
+                terms[term].append(offset + position)
+            length += len(tokens)
+            # the values of an array are 100 positions apart, like with the default position_increment_gap
+            offset += (tokens[-1][0] + 100) if tokens else 0
+        return terms, length
+
+    def add(self, doc_id, source):
+        """
+        Indexes the _source of a document, replacing its previous version.
+        """
+        if doc_id in self.sources:
+            self.remove(doc_id)
+        self.sources[doc_id] = source
+        self.term_scores.clear()
+
+        for field in self.fields.values():
+            values = get_source_values(source, field.source)
+            if not values:
+                continue
+
+            if field.type in ANALYZED_TYPES:
+                terms, length = self.analyze(field, values)
+                postings = self.postings[field.name]
+                for term, positions in terms.items():
+                    if term not in postings:
+                        postings[term] = {}
+                        self.insert_sorted('vocabulary', field, self.vocabularies[field.name], term)
+                    self.own(postings, term)[doc_id] = positions
+                self.lengths[field.name][doc_id] = length
+                self.total_lengths[field.name] += length
+                continue
+
+            normalized = tuple(sorted({self.normalize(field, value) for value in values}))
+            self.doc_values[field.name][doc_id] = normalized
+            exact = self.exact[field.name]
+            for value in normalized:
+                exact.setdefault(value, set())
+                self.own(exact, value).add(doc_id)
+                if field.type in NUMERIC_TYPES or field.type == 'date':
+                    self.insert_sorted('values', field, self.sorted_values[field.name], (value, doc_id))
+
+    def remove(self, doc_id):
+        """
+        Removes a document, if it is indexed.
+        """
+        if (source := self.sources.pop(doc_id, None)) is None:
+            return
+        self.term_scores.clear()
+
+        for field in self.fields.values():
+            if field.type in ANALYZED_TYPES:
+                if (length := self.lengths[field.name].pop(doc_id, None)) is None:
+                    continue
+                self.total_lengths[field.name] -= length
+                postings = self.postings[field.name]
+                for term in self.analyze(field, get_source_values(source, field.source))[0]:
+                    del self.own(postings, term)[doc_id]
+                    if not postings[term]:
+                        del postings[term]
+                        vocabulary = self.get_vocabulary(field)
+                        del vocabulary[bisect.bisect_left(vocabulary, term)]
+                continue
+
+            for value in self.doc_values[field.name].pop(doc_id, ()):
+                documents = self.own(self.exact[field.name], value)
+                documents.discard(doc_id)
+                if not documents:
+                    del self.exact[field.name][value]
+                if field.type in NUMERIC_TYPES or field.type == 'date':
+                    sorted_values = self.get_sorted_values(field)
+                    del sorted_values[bisect.bisect_left(sorted_values, (value, doc_id))]
+
+    def insert_sorted(self, kind, field, items, item):
+        # items are appended while the index is built, and sorted on their first use
+        if not items or (kind, field.name) in self.unsorted:
+            items.append(item)
+            self.unsorted.add((kind, field.name))
+        else:
+            bisect.insort(items, item)
+
+    def get_vocabulary(self, field):
+        """
+        Returns the sorted terms of an analyzed field.
+        """
+        if ('vocabulary', field.name) in self.unsorted:
+            self.vocabularies[field.name].sort()
+            self.unsorted.discard(('vocabulary', field.name))
+        return self.vocabularies[field.name]
+
+    def get_sorted_values(self, field):
+        """
+        Returns the sorted (value, doc id) pairs of a numeric or date field.
+        """
+        if ('values', field.name) in self.unsorted:
+            self.sorted_values[field.name].sort()
+            self.unsorted.discard(('values', field.name))
+        return self.sorted_values[field.name]
+
+    def search(self, body):
+        """
+        Executes a search request body.
+
+        Args:
+            body (dict): The search request body, as sent to Elasticsearch.
+
+        Returns:
+            dict: The search response, shaped like the Elasticsearch one.
+
+        Raises:
+            ValueError: If the body uses a query or an aggregation which is not supported.
+        """
+        started = time.perf_counter()
+        matches = self.match(body.get('query', {'match_all': {}}))
+
+        response = {}
+        if aggregations := body.get('aggs', body.get('aggregations')):
+            response['aggregations'] = {
+                name: self.aggregate(aggregation, matches) for name, aggregation in aggregations.items()
+            }
+
+        if post_filter := body.get('post_filter'):
+            filtered = self.match(post_filter)
+            matches = {doc_id: score for doc_id, score in matches.items() if doc_id in filtered}
+
+        sort = self.get_sort(body.get('sort'))
+        start = body.get('from', 0)
+        top = self.get_top(matches, sort, start + body.get('size', 10), body.get('search_after'))[start:]
+
+        scored = body.get('sort') is None or any(field == '_score' for field, _ in sort)
+        hits = []
+        for doc_id, score in top:
+            hit = {
+                '_index': self.name, '_type': '_doc', '_id': str(doc_id), '_score': score if scored else None,
+                '_source': self.filter_source(self.sources[doc_id], body.get('_source')),
+            }
+            if body.get('sort') is not None:
+                hit['sort'] = self.get_sort_values(sort, doc_id, score)
+            hits.append(hit)
+
+        response['hits'] = {'max_score': max(matches.values(), default=None) if scored else None, 'hits': hits}
+        track_total_hits = body.get('track_total_hits', DEFAULT_TRACK_TOTAL_HITS)
+        if track_total_hits is True or (track_total_hits is not False and len(matches) <= track_total_hits):
+            response['hits']['total'] = {'value': len(matches), 'relation': 'eq'}
+        elif track_total_hits is not False:
+            response['hits']['total'] = {'value': track_total_hits, 'relation': 'gte'}
+
+        return {
+            'took': int((time.perf_counter() - started) * 1000),
+            'timed_out': False,
+            '_shards': {'total': 1, 'successful': 1, 'skipped': 0, 'failed': 0},
+            **response,
+        }
+
+    @staticmethod
+    def filter_source(source, source_fields):
+        if source_fields is None or source_fields is True:
+            return source
+        if source_fields is False:
+            return None
+        if isinstance(source_fields, dict):
+            source_fields = source_fields.get('includes', list(source))
+        if isinstance(source_fields, str):
+            source_fields = [source_fields]
+        return {name: source[name] for name in source_fields if name in source}
+
+    @staticmethod
+    def get_sort(sort):
+        """
+        Normalizes a sort into (field, order) pairs, by descending score when there is none.
+        """
+        if sort is None:
+            return [('_score', 'desc')]
+
+        normalized = []
+        for item in sort if isinstance(sort, list) else [sort]:
+            if isinstance(item, str):
+                normalized.append((item, 'desc' if item == '_score' else 'asc'))
+            else:
+                (field, order), = item.items()
+                normalized.append((field, order.get('order', 'asc') if isinstance(order, dict) else order))
+        return normalized
+
+    def get_sort_values(self, sort, doc_id, score):
+        """
+        Returns the sort values of a hit, dates as milliseconds since the epoch like in Elasticsearch.
+        """
+        values = []
+        for field, order in sort:
+            if field == '_score':
+                values.append(score)
+            elif doc_values := self.doc_values[field].get(doc_id):
+                values.append(doc_values[-1] if order == 'desc' else doc_values[0])
+            else:
+                values.append(None)
+        return values
+
+    def is_numeric_sort(self, field):
+        return field == '_score' or (
+            field in self.fields and self.fields[field].type in (*NUMERIC_TYPES, 'date', 'boolean')
+        )
+
+    def get_sort_key(self, sort):
+        """
+        Builds the key function ordering the (doc id, score) pairs of the matches like sort, ties broken by
+        doc id. Missing values sort last in both orders.
+        """
+        def get_part(field, order):
+            if field == '_score':
+                return (lambda doc_id, score: -score) if order == 'desc' else (lambda doc_id, score: score)
+
+            doc_values = self.doc_values[field]
+            if self.is_numeric_sort(field):
+                if order == 'desc':
+                    return lambda doc_id, score: -doc_values[doc_id][-1] if doc_id in doc_values else math.inf
+                return lambda doc_id, score: doc_values[doc_id][0] if doc_id in doc_values else math.inf
+            if order == 'desc':
+                return lambda doc_id, score: (0, Descending(doc_values[doc_id][-1])) if doc_id in doc_values \
+                    else (1, Descending(''))
+            return lambda doc_id, score: (0, doc_values[doc_id][0]) if doc_id in doc_values else (1, '')
+
+        parts = [get_part(field, order) for field, order in sort]
+        if len(parts) == 1:
+            part, = parts
+            return lambda item: (part(*item), item[0])
+        if len(parts) == 2:
+            first, second = parts
+            return lambda item: (first(*item), second(*item), item[0])
+        return lambda item: (*(part(*item) for part in parts), item[0])
+
+    def get_top(self, matches, sort, count, search_after=None):
+        """
+        Returns the count first (doc id, score) pairs of matches in sort order, after the search_after
+        sort values if given.
+        """
+        sort_key = self.get_sort_key(sort)
+        if count <= 0:
+            return []
+        if sort[0] != ('_score', 'desc') or len(sort) > 2 or (len(sort) == 2 and (
+                sort[1][0] == '_score' or sort[1][0] not in self.fields or not self.is_numeric_sort(sort[1][0]))):
+            if search_after is not None:
+                after = self.get_after_key(sort, search_after)
+                matches = {doc_id: score for doc_id, score in matches.items() if sort_key((doc_id, score))[:-1] > after}
+            return heapq.nsmallest(count, matches.items(), key=sort_key)
+
+        if search_after is not None:
+            # the documents scored like the last hit come after it when their field value does
+            after_score = search_after[0]
+            below = {doc_id: score for doc_id, score in matches.items() if score < after_score}
+            tied = [doc_id for doc_id, score in matches.items() if score == after_score]
+            picked = self.pick_tied(tied, sort, count, search_after[1:])
+            return heapq.nsmallest(
+                count, [*self.get_top(below, sort, count), *((doc_id, after_score) for doc_id in picked)], key=sort_key
+            )
+
+        if len(matches) <= count:
+            return heapq.nsmallest(count, matches.items(), key=sort_key)
+
+        threshold = heapq.nlargest(count, matches.values())[-1]
+        above = [item for item in matches.items() if item[1] > threshold]
+        tied = [doc_id for doc_id, score in matches.items() if score == threshold]
+        picked = self.pick_tied(tied, sort, count - len(above))
+        return heapq.nsmallest(count, [*above, *((doc_id, threshold) for doc_id in picked)], key=sort_key)
+
+    def pick_tied(self, tied, sort, count, after=None):
+        """
+        Picks at least the count first of documents tied on score in the order of the rest of sort, at most
+        one sort field, after the search_after values of that field if given.
+
+        Returns:
+            list: The doc ids, not necessarily in order.
+        """
+        if len(sort) == 1:
+            return [] if after is not None else heapq.nsmallest(count, tied)
+
+        field, order = sort[1]
+        if after is not None and after[0] is None:
+            # the last hit has no value, and documents without value are not ordered by the search_after values
+            return []
+
+        tied, doc_values, picked, boundary = set(tied), self.doc_values[field], [], None
+        sorted_values = self.get_sorted_values(self.fields[field])
+        if order == 'desc':
+            end = len(sorted_values)
+            if after is not None:
+                end = bisect.bisect_left(sorted_values, after[0], key=itemgetter(0))
+            pairs = (sorted_values[index] for index in range(end - 1, -1, -1))
+        else:
+            start = 0 if after is None else bisect.bisect_right(sorted_values, after[0], key=itemgetter(0))
+            pairs = itertools.islice(sorted_values, start, None)
+
+        for value, doc_id in pairs:
+            if len(picked) >= count and value != boundary:
+                break
+            # a document with several values is sorted by its smallest value, or largest in descending order
+            if doc_id in tied and doc_values[doc_id][-1 if order == 'desc' else 0] == value:
+                picked.append(doc_id)
+                boundary = value
+
+        if len(picked) < count:
+            # documents without value come last
+            picked.extend(heapq.nsmallest(count - len(picked), tied - doc_values.keys()))
+        return picked
+
+    def get_after_key(self, sort, values):
+        """
+        Converts the search_after sort values into the sort key of get_sort_key(), without the doc id.
+        """
+        key = []
+        for (field, order), value in zip(sort, values):
+            if self.is_numeric_sort(field):
+                key.append(math.inf if value is None else -value if order == 'desc' else value)
+            elif order == 'desc':
+                key.append((1, Descending('')) if value is None else (0, Descending(value)))
+            else:
+                key.append((1, '') if value is None else (0, value))
+        return tuple(key)
+
+    def match(self, query, nested=None):
+        """
+        Returns the documents matching a query.
+
+        Args:
+            query (dict): The query, a single query type and its body.
+            nested (str, optional): The path of the nested query holding the query.
+
+        Returns:
+            dict: Mapping of matching doc id to its score.
+
+        Raises:
+            ValueError: If the query type is not supported.
+        """
+        if hasattr(query, 'to_dict'):
+            query = query.to_dict()
+        (query_type, body), = query.items()
+        if query_type not in self.query_types:
+            raise ValueError(f'{query_type} queries are not supported by the memory index')
+        return getattr(self, self.query_types[query_type])(body, nested)
+
+    def get_field(self, name, nested):
+        """
+        Returns the indexed field of name, None if it is unknown or, for a field of a nested object, outside
+        a nested query on its path.
+        """
+        field = self.fields.get(name)
+        if field is None or field.nested != nested:
+            return None
+        return field
+
+    @staticmethod
+    def get_field_query(body, value_key):
+        """
+        Splits the body of a single field query, e.g. {'name': 'value'} or {'name': {'query': 'value'}}.
+
+        Returns:
+            tuple: The field name and the query parameters, the value under value_key.
+        """
+        params = {key: value for key, value in body.items() if key not in ('boost', '_name')}
+        (name, value), = params.items()
+        if not isinstance(value, dict):
+            value = {value_key: value}
+        return name, {'boost': body.get('boost', 1.0), **value}
+
+    def all_documents(self, score=1.0):
+        return dict.fromkeys(self.sources, score)
+
+    def score_term(self, field, term, boost=1.0):
+        """
+        Scores the documents holding term in an analyzed field with BM25. The scores are cached until the
+        index changes.
+
+        Returns:
+            dict: Mapping of doc id to score.
+        """
+        scores = self.term_scores.get((field.name, term))
+        if scores is None:
+            postings = self.postings[field.name].get(term)
+            if not postings:
+                return {}
+            scores = self.score_frequencies(
+                field, {doc_id: len(positions) for doc_id, positions in postings.items()},
+                self.get_idf(field, len(postings)), 1.0
+            )
+            if len(self.term_scores) >= TERM_SCORES_CACHE_SIZE:
+                self.term_scores.clear()
+            self.term_scores[(field.name, term)] = scores
+        return scores if boost == 1.0 else {doc_id: boost * score for doc_id, score in scores.items()}
+
+    def get_idf(self, field, document_frequency):
+        count = len(self.lengths[field.name])
+        return math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def score_frequencies(self, field, frequencies, idf, boost):
+        lengths = self.lengths[field.name]
+        average_length = self.total_lengths[field.name] / len(lengths)
+        scores = {}
+        for doc_id, frequency in frequencies.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / average_length)
+            scores[doc_id] = boost * idf * frequency / (frequency + norm)
+        return scores
+
+    def match_terms_of(self, field, text, boost=1.0, operator='or', prefix=False):
+        """
+        Matches the analyzed text in field, any of its terms unless operator is and. With prefix, the last
+        term matches the terms it starts, with a constant score, like the bool_prefix queries.
+        """
+        if field.type not in ANALYZED_TYPES:
+            return self.match_value(field, text, boost)
+
+        terms = [term for _, term in ANALYZERS[field.analyzer](str(text))]
+        if not terms:
+            return {}
+
+        clauses = [self.score_term(field, term, boost) for term in (terms[:-1] if prefix else terms)]
+        if prefix:
+            vocabulary = self.get_vocabulary(field)
+            start = bisect.bisect_left(vocabulary, terms[-1])
+            end = bisect.bisect_left(vocabulary, terms[-1] + '\U0010ffff', lo=start)
+            matches = {}
+            for term in vocabulary[start:end]:
+                matches.update(dict.fromkeys(self.postings[field.name][term], boost))
+            clauses.append(matches)
+        return self.combine(clauses, required=len(clauses) if operator == 'and' else 1)
+
+    def match_value(self, field, value, boost=1.0):
+        """
+        Matches the exact value in a field which is not analyzed, nothing if the value does not fit it.
+        Keyword terms are scored with BM25 without norms, numbers and dates have a constant score.
+        """
+        try:
+            value = self.normalize(field, value)
+        except ValueError:
+            return {}
+        documents = self.exact[field.name].get(value, ())
+        if field.type == 'keyword' and documents:
+            count = len(self.doc_values[field.name])
+            boost *= math.log(1 + (count - len(documents) + 0.5) / (len(documents) + 0.5)) / (1 + BM25_K1)
+        return dict.fromkeys(documents, boost)
+
+    @staticmethod
+    def combine(clauses, required=1):
+        """
+        Sums the scores of the documents matching at least required clauses.
+        """
+        if len(clauses) == 1 and required <= 1:
+            return clauses[0]
+
+        scores = {}
+        for clause in clauses:
+            for doc_id, score in clause.items():
+                scores[doc_id] = scores.get(doc_id, 0) + score
+        if required <= 1:
+            return scores
+
+        counts = Counter(doc_id for clause in clauses for doc_id in clause)
+        return {doc_id: score for doc_id, score in scores.items() if counts[doc_id] >= required}
+
+    def match_bool(self, body, nested):
+        def clauses_of(occurrence):
+            queries = body.get(occurrence, [])
+            return [self.match(query, nested) for query in (queries if isinstance(queries, list) else [queries])]
+
+        must, should, filters = clauses_of('must'), clauses_of('should'), clauses_of('filter')
+        excluded = set().union(*clauses_of('must_not'))
+        minimum_should_match = int(body.get('minimum_should_match', 0 if must or filters else 1))
+
+        if len(should) == 1 and minimum_should_match == 1:
+            # a single required should clause scores like a must clause
+            must, should, minimum_should_match = [*must, *should], [], 0
+
+        if required := sorted([*must, *filters], key=len):
+            candidates = required[0]
+            if len(required) > 1:
+                candidates = [doc_id for doc_id in candidates if all(doc_id in clause for clause in required[1:])]
+        elif should and minimum_should_match:
+            candidates = self.combine(should)
+        else:
+            candidates = self.sources
+
+        if not should and len(must) <= 1:
+            scores = must[0] if must else {}
+            matches = {doc_id: scores.get(doc_id, 0.0) for doc_id in candidates if doc_id not in excluded}
+        else:
+            matches = {}
+            for doc_id in candidates:
+                if doc_id in excluded:
+                    continue
+                should_scores = [clause[doc_id] for clause in should if doc_id in clause]
+                if len(should_scores) >= minimum_should_match:
+                    matches[doc_id] = sum(clause[doc_id] for clause in must) + sum(should_scores)
+
+        if (boost := body.get('boost', 1.0)) != 1.0:
+            matches = {doc_id: boost * score for doc_id, score in matches.items()}
+        return matches
+
+    def match_all(self, body, nested):
+        return self.all_documents(body.get('boost', 1.0))
+
+    def match_none(self, body, nested):
+        return {}
+
+    def match_match(self, body, nested):
+        name, params = self.get_field_query(body, 'query')
+        if (field := self.get_field(name, nested)) is None:
+            return {}
+        return self.match_terms_of(field, params['query'], params['boost'], params.get('operator', 'or').lower())
+
+    def match_phrase(self, body, nested):
+        name, params = self.get_field_query(body, 'query')
+        if (field := self.get_field(name, nested)) is None:
+            return {}
+        if field.type not in ANALYZED_TYPES:
+            return self.match_value(field, params['query'], params['boost'])
+
+        tokens = ANALYZERS[field.analyzer](str(params['query']))
+        if len(tokens) <= 1:
+            return self.score_term(field, tokens[0][1], params['boost']) if tokens else {}
+
+        postings = [self.postings[field.name].get(term, {}) for _, term in tokens]
+        offsets = [position - tokens[0][0] for position, _ in tokens]
+        frequencies = {}
+        for doc_id in min(postings, key=len):
+            if not all(doc_id in term_postings for term_postings in postings):
+                continue
+            positions = [set(term_postings[doc_id]) for term_postings in postings]
+            frequency = sum(
+                all(start + offset in term_positions for offset, term_positions in zip(offsets[1:], positions[1:]))
+                for start in postings[0][doc_id]
+            )
+            if frequency:
+                frequencies[doc_id] = frequency
+
+        idf = sum(self.get_idf(field, len(term_postings)) for term_postings in postings)
+        return self.score_frequencies(field, frequencies, idf, params['boost']) if frequencies else {}
+
+    def match_multi_match(self, body, nested):
+        match_type = body.get('type', 'best_fields')
+        if match_type not in ('best_fields', 'bool_prefix'):
+            raise ValueError(f'{match_type} multi_match queries are not supported by the memory index')
+
+        field_matches = []
+        for name in body.get('fields', []):
+            name, _, field_boost = name.partition('^')
+            if (field := self.get_field(name, nested)) is not None:
+                field_matches.append(self.match_terms_of(
+                    field, body['query'], body.get('boost', 1.0) * float(field_boost or 1),
+                    body.get('operator', 'or').lower(), prefix=match_type == 'bool_prefix'
+                ))
+
+        if len(field_matches) == 1:
+            return field_matches[0]
+
+        # the best field score, plus tie_breaker times the scores of the other matching fields
+        tie_breaker = body.get('tie_breaker', 0)
+        best, total = {}, {}
+        for field_match in field_matches:
+            for doc_id, score in field_match.items():
+                if score > best.get(doc_id, -math.inf):
+                    best[doc_id] = score
+                if tie_breaker:
+                    total[doc_id] = total.get(doc_id, 0) + score
+        if not tie_breaker:
+            return best
+        return {doc_id: score + tie_breaker * (total[doc_id] - score) for doc_id, score in best.items()}
+
+    def match_term(self, body, nested):
+        name, params = self.get_field_query(body, 'value')
+        if (field := self.get_field(name, nested)) is None:
+            return {}
+        if field.type in ANALYZED_TYPES:
+            return dict.fromkeys(self.postings[field.name].get(str(params['value']), ()), params['boost'])
+        return self.match_value(field, params['value'], params['boost'])
+
+    def match_terms(self, body, nested):
+        name, params = self.get_field_query(body, 'values')
+        if self.get_field(name, nested) is None:
+            return {}
+        matches = {}
+        for value in params['values']:
+            matches.update(self.match_term({name: value}, nested))
+        return dict.fromkeys(matches, params['boost'])
+
+    def match_range(self, body, nested):
+        name, params = self.get_field_query(body, 'gte')
+        if (field := self.get_field(name, nested)) is None:
+            return {}
+        if field.type not in NUMERIC_TYPES and field.type != 'date':
+            raise ValueError(f'range queries on {field.type} fields are not supported by the memory index')
+
+        sorted_values = self.get_sorted_values(field)
+        start, end = 0, len(sorted_values)
+        if params.get('gte') is not None:
+            start = bisect.bisect_left(sorted_values, self.normalize(field, params['gte']), key=itemgetter(0))
+        if params.get('gt') is not None:
+            start = bisect.bisect_right(
+                sorted_values, self.normalize(field, params['gt'], round_up=True), key=itemgetter(0)
+            )
+        if params.get('lte') is not None:
+            end = bisect.bisect_right(
+                sorted_values, self.normalize(field, params['lte'], round_up=True), key=itemgetter(0)
+            )
+        if params.get('lt') is not None:
+            end = bisect.bisect_left(sorted_values, self.normalize(field, params['lt']), key=itemgetter(0))
+        return {doc_id: params['boost'] for _, doc_id in sorted_values[start:end]}
+
+    def match_exists(self, body, nested):
+        if (field := self.get_field(body['field'], nested)) is None:
+            return {}
+        documents = self.lengths[field.name] if field.type in ANALYZED_TYPES else self.doc_values[field.name]
+        return dict.fromkeys(documents, body.get('boost', 1.0))
+
+    def match_ids(self, body, nested):
+        ids = {str(value) for value in body.get('values', [])}
+        ids |= {int(value) for value in ids if value.isdigit()}
+        return dict.fromkeys(ids & self.sources.keys(), body.get('boost', 1.0))
+
+    def match_constant_score(self, body, nested):
+        return dict.fromkeys(self.match(body['filter'], nested), body.get('boost', 1.0))
+
+    def match_nested(self, body, nested):
+        matches = self.match(body['query'], body['path'])
+        if (boost := body.get('boost', 1.0)) != 1.0:
+            matches = {doc_id: boost * score for doc_id, score in matches.items()}
+        return matches
+
+    def aggregate(self, aggregation, matches):
+        """
+        Computes an aggregation over the matching documents.
+
+        Raises:
+            ValueError: If the aggregation type is not supported.
+        """
+        aggregation_type, body = next((key, value) for key, value in aggregation.items() if key != 'meta')
+        if aggregation_type not in self.aggregation_types or len(aggregation) > 1 + ('meta' in aggregation):
+            raise ValueError(f'{aggregation_type} aggregations are not supported by the memory index')
+        return getattr(self, self.aggregation_types[aggregation_type])(body, matches)
+
+    def count_matching_values(self, name, matches):
+        """
+        Counts the matching documents per distinct tuple of values of a field.
+
+        Returns:
+            Counter: Mapping of values tuple to document count.
+        """
+        counts = Counter(map(self.doc_values[name].get, matches))
+        counts.pop(None, None)
+        return counts
+
+    def aggregate_terms(self, body, matches):
+        counts = Counter()
+        for values, count in self.count_matching_values(body['field'], matches).items():
+            for value in values:
+                counts[value] += count
+        buckets = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        size = body.get('size', 10)
+        return {
+            'doc_count_error_upper_bound': 0,
+            'sum_other_doc_count': sum(count for _, count in buckets[size:]),
+            'buckets': [{'key': key, 'doc_count': count} for key, count in buckets[:size]],
+        }
+
+    def aggregate_range(self, body, matches):
+        counts = self.count_matching_values(body['field'], matches)
+        # single values are counted per range from their cumulative counts, multiple values one by one
+        single = sorted((values[0], count) for values, count in counts.items() if len(values) == 1)
+        single_values = [value for value, _ in single]
+        cumulative = [0, *itertools.accumulate(count for _, count in single)]
+        multiple = [(values, count) for values, count in counts.items() if len(values) > 1]
+
+        buckets = []
+        for value_range in body['ranges']:
+            start, end = value_range.get('from'), value_range.get('to')
+            bucket = {
+                'key': value_range.get('key') or f'{"*" if start is None else float(start)}-'
+                                                 f'{"*" if end is None else float(end)}'
+            }
+            if start is not None:
+                bucket['from'] = float(start)
+            if end is not None:
+                bucket['to'] = float(end)
+            start = -math.inf if start is None else start
+            end = math.inf if end is None else end
+            bucket['doc_count'] = (
+                cumulative[bisect.bisect_left(single_values, end)]
+                - cumulative[bisect.bisect_left(single_values, start)]
+                + sum(count for values, count in multiple if any(start <= value < end for value in values))
+            )
+            buckets.append(bucket)
+        return {'buckets': buckets}
+
+    def aggregate_date_histogram(self, body, matches):
+        interval = body.get('calendar_interval', body.get('interval'))
+        if interval not in DATE_INTERVALS:
+            raise ValueError(f'{interval} date_histogram intervals are not supported by the memory index')
+        interval = DATE_INTERVALS[interval]
+
+        counts = Counter()
+        for values, count in self.count_matching_values(body['field'], matches).items():
+            for key in {truncate_millis(value, interval) for value in values}:
+                counts[key] += count
+        keys = sorted(counts)
+        if body.get('min_doc_count', 0) == 0 and keys:
+            # empty buckets between the first and the last one
+            keys, key = [], keys[0]
+            while key <= max(counts):
+                keys.append(key)
+                key = next_interval(key, interval)
+
+        return {'buckets': [
+            {'key_as_string': format_millis(key, body.get('format')), 'key': key, 'doc_count': counts[key]}
+            for key in keys if counts[key] >= body.get('min_doc_count', 0)
+        ]}
+
+
+class MemorySearchIndex(InProcessIndex):
+    """
+    In-process search index of a django_elasticsearch_dsl Document, used instead of Elasticsearch by
+    the memory search backend.
+
+    Attributes:
+        document (type): The django_elasticsearch_dsl Document indexed.
+        prefetch_related (list): The relations prefetched to prepare the documents.
+        batch_size (int): The number of objects read per query when building the index.
+    """
+
+    def __init__(self, document, prefetch_related=(), batch_size=2000):
+        super().__init__(f'{document.__name__} memory')
+        self.document = document
+        self.prefetch_related = list(prefetch_related)
+        self.batch_size = batch_size
+
+    def create_index(self):
+        return InvertedIndex(self.document._doc_type.mapping.to_dict()['properties'], name=self.document._index._name)
+
+    def get_queryset(self):
+        return self.document().get_queryset().prefetch_related(*self.prefetch_related).order_by('pk')
+
+    def prepare(self, document, serializer, instance):
+        # serialized like the bulk request, e.g. dates as ISO strings
+        return json.loads(serializer.dumps(document.prepare(instance)))
+
+    def iter_sources(self):
+        """
+        Yields the pk and prepared _source of every indexable object, reading them in batches of
+        increasing pk.
+        """
+        document, serializer = self.document(), JSONSerializer()
+        queryset = self.get_queryset()
+        last_pk = None
+        while instances := list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:self.batch_size]):
+            for instance in instances:
+                if document.should_index_object(instance):
+                    yield instance.pk, self.prepare(document, serializer, instance)
+            last_pk = instances[-1].pk
+
+    def load(self):
+        """
+        Creates an index holding every indexable object.
+        """
+        index = self.create_index()
+        for pk, source in self.iter_sources():
+            index.add(pk, source)
+        index.sort_appended()
+        return index
+
+    def read_changes(self, pks):
+        """
+        Returns the prepared _source of the objects, None for those which do not exist or must not be indexed.
+        """
+        document, serializer = self.document(), JSONSerializer()
+        changes = dict.fromkeys(pks)
+        for instance in self.get_queryset().filter(pk__in=pks):
+            if document.should_index_object(instance):
+                changes[instance.pk] = self.prepare(document, serializer, instance)
+        return changes
+
+    def apply_changes(self, index, changes):
+        index = index.copy()
+        for pk, source in changes.items():
+            if source is None:
+                index.remove(pk)
+            else:
+                index.add(pk, source)
+        return index
+
+    def search(self, body):
+        """
+        Executes a search request body, building the index first when it is missing, or in the background
+        when it is stale.
+
+        Args:
+            body (dict): The search request body.
+
+        Returns:
+            dict: The search response, shaped like the Elasticsearch one.
+        """
+        self.refresh(index_generation.get_recent())
+        return self.lookup(body)
+
+    async def asearch(self, body):
+        """
+        Async version of search(), the first build and the lookup run in worker threads so they do not
+        block the event loop.
+        """
+        await self.arefresh(await index_generation.aget_recent())
+        return await sync_to_async(self.lookup, thread_sensitive=False)(body)
+
+    def lookup(self, body):
+        """
+        Executes a search request body on the index as it is, without checking its generation.
+        """
+        return self.data.search(body)
+
+
+def is_memory_backend_enabled():
+    """
+    Returns whether the searches are executed by the in-process memory indexes instead of Elasticsearch.
+    """
+    return getattr(settings, 'SEARCH_BACKEND', SEARCH_BACKEND_ELASTICSEARCH) == SEARCH_BACKEND_MEMORY
+
+
+def get_memory_index(document):
+    """
+    Returns the memory index searched instead of the index of document, None when the memory backend is not
+    enabled or does not index the document.
+    """
+    return memory_indexes.get(document) if is_memory_backend_enabled() else None
+
+
+framework_memory_index = MemorySearchIndex(FrameworkDocument, prefetch_related=['cpvs'])
+
+memory_indexes = {
+    FrameworkDocument: framework_memory_index,
+}
@@ -1,17 +1,33 @@
 import contextlib
+
 from django.conf import settings
 from elasticsearch_dsl import Q
+from elasticsearch_dsl.response import Response
 from django_elasticsearch_dsl import Document
 
-from search.constants import DEFAULT_IMAGE_PATH, QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_BY_NUMBER, \
-    QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICE_SEARCH_ALL, DEFAULT_SUGGESTIONS_NUMBER
+from core.timing import timed
+from search.autocomplete import framework_name_index, framework_number_index, is_autocomplete_index_enabled
+from search.cache import get_search_result_cache
+from search.columnar import framework_columnar_engine, is_columnar_engine_enabled
+from search.compiler import QueryCompiler
+from search.constants import QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_BY_NUMBER, \
+    QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICE_SEARCH_ALL, DEFAULT_SUGGESTIONS_NUMBER, \
+    HYDRATION_MODE_DATABASE, HYDRATION_MODE_SOURCE, FACET_TERMS_SIZE, FACET_DATE_INTERVAL, FACET_DATE_FORMAT, \
+    FACET_NAMES
 from search.documents import FrameworkDocument
 from search.exceptions import EmptyQueryException
-from search.models import FrameworkValue, Framework
+from search.generation import index_generation
+from search.hydration import FrameworkHydrationMixin
+from search.memory import get_memory_index
+from search.pagination import PaginationMixin
 from search.serializers import (
     FrameworkFullQuerySerializer, QueryByNameSerializer, QueryByNumberSerializer, AdminFrameworkQuerySerializer
 )
-from search.utils import get_model_object
+from search.snapshots import framework_value_ranges, user_preferences
+from search.utils import get_model_objects_in_bulk
+
+# soft deleted frameworks stay in the index until the next rebuild, documents without the field are available
+UNAVAILABLE_FRAMEWORKS_QUERY = {'term': {'is_available': False}}
 
 
 class BaseSearchQuery:
@@ -22,23 +38,42 @@ class BaseSearchQuery:
         query_map (dict): A mapping of query names to corresponding query functions.
         document (type): The document type for the search query (subclass of django_elasticsearch_dsl.Document).
         serializers_to_try (list): A list of serializer classes and query names for input data validation.
+        source_fields (list): The _source fields requested from Elasticsearch, None to request the whole _source.
+        hydration_mode (str): HYDRATION_MODE_DATABASE or HYDRATION_MODE_SOURCE, defaults to the
+            SEARCH_HYDRATION_MODE setting.
+        hydration_model (type): The model read by the database hydration mode.
+        hydration_fields (list): The only fields of hydration_model loaded by the database hydration mode.
+        hydration_source_fields (list): The extra _source fields read by the source hydration mode.
+        use_result_cache (bool): Whether get_data() results are cached in the search result cache.
+        cached_attributes (list): The instance attributes set from the response which are cached with the results.
 
     Instance Attributes:
         data: The validated data from the serializer.
         query_name: The name of the selected query.
         elasticsearch_response: The response obtained from executing the Elasticsearch query.
         query: The built query.
+        hydrated_objects: Mapping of hit id to hydrated data, filled by hydrate().
+        total_count: The number of documents matching the query.
     """
 
     query_map = None
     document = None
     serializers_to_try = None
+    source_fields = None
+    hydration_mode = None
+    hydration_model = None
+    hydration_fields = None
+    hydration_source_fields = None
+    use_result_cache = False
+    cached_attributes = ['total_count']
 
     def __init__(self):
         self.data = None
         self.query_name = None
         self.elasticsearch_response = None
         self.query = None
+        self.hydrated_objects = None
+        self.total_count = 0
 
     def build_query(self):
         """
@@ -75,12 +110,124 @@ class BaseSearchQuery:
 
     def execute_query(self):
         """
-        Executes the built query using the Elasticsearch client.
+        Executes the built query using the Elasticsearch client, or the ranking engine of the query, or the
+        memory index of the document when the memory search backend is enabled.
 
         Returns:
             Response: The response obtained from executing the query.
         """
-        return self.document.search().from_dict(self.query).execute()
+        search = self.document.search().update_from_dict(self.query)
+        if engine := self.get_ranking_engine():
+            return Response(search, engine.search(self.get_ranking_params()))
+        if memory_index := get_memory_index(self.document):
+            return Response(search, memory_index.search(search.to_dict()))
+        return search.params(**self.get_search_params()).execute()
+
+    def get_ranking_engine(self):
+        """
+        Returns the engine executing the query instead of Elasticsearch, with the parameters of
+        get_ranking_params().
+
+        Returns:
+            ColumnarRankingEngine: The engine, or None when the query is executed as a query body.
+        """
+        return None
+
+    def get_ranking_params(self):
+        """
+        Returns the search parameters of the ranking engine, see get_ranking_engine().
+        """
+        raise NotImplementedError('Subclasses with a ranking engine must implement get_ranking_params()')
+
+    def get_search_params(self):
+        """
+        Returns the search request parameters, which are not part of the query body.
+
+        Returns:
+            dict: The search parameters.
+        """
+        return {}
+
+    def get_hit_ids(self):
+        """
+        Collects the ids of the search hits in ranking order.
+
+        Returns:
+            list: The ids of the hits.
+        """
+        return [hit['_source']['id'] for hit in self.elasticsearch_response['hits']['hits']]
+
+    def get_hydration_mode(self):
+        """
+        Returns the hydration mode, falling back to the SEARCH_HYDRATION_MODE setting.
+
+        Returns:
+            str: HYDRATION_MODE_DATABASE or HYDRATION_MODE_SOURCE.
+        """
+        return self.hydration_mode or getattr(settings, 'SEARCH_HYDRATION_MODE', HYDRATION_MODE_DATABASE)
+
+    def get_source_fields(self):
+        """
+        Returns the _source fields to request from Elasticsearch.
+
+        Returns:
+            list: The _source fields, or None to request the whole _source.
+        """
+        if self.source_fields is None:
+            return None
+
+        if self.get_hydration_mode() == HYDRATION_MODE_SOURCE:
+            return [*self.source_fields, *(self.hydration_source_fields or [])]
+        return list(self.source_fields)
+
+    def hydrate(self):
+        """
+        Collects the data of the search hits which is not part of the search result itself.
+
+        In the database mode the hydration_model objects of all hits are loaded with a single query and
+        hits whose object does not exist anymore are not part of the returned mapping. In the source mode
+        the data is read from the hits' _source without any database query.
+
+        Returns:
+            dict: Mapping of hit id to the data returned by hydrate_object() or hydrate_source().
+        """
+        if self.hydrated_objects is None:
+            with timed('hydrate'):
+                if self.get_hydration_mode() == HYDRATION_MODE_SOURCE:
+                    self.hydrated_objects = {
+                        hit['_source']['id']: self.hydrate_source(hit['_source'])
+                        for hit in self.elasticsearch_response['hits']['hits']
+                    }
+                else:
+                    objects = get_model_objects_in_bulk(
+                        model_class=self.hydration_model, ids=self.get_hit_ids(), fields=self.hydration_fields
+                    )
+                    self.hydrated_objects = {pk: self.hydrate_object(obj) for pk, obj in objects.items()}
+        return self.hydrated_objects
+
+    def hydrate_object(self, obj):
+        """
+        Converts a hydration_model object into the data used by get_result().
+
+        Args:
+            obj (Model): The hydration_model object of a hit.
+
+        Returns:
+            Any: The hydrated data of the hit.
+        """
+        return obj
+
+    def hydrate_source(self, source):
+        """
+        Converts the _source of a hit into the data used by get_result().
+
+        Args:
+            source (dict): The _source of a hit.
+
+        Returns:
+            Any: The hydrated data of the hit.
+        """
+        return source
 
     def get_result(self):
         """
@@ -96,16 +243,116 @@ class BaseSearchQuery:
             f"Must implement get_result() method in  {self.__class__}"
         )
 
+    def get_cache_key_params(self):
+        """
+        Returns the values, besides the validated data, which the search results depend on.
+
+        Returns:
+            dict: The extra cache key values.
+        """
+        return {}
+
+    def get_cache_key(self):
+        """
+        Builds the search result cache key from the validated data and get_cache_key_params().
+
+        Returns:
+            str: The cache key, or None when the results must not be cached.
+        """
+        return get_search_result_cache().make_key(
+            self.__class__.__name__,
+            {'query_name': self.query_name, 'data': self.data, **self.get_cache_key_params()}
+        )
+
     def get_data(self):
         """
         Builds the query, executes it, and returns the processed search results.
 
+        When use_result_cache is set, the results are served from and stored in the search result cache.
+
         Returns:
             Any: The processed search results.
         """
-        self.query = self.build_query()
-        self.elasticsearch_response = self.execute_query()
-        return self.get_result()
+        with timed('cache'):
+            result = self.get_local_data()
+        if result is not None:
+            return result
+
+        with timed('query'):
+            self.query = self.prepare_query()
+        with timed('search'):
+            self.elasticsearch_response = self.execute_query()
+        with timed('result'):
+            return self.get_response_data()
+
+    def get_local_data(self):
+        """
+        Returns the results when they can be served without querying Elasticsearch, here from the search
+        result cache when use_result_cache is set.
+
+        Returns:
+            Any: The processed search results, or None when Elasticsearch must be queried.
+        """
+        cache_key = self.get_cache_key() if self.use_result_cache else None
+        if cache_key:
+            # read before the search runs, a change committed meanwhile makes the result stale
+            self.cache_generation = index_generation.get()
+            if (cached := get_search_result_cache().get(cache_key, self.cache_generation)) is not None:
+                return self.restore_cached(cached)
+        return None
+
+    def get_response_data(self):
+        """
+        Processes elasticsearch_response into the search results, and caches them when use_result_cache
+        is set.
+
+        Returns:
+            Any: The processed search results.
+        """
+        self.total_count = self.elasticsearch_response['hits']['total']['value']
+        result = self.get_result()
+
+        if self.use_result_cache and (cache_key := self.get_cache_key()):
+            get_search_result_cache().set(
+                cache_key, self.make_cached(result), self.cache_generation, is_empty=not result
+            )
+        return result
+
+    def make_cached(self, result):
+        """
+        Builds the search result cache value of result, holding the cached_attributes too.
+        """
+        return {name: getattr(self, name) for name in self.cached_attributes}, result
+
+    def restore_cached(self, cached):
+        """
+        Restores the cached_attributes from a search result cache value and returns its result.
+        """
+        attributes, result = cached
+        for name, value in attributes.items():
+            setattr(self, name, value)
+        return result
+
+    def prepare_query(self):
+        """
+        Builds the query and restricts its _source to get_source_fields().
+
+        Returns:
+            dict: The query to execute.
+        """
+        query = self.build_query()
+        if (source_fields := self.get_source_fields()) is not None:
+            query['_source'] = source_fields
+        return query
+
+    def get_serializer_context(self):
+        """
+        Returns the context of the serializers validating the input data.
+
+        Returns:
+            dict: The serializer context.
+        """
+        return {'request': self.request}
 
     def is_data_valid(self, data, raise_error=False):
         """
@@ -120,12 +367,13 @@ class BaseSearchQuery:
         """
         serializers_to_try = self.serializers_to_try
 
-        for serializer_class, query_name in serializers_to_try:
-            serializer = serializer_class(data=data, context={'request': self.request})
-            if serializer.is_valid(raise_exception=raise_error):
-                self.query_name = query_name
-                self.data = serializer.validated_data
-                return True
+        with timed('validate'):
+            for serializer_class, query_name in serializers_to_try:
+                serializer = serializer_class(data=data, context=self.get_serializer_context())
+                if serializer.is_valid(raise_exception=raise_error):
+                    self.query_name = query_name
+                    self.data = serializer.validated_data
+                    return True
         return False
 
 
@@ -137,17 +385,24 @@ class ListFrameworkNames(BaseSearchQuery):
         (QueryByNameSerializer, 'names')
     ]
     document = FrameworkDocument
+    source_fields = ['id', 'name']
+    use_result_cache = True
 
     def query_by_name(self):
         framework_name = self.data.get('name')
         return {
             "query": {
-                "multi_match": {
-                    "query": framework_name,
-                    "type": "bool_prefix",
-                    "fields": [
-                        "name.search_as_you_type"
-                    ]
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": framework_name,
+                            "type": "bool_prefix",
+                            "fields": [
+                                "name.search_as_you_type"
+                            ]
+                        }
+                    },
+                    "must_not": UNAVAILABLE_FRAMEWORKS_QUERY
                 }
             },
             "size": DEFAULT_SUGGESTIONS_NUMBER
@@ -162,6 +417,15 @@ class ListFrameworkNames(BaseSearchQuery):
             for hit in self.elasticsearch_response['hits']['hits']
         ]
 
+    def get_local_data(self):
+        """
+        Returns the suggestions from the in-process autocomplete index, falling back to Elasticsearch
+        when the index is disabled or has no completion.
+        """
+        if is_autocomplete_index_enabled() and (completions := framework_name_index.complete(self.data.get('name'))):
+            return completions
+        return super().get_local_data()
+
     def build_query(self):
         return self.query_by_name()
 
@@ -174,6 +438,8 @@ class ListFrameworkNumber(BaseSearchQuery):
         (QueryByNumberSerializer, 'numbers')
     ]
     document = FrameworkDocument
+    source_fields = ['id', 'number']
+    use_result_cache = True
 
     def query_by_number(self):
         """
@@ -185,12 +451,17 @@ class ListFrameworkNumber(BaseSearchQuery):
         framework_number = self.data.get('number')
         return {
             "query": {
-                "multi_match": {
-                    "query": framework_number,
-                    "type": "bool_prefix",
-                    "fields": [
-                        "number.search_as_you_type"
-                    ]
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": framework_number,
+                            "type": "bool_prefix",
+                            "fields": [
+                                "number.search_as_you_type"
+                            ]
+                        }
+                    },
+                    "must_not": UNAVAILABLE_FRAMEWORKS_QUERY
                 }
             },
             "size": DEFAULT_SUGGESTIONS_NUMBER
@@ -205,11 +476,25 @@ class ListFrameworkNumber(BaseSearchQuery):
             for hit in self.elasticsearch_response['hits']['hits']
         ]
 
+    def get_local_data(self):
+        """
+        Returns the suggestions from the in-process autocomplete index, falling back to Elasticsearch
+        when the index is disabled or has no completion.
+        """
+        if is_autocomplete_index_enabled() and (
+                completions := framework_number_index.complete(self.data.get('number'))):
+            return completions
+        return super().get_local_data()
+
     def build_query(self):
         return self.query_by_number()
 
 
-class FrameworkSearchQuery(BaseSearchQuery):
+class FrameworkSearchQuery(PaginationMixin, FrameworkHydrationMixin, BaseSearchQuery):
+    """
+    Full framework search. When facets are requested, the selected filters are sent as post_filter so the
+    facet counts are not narrowed by them.
+    """
     query_map = {
         'full': 'full_query'
     }
@@ -217,76 +502,184 @@ class FrameworkSearchQuery(BaseSearchQuery):
         (FrameworkFullQuerySerializer, 'full')
     ]
     document = FrameworkDocument
-    results_per_page = None
+    source_fields = [
+        'id', 'name', 'number', 'industry_or_category', 'sub_category', 'description', 'start_date', 'end_date'
+    ]
+    use_result_cache = True
+    cached_attributes = ['total_count', 'facets']
 
     def __init__(self):
         super().__init__()
         self.filters = None
         self.page = 1
+        self.cursor = None
+        self.framework_value_ranges = None
+        self.preferences = None
+        self.facets = None
+
+    def get_serializer_context(self):
+        """
+        Adds the framework value ranges and the user's preferences, when they are set, so the serializers
+        do not look them up again.
+        """
+        context = super().get_serializer_context()
+        if self.framework_value_ranges is not None:
+            context['framework_value_ranges'] = self.framework_value_ranges
+        if self.preferences is not None:
+            context['preferences'] = self.preferences
+        return context
+
+    def get_framework_value_ranges(self):
+        """
+        Returns the FrameworkValue bands from the framework value snapshot, unless they are set already.
+
+        Returns:
+            dict: Mapping of value label to its (minimum_value, maximum_value) pair.
+        """
+        if self.framework_value_ranges is None:
+            self.framework_value_ranges = framework_value_ranges.get()
+        return self.framework_value_ranges
+
+    def get_preference_framework_ids(self, preference_names):
+        """
+        Returns the ids of the user's preference frameworks named in preference_names, from the user
+        preference cache unless the preferences are set already.
+
+        Args:
+            preference_names (list): The framework names.
+
+        Returns:
+            list: The framework ids, sorted.
+        """
+        if self.preferences is None:
+            self.preferences = user_preferences.get(self.request.user.id, names=preference_names)
+
+        ids_by_name = self.preferences.ids_by_name
+        return sorted({framework_id for name in preference_names for framework_id in ids_by_name.get(name, ())})
 
     def build_query(self):
         """
-        Builds the search query based on the specified filters, page, and results_per_page.
+        Builds the search query based on the specified filters and the pagination set by set_pagination().
 
         Returns:
             dict: The built query.
         """
-        page_param = self.request.data.get('page', '')
+        query = self.paginate_query(super(FrameworkSearchQuery, self).build_query())
 
-        if isinstance(page_param, int) or (
-                isinstance(page_param, str) and page_param.isdigit() and int(page_param) > 0):
-            self.page = int(page_param)
+        if self.data.get('facets'):
+            query['aggs'] = self.get_facet_aggregations()
 
-        results_per_page_param = self.request.data.get('results_per_page', '')
+        return query
 
-        if isinstance(results_per_page_param, int) \
-                or (
-                isinstance(results_per_page_param, str)
-                and results_per_page_param.isdigit()
-                and int(results_per_page_param) > 0
-        ):
-            self.results_per_page = int(results_per_page_param)
+    def get_ranking_engine(self):
+        """
+        Returns the columnar engine for search_all queries when it is enabled by the SEARCH_RANKING_ENGINE
+        setting.
+        """
+        if is_columnar_engine_enabled() and self.data.get('query_type') == QUERY_TYPE_CHOICE_SEARCH_ALL:
+            return framework_columnar_engine
+        return None
 
-        if self.results_per_page is None:
-            raise ValueError(
-                'results_per_page must be set'
-            )
+    def get_ranking_params(self):
+        """
+        Returns the search parameters of the columnar engine, taken from the validated data and the
+        prepared query.
+
+        Returns:
+            dict: The parameters read by ColumnarSnapshot.search().
+        """
+        query = self.data.get('query')
+        preference_names = query.get('preference_frameworks')
+        return {
+            'value': query.get('value'),
+            'preference_ids': self.get_preference_framework_ids(preference_names) if preference_names else [],
+            'filters': self.data.get('filter') or {},
+            'post_filter': bool(self.data.get('facets')),
+            'aggregations': self.query.get('aggs'),
+            'from': self.query.get('from', 0),
+            'size': self.query['size'],
+            'sort': 'sort' in self.query,
+            'search_after': self.query.get('search_after'),
+            'source_fields': self.query.get('_source'),
+        }
 
-        from_value = (self.page - 1) * self.results_per_page
-        bool_query = super(FrameworkSearchQuery, self).build_query()
+    def get_search_params(self):
+        # facet counts of the same query are served from the shard request cache
+        return {'request_cache': 'true'} if self.data.get('facets') else {}
 
-        query = {
-            'query': bool_query,
-            'from': from_value,
-            'size': self.results_per_page
+    def get_facet_aggregations(self):
+        """
+        Builds the facet aggregations.
+
+        Returns:
+            dict: The aggregations, named like FACET_NAMES.
+        """
+        value_ranges = []
+        for value, (minimum_value, maximum_value) in self.get_framework_value_ranges().items():
+            value_range = {'key': value}
+            if minimum_value:
+                value_range['from'] = minimum_value
+            if maximum_value:
+                # value_number is a long and the value query includes the maximum
+                value_range['to'] = maximum_value + 1
+            value_ranges.append(value_range)
+
+        date_histogram = {'calendar_interval': FACET_DATE_INTERVAL, 'format': FACET_DATE_FORMAT, 'min_doc_count': 1}
+        return {
+            'industry_types': {'terms': {'field': 'industry_or_category', 'size': FACET_TERMS_SIZE}},
+            'sub_categories': {'terms': {'field': 'sub_category', 'size': FACET_TERMS_SIZE}},
+            'values': {'range': {'field': 'value_number', 'ranges': value_ranges}},
+            'start_dates': {'date_histogram': {'field': 'start_date', **date_histogram}},
+            'end_dates': {'date_histogram': {'field': 'end_date', **date_histogram}},
         }
 
-        if self.filters:
-            query['post_filter'] = {
-                'bool': {
-                    'should': self.filters
-                }
-            }
+    def get_facets(self):
+        """
+        Reads the facet counts from the aggregations of the response.
 
-        return query
+        Returns:
+            dict: Mapping of facet name to a list of value and count dictionaries.
+        """
+        aggregations = self.elasticsearch_response.to_dict().get('aggregations', {})
+        return {
+            name: [
+                {'value': bucket.get('key_as_string', bucket['key']), 'count': bucket['doc_count']}
+                for bucket in aggregations.get(name, {}).get('buckets', [])
+            ]
+            for name in FACET_NAMES
+        }
+
+    def get_paginated_data(self, data):
+        paginated_data = super().get_paginated_data(data)
+        if self.data.get('facets'):
+            paginated_data['facets'] = self.facets or {name: [] for name in FACET_NAMES}
+        return paginated_data
 
     def get_data(self):
         """
         Retrieves the processed search results along with pagination information.
 
         Returns:
-            dict: Dictionary containing total_count, page, results_per_page, and data.
+            dict: Dictionary containing total_count, page, results_per_page, next_cursor (in cursor mode),
+                and data.
         """
+        # may open a point in time
+        with timed('query'):
+            self.set_pagination()
+
         data = []
         with contextlib.suppress(EmptyQueryException):
             data = super().get_data()
 
-        return {
-            'total_count': self.elasticsearch_response['hits']['total']['value'] if self.elasticsearch_response else 0,
-            'page': self.page,
-            'results_per_page': self.results_per_page,
-            'data': data
-        }
+        return self.get_paginated_data(data)
+
+    def get_cache_key_params(self):
+        params = super().get_cache_key_params()
+        if preference_names := self.data['query'].get('preference_frameworks'):
+            # preference frameworks are resolved per user, from the version of their preferences
+            self.get_preference_framework_ids(preference_names)
+            params['user'] = [self.request.user.id, *self.preferences.version]
+        return params
 
     def set_filter_query(self, filters):
         """
@@ -334,14 +727,14 @@ class FrameworkSearchQuery(BaseSearchQuery):
         elif query_type == QUERY_TYPE_CHOICE_BY_NUMBER and query.get('value'):
             must_queries.append(Q('match_phrase', number=query['value']))
         elif query_type == QUERY_TYPE_CHOICE_BY_VALUE and query.get('value'):
-            framework_value_object = get_model_object(model_class=FrameworkValue, query={'value': query['value']})
+            minimum_value, maximum_value = self.get_framework_value_ranges()[query['value']]
 
             value_number = {}
-            if framework_value_object.minimum_value:
-                value_number['gte'] = framework_value_object.minimum_value
+            if minimum_value:
+                value_number['gte'] = minimum_value
 
-            if framework_value_object.maximum_value:
-                value_number['lte'] = framework_value_object.maximum_value
+            if maximum_value:
+                value_number['lte'] = maximum_value
 
             must_queries.append(Q('range', value_number=value_number))
         elif query_type == QUERY_TYPE_CHOICE_SEARCH_ALL:
@@ -364,10 +757,8 @@ class FrameworkSearchQuery(BaseSearchQuery):
                 )
 
             if query.get('preference_frameworks'):
-                preference_frameworks_ids = Framework.objects.get_user_preferences(
-                    user=self.request.user, preference_names=query.get('preference_frameworks')
-                ).values_list('id', flat=True)
-                must_queries.append(Q('terms', **{"id": list(preference_frameworks_ids)}))
+                preference_frameworks_ids = self.get_preference_framework_ids(query.get('preference_frameworks'))
+                must_queries.append(Q('terms', **{"id": preference_frameworks_ids}))
 
         return must_queries
 
@@ -376,7 +767,10 @@ class FrameworkSearchQuery(BaseSearchQuery):
         Builds the full search query based on the specified query type and filters.
 
         Returns:
-            dict: The built query.
+            dict: The built query, with the post_filter when facets are requested and filters are set.
+
+        Raises:
+            EmptyQueryException: If the query has no clause.
         """
         query_type = self.data.get('query_type')
 
@@ -385,13 +779,12 @@ class FrameworkSearchQuery(BaseSearchQuery):
 
         self.set_filter_query(filters)
 
-        result_query = {}
-        if must_queries := self.get_must_queries(query_type, query):
-            result_query['bool'] = {'should': must_queries}
-        else:
+        if not (must_queries := self.get_must_queries(query_type, query)):
             raise EmptyQueryException
 
-        return result_query
+        # facet counts must not be narrowed by the filters
+        compiler = QueryCompiler(must_queries, self.filters, exclusions=[UNAVAILABLE_FRAMEWORKS_QUERY])
+        return compiler.compile(use_post_filter=bool(self.data.get('facets')))
 
     def get_result(self):
         """
@@ -402,32 +795,33 @@ class FrameworkSearchQuery(BaseSearchQuery):
         """
         results = []
         if self.elasticsearch_response is not None:
+            if self.data.get('facets'):
+                self.facets = self.get_facets()
+
+            frameworks = self.hydrate()
             for hit in self.elasticsearch_response['hits']['hits']:
-                framework = get_model_object(model_class=Framework, query={'id': hit['_source']['id']})
-                if not framework:
+                framework = frameworks.get(hit['_source']['id'])
+                if framework is None:
                     continue
 
-                image_url = DEFAULT_IMAGE_PATH % settings.BACK_END_DOMAIN
-                if framework.logo:
-                    image_url = settings.BACK_END_DOMAIN + settings.MEDIA_URL + framework.logo
                 results.append(
                     {
                         'framework_id': hit['_source']['id'],
                         'framework_name': hit['_source']['name'],
                         'framework_number': hit['_source']['number'],
-                        'framework_value': framework.value,
+                        'framework_value': framework['value'],
                         'industry_type': hit['_source']['industry_or_category'],
                         'sub_category': hit['_source']['sub_category'],
                         'description': hit['_source']['description'],
                         'start_date': hit['_source']['start_date'],
                         'end_date': hit['_source']['end_date'],
-                        'framework_image': image_url
+                        'framework_image': framework['image_url']
                     }
                 )
         return results
 
 
-class AdminFrameworkSearchQuery(BaseSearchQuery):
+class AdminFrameworkSearchQuery(PaginationMixin, FrameworkHydrationMixin, BaseSearchQuery):
     query_map = {
         'full': 'full_query'
     }
@@ -435,51 +829,25 @@ class AdminFrameworkSearchQuery(BaseSearchQuery):
         (AdminFrameworkQuerySerializer, 'full')
     ]
     document = FrameworkDocument
-    results_per_page = None
+    source_fields = ['id', 'name', 'number', 'start_date']
 
     def __init__(self):
         super().__init__()
         self.page = 1
+        self.cursor = None
 
     def build_query(self):
         """
-        Builds the search query based on the request data.
+        Builds the search query based on the request data and the pagination set by set_pagination().
 
         Returns:
             dict: The built search query.
-
-        Raises:
-            ValueError: If results_per_page is not set.
         """
-        page_param = self.request.data.get('page', '')
-
-        if isinstance(page_param, int) or (
-                isinstance(page_param, str) and page_param.isdigit() and int(page_param) > 0):
-            self.page = int(page_param)
-
-        results_per_page_param = self.request.data.get('results_per_page', '')
-
-        if isinstance(results_per_page_param, int) \
-                or (
-                isinstance(results_per_page_param, str)
-                and results_per_page_param.isdigit()
-                and int(results_per_page_param) > 0
-        ):
-            self.results_per_page = int(results_per_page_param)
-
-        if self.results_per_page is None:
-            raise ValueError(
-                'results_per_page must be set'
-            )
-
-        from_value = (self.page - 1) * self.results_per_page
         bool_query = super(AdminFrameworkSearchQuery, self).build_query()
 
-        return {
+        return self.paginate_query({
             'query': bool_query,
-            'from': from_value,
-            'size': self.results_per_page,
-        }
+        })
 
     def get_data(self):
         """
@@ -488,16 +856,13 @@ class AdminFrameworkSearchQuery(BaseSearchQuery):
         Returns:
             dict: The search data.
         """
+        self.set_pagination()
+
         data = []
         with contextlib.suppress(EmptyQueryException):
             data = super().get_data()
 
-        return {
-            'total_count': self.elasticsearch_response['hits']['total']['value'] if self.elasticsearch_response else 0,
-            'page': self.page,
-            'results_per_page': self.results_per_page,
-            'data': data
-        }
+        return self.get_paginated_data(data)
 
     def get_must_queries(self):
         """
@@ -555,18 +920,19 @@ class AdminFrameworkSearchQuery(BaseSearchQuery):
         """
         results = []
         if self.elasticsearch_response is not None:
+            frameworks = self.hydrate()
             for hit in self.elasticsearch_response['hits']['hits']:
-                framework = get_model_object(model_class=Framework, query={'id': hit['_source']['id']})
-                image_url = DEFAULT_IMAGE_PATH % settings.BACK_END_DOMAIN
-                if framework.logo:
-                    image_url = settings.BACK_END_DOMAIN + settings.MEDIA_URL + framework.logo
+                framework = frameworks.get(hit['_source']['id'])
+                if framework is None:
+                    continue
+
                 results.append(
                     {
                         'framework_id': hit['_source']['id'],
                         'framework_name': hit['_source']['name'],
                         'number': hit['_source']['number'],
                         'start_date': hit['_source']['start_date'],
-                        'framework_image': image_url
+                        'framework_image': framework['image_url']
                     }
                 )
         return results
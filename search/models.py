@@ -1,6 +1,7 @@
 import datetime
 
 from django.db import models
+from django.utils import timezone
 
 from accounts.models import User
 from search.managers import FrameworkModelManager
@@ -26,6 +27,9 @@ class Framework(models.Model):
         industry_or_category (CharField, optional): The industry or category associated with the framework. Defaults to None.
         sub_category (CharField, optional): The sub-category associated with the framework. Defaults to None.
         is_available (BooleanField): Indicates if the framework is available. Defaults to True.
+            Frameworks missing from a full scrape are made unavailable instead of being deleted.
+        content_hash (CharField, optional): The hash of the scraped content of the framework and its
+            children, used to detect changed frameworks. Defaults to None.
         created_at (DateField): The date when the framework was created.
         updated_at (DateField): The date when the framework was last updated.
 
@@ -42,7 +46,7 @@ class Framework(models.Model):
 
     name = models.TextField()
     link = models.TextField(null=True)
-    site_name = models.CharField(max_length=255)
+    site_name = models.CharField(max_length=255, db_index=True)
     number = models.CharField(null=True, max_length=200)
     lot_number = models.IntegerField(null=True)
     value = models.CharField(max_length=255, null=True)
@@ -55,6 +59,7 @@ class Framework(models.Model):
     industry_or_category = models.CharField(max_length=255, null=True)
     sub_category = models.CharField(max_length=255, null=True)
     is_available = models.BooleanField(default=True)
+    content_hash = models.CharField(max_length=64, null=True)
     created_at = models.DateField(auto_now_add=True)
     updated_at = models.DateField(auto_now=True)
 
@@ -194,3 +199,26 @@ class Preference(models.Model):
     class Meta:
         unique_together = ('user', 'framework')
 
+
+
+class IndexOutbox(models.Model):
+    """
+    Model representing a pending update of the framework index, written in the transaction of the change.
+
+    Rows are processed by the process_index_outbox command, which indexes the framework as it is in the
+    database then, so several rows of the same framework are processed as one.
+
+    Fields:
+        framework_id (BigIntegerField): The id of the changed framework, not a foreign key as the framework
+            may be deleted.
+        created_at (DateTimeField): The time of the change.
+        available_at (DateTimeField): The time from which the row is processed, later after a failure.
+        attempts (IntegerField): The number of failed attempts.
+        last_error (TextField, optional): The error of the last failed attempt. Defaults to None.
+    """
+
+    framework_id = models.BigIntegerField(db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(null=True)
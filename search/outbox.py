@@ -0,0 +1,189 @@
+import datetime
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.signals import BaseSignalProcessor
+from elasticsearch.exceptions import TransportError
+
+from search.documents import FrameworkDocument
+from search.models import Framework, Cpv, LOT, Supplier, IndexOutbox
+
+OUTBOX_SIGNAL_PROCESSOR = 'search.outbox.OutboxSignalProcessor'
+
+
+def is_outbox_enabled():
+    """
+    Returns whether the framework index is synchronized through the outbox.
+    """
+    return DEDConfig.autosync_enabled() and getattr(
+        settings, 'ELASTICSEARCH_DSL_SIGNAL_PROCESSOR', None
+    ) == OUTBOX_SIGNAL_PROCESSOR
+
+
+def enqueue_frameworks(framework_ids):
+    """
+    Adds an outbox row per framework id, in the current transaction.
+    """
+    IndexOutbox.objects.bulk_create([IndexOutbox(framework_id=framework_id) for framework_id in framework_ids])
+
+
+class OutboxSignalProcessor(BaseSignalProcessor):
+    """
+    django_elasticsearch_dsl signal processor which writes the index updates to the IndexOutbox table.
+
+    The outbox row is added in the transaction of the change, so saving does not wait for Elasticsearch.
+    Selected by the ELASTICSEARCH_DSL_SIGNAL_PROCESSOR setting.
+
+    Attributes:
+        related_models (tuple): The models whose rows belong to a framework through their framework field.
+    """
+
+    related_models = (Cpv, LOT, Supplier)
+
+    def setup(self):
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        self.enqueue(sender, instance)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        self.enqueue(sender, instance)
+
+    def enqueue(self, sender, instance):
+        if not DEDConfig.autosync_enabled():
+            return
+
+        if sender is Framework:
+            framework_id = instance.id
+        elif sender in self.related_models:
+            framework_id = instance.framework_id
+        else:
+            return
+
+        if framework_id is not None:
+            enqueue_frameworks([framework_id])
+
+
+class OutboxProcessor:
+    """
+    Applies the index updates of the IndexOutbox table in bulk.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED and an advisory lock per framework, so several
+    workers can run at once and the updates of a framework are applied one after the other. Failed rows
+    are retried after an exponential backoff.
+
+    The bulk request is sent in the transaction holding the claimed rows and the advisory locks, so a batch
+    is either applied and deleted or retried. It only locks outbox rows and lasts one bulk request at most.
+
+    Attributes:
+        batch_size (int): The number of rows claimed at once.
+        base_backoff (float): Seconds before the first retry, doubled at each attempt.
+        max_backoff (float): The maximum number of seconds between two attempts.
+    """
+
+    document = FrameworkDocument
+
+    def __init__(self, batch_size=500, base_backoff=1, max_backoff=300):
+        self.batch_size = batch_size
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    def process_batch(self):
+        """
+        Claims a batch of rows and applies their updates.
+
+        Returns:
+            tuple: The number of rows processed, and of frameworks whose update failed.
+        """
+        with transaction.atomic():
+            rows = list(
+                IndexOutbox.objects.select_for_update(skip_locked=True).filter(
+                    available_at__lte=timezone.now()
+                ).order_by('id')[:self.batch_size]
+            )
+            if not rows:
+                return 0, 0
+
+            locked = self.lock_frameworks(sorted({row.framework_id for row in rows}))
+            # the rows of the frameworks another worker is applying stay pending
+            rows = [row for row in rows if row.framework_id in locked]
+            if not rows:
+                return 0, 0
+
+            framework_ids = sorted(locked)
+            try:
+                errors = self.apply(framework_ids)
+            except TransportError as e:
+                errors = {framework_id: str(e) for framework_id in framework_ids}
+
+            IndexOutbox.objects.filter(id__in=[row.id for row in rows if row.framework_id not in errors]).delete()
+            failed = [row for row in rows if row.framework_id in errors]
+            now = timezone.now()
+            for row in failed:
+                backoff = min(self.base_backoff * 2 ** row.attempts, self.max_backoff)
+                row.attempts += 1
+                row.available_at = now + datetime.timedelta(seconds=backoff)
+                row.last_error = errors[row.framework_id][:2000]
+            IndexOutbox.objects.bulk_update(failed, ['attempts', 'available_at', 'last_error'])
+        return len(rows), len(errors)
+
+    @staticmethod
+    def lock_frameworks(framework_ids):
+        """
+        Takes an advisory lock per framework until the end of the transaction, skipping the frameworks
+        locked by another worker.
+
+        Returns:
+            set: The ids of the frameworks locked.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM unnest(%s::bigint[]) AS id WHERE pg_try_advisory_xact_lock(id)', [framework_ids]
+            )
+            return {framework_id for framework_id, in cursor.fetchall()}
+
+    def apply(self, framework_ids):
+        """
+        Indexes the frameworks of framework_ids, deleting the documents of those which do not exist.
+
+        Returns:
+            dict: Mapping of the framework ids whose update failed to their error.
+        """
+        document = self.document()
+        frameworks = Framework.objects.filter(id__in=framework_ids).prefetch_related('cpvs')
+        actions = list(document._get_actions(frameworks, 'index'))
+        indexed_ids = {framework.id for framework in frameworks}
+        actions.extend(
+            {'_op_type': 'delete', '_index': document._index._name, '_id': framework_id}
+            for framework_id in framework_ids if framework_id not in indexed_ids
+        )
+
+        _, errors = document.bulk(actions, raise_on_error=False, raise_on_exception=False)
+        failed = {}
+        for error in errors:
+            op_type, item = next(iter(error.items()))
+            # the document of a deleted framework may never have been indexed
+            if op_type == 'delete' and item.get('status') == 404:
+                continue
+            failed[int(item['_id'])] = str(item.get('error', item))
+        return failed
+
+    @staticmethod
+    def get_lag():
+        """
+        Returns the number of pending rows and the age of the oldest one.
+
+        Returns:
+            tuple: The row count, and the age in seconds, 0 when there is no row.
+        """
+        pending = IndexOutbox.objects.aggregate(count=models.Count('id'), oldest=models.Min('created_at'))
+        if pending['oldest'] is None:
+            return 0, 0
+        return pending['count'], (timezone.now() - pending['oldest']).total_seconds()
@@ -0,0 +1,161 @@
+from elasticsearch_dsl import Search
+from rest_framework.exceptions import ValidationError
+
+from search.constants import INVALID_CURSOR
+from search.memory import get_memory_index
+from search.utils import encode_cursor, decode_cursor
+
+
+class PaginationMixin:
+    """
+    Paginates search queries by page number or, when a cursor parameter is sent, by cursor with
+    search_after, optionally pinned to a point in time of the index.
+
+    Attributes:
+        results_per_page (int): The default number of results per page.
+        cursor_sort (list): The sort used by cursor mode.
+        point_in_time_keep_alive (str): How long a point in time is kept between two pages.
+    """
+
+    results_per_page = None
+    cursor_sort = [{'_score': 'desc'}, {'id': 'asc'}]
+    point_in_time_keep_alive = '1m'
+
+    def set_pagination(self, data=None):
+        """
+        Sets page, results_per_page and the cursor from the request data.
+
+        Args:
+            data (dict, optional): The data holding the pagination parameters. Defaults to the request data.
+
+        Raises:
+            ValueError: If results_per_page is not set.
+            ValidationError: If the cursor is not valid.
+        """
+        data = self.request.data if data is None else data
+        page_param = data.get('page', '')
+
+        if isinstance(page_param, int) or (
+                isinstance(page_param, str) and page_param.isdigit() and int(page_param) > 0):
+            self.page = int(page_param)
+
+        results_per_page_param = data.get('results_per_page', '')
+
+        if isinstance(results_per_page_param, int) \
+                or (
+                isinstance(results_per_page_param, str)
+                and results_per_page_param.isdigit()
+                and int(results_per_page_param) > 0
+        ):
+            self.results_per_page = int(results_per_page_param)
+
+        if self.results_per_page is None:
+            raise ValueError(
+                'results_per_page must be set'
+            )
+
+        self.cursor = None
+        if 'cursor' in data:
+            try:
+                self.cursor = decode_cursor(data.get('cursor'))
+            except ValueError as e:
+                raise ValidationError({'cursor': INVALID_CURSOR}) from e
+
+            if not self.cursor and str(data.get('point_in_time', '')).lower() == 'true' \
+                    and not get_memory_index(self.document) and not self.get_ranking_engine():
+                connection = self.document._get_connection()
+                self.cursor['pit'] = connection.open_point_in_time(
+                    index=self.document._index._name, keep_alive=self.point_in_time_keep_alive
+                )['id']
+
+    def paginate_query(self, query):
+        """
+        Adds the pagination of the current mode to the query.
+
+        Args:
+            query (dict): The query without pagination.
+
+        Returns:
+            dict: The paginated query.
+        """
+        query['size'] = self.results_per_page
+        if self.cursor is None:
+            query['from'] = (self.page - 1) * self.results_per_page
+            return query
+
+        query['sort'] = self.cursor_sort
+        if search_after := self.cursor.get('search_after'):
+            query['search_after'] = search_after
+        if pit := self.cursor.get('pit'):
+            query['pit'] = {'id': pit, 'keep_alive': self.point_in_time_keep_alive}
+        return query
+
+    def execute_query(self):
+        """
+        Executes the query, without the index when it is pinned to a point in time.
+        """
+        if 'pit' not in self.query:
+            return super().execute_query()
+        search = Search(using=self.document._get_using()).update_from_dict(self.query)
+        return search.params(**self.get_search_params()).execute()
+
+    def get_next_cursor(self):
+        """
+        Builds the cursor of the next page from the sort values of the last hit.
+
+        Returns:
+            str: The next cursor, or None when this is the last page.
+        """
+        hits, pit = [], self.cursor.get('pit')
+        if self.elasticsearch_response is not None:
+            hits = self.elasticsearch_response['hits']['hits']
+            pit = self.elasticsearch_response.to_dict().get('pit_id', pit)
+
+        if len(hits) < self.results_per_page:
+            if pit:
+                self.close_point_in_time(pit)
+            return None
+
+        return encode_cursor({'search_after': list(hits[-1]['sort']), 'pit': pit})
+
+    def close_point_in_time(self, pit):
+        """
+        Closes a point in time once its last page has been fetched.
+        """
+        self.document._get_connection().close_point_in_time(body={'id': pit})
+
+    def get_paginated_data(self, data):
+        """
+        Wraps the search results of a page with the total count and pagination information.
+
+        Args:
+            data (list): The search results.
+
+        Returns:
+            dict: Dictionary containing total_count, page, results_per_page, next_cursor (in cursor mode),
+                and data.
+        """
+        return {
+            'total_count': self.total_count,
+            **self.get_pagination_data(),
+            'data': data
+        }
+
+    def get_pagination_data(self):
+        """
+        Returns the pagination information of the response.
+
+        Returns:
+            dict: page and results_per_page, plus next_cursor in cursor mode.
+        """
+        data = {'page': self.page, 'results_per_page': self.results_per_page}
+        if self.cursor is not None:
+            data['next_cursor'] = self.get_next_cursor()
+        return data
+
+    def get_cache_key(self):
+        # cursor pages are not cached, their point in time and sort values are short-lived
+        return super().get_cache_key() if self.cursor is None else None
+
+    def get_cache_key_params(self):
+        return {'page': self.page, 'results_per_page': self.results_per_page}
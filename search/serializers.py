@@ -2,8 +2,9 @@ from rest_framework import serializers
 
 from accounts.models import User
 from search.constants import QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICES, QUERY_TYPE_CHOICE_SEARCH_ALL, \
-    INVALID_CPV_CODE
-from search.models import FrameworkValue, Framework, Preference
+    INVALID_CPV_CODE, MAX_BATCH_SEARCH_REQUESTS
+from search.models import Framework, Preference
+from search.snapshots import framework_value_ranges, user_preferences
 from search.utils import get_model_object
 
 
@@ -133,6 +134,10 @@ class QueryValueSerializer(serializers.Serializer):
     """
     Serializer for querying frameworks by value.
 
+    The context may hold prefetched lookups, read from the in-process caches otherwise:
+    framework_value_ranges, the mapping of value label to (minimum_value, maximum_value) of the framework
+    value snapshot, and preferences, the PreferenceSet of the user from the user preference cache.
+
     Attributes:
         value (str): The value for filtering.
         preference_frameworks (list): The list of framework names for filtering.
@@ -154,20 +159,22 @@ class QueryValueSerializer(serializers.Serializer):
 
         attrs = super().validate(attrs)
 
-        if (
-                query_type == QUERY_TYPE_CHOICE_BY_VALUE and
-                not FrameworkValue.objects.filter(
-                    value=attrs.get('value')
-                ).exists()
-        ):
-            raise serializers.ValidationError({'value': 'Invalid value'})
-
-        if query_type == QUERY_TYPE_CHOICE_SEARCH_ALL:
-            preference_frameworks = Preference.objects.filter(user=self.context['request'].user).values_list(
-                'framework__name', flat=True
-            )
-            for framework_name in attrs.get('preference_frameworks', []):
-                if framework_name not in preference_frameworks:
+        if query_type == QUERY_TYPE_CHOICE_BY_VALUE:
+            value_ranges = self.context.get('framework_value_ranges')
+            if value_ranges is None:
+                value_ranges = framework_value_ranges.get()
+
+            if attrs.get('value') not in value_ranges:
+                raise serializers.ValidationError({'value': 'Invalid value'})
+
+        if query_type == QUERY_TYPE_CHOICE_SEARCH_ALL and attrs.get('preference_frameworks'):
+            preferences = self.context.get('preferences')
+            if preferences is None:
+                user_id = self.context['request'].user.id
+                preferences = user_preferences.get(user_id, names=attrs['preference_frameworks'])
+
+            for framework_name in attrs['preference_frameworks']:
+                if framework_name not in preferences.ids_by_name:
                     raise serializers.ValidationError({'preference_frameworks': f'{framework_name} is not valid'})
 
         return attrs
@@ -181,10 +188,26 @@ class FrameworkFullQuerySerializer(serializers.Serializer):
         query_type (str): The type of query.
         query (QueryValueSerializer): The query value serializer.
         filter (FilterSerializer): The filter serializer.
+        facets (bool): Whether the facet counts of the query are returned with the results.
     """
     query_type = serializers.ChoiceField(choices=QUERY_TYPE_CHOICES)
     query = QueryValueSerializer()
     filter = FilterSerializer(default=FilterSerializer().data)
+    facets = serializers.BooleanField(required=False, default=False)
+
+
+class BatchSearchSerializer(serializers.Serializer):
+    """
+    Serializer for batches of searches.
+
+    Attributes:
+        requests (list): The sub-requests, each one with a type and the data of that search.
+    """
+    requests = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_BATCH_SEARCH_REQUESTS
+    )
 
 
 class AdminFrameworkQuerySerializer(serializers.Serializer):
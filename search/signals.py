@@ -0,0 +1,92 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django_elasticsearch_dsl.signals import post_index
+
+from search.autocomplete import framework_name_index, framework_number_index
+from search.columnar import framework_columnar_engine
+from search.documents import FrameworkDocument
+from search.generation import index_generation
+from search.memory import framework_memory_index
+from search.models import Framework, FrameworkValue, Preference, Cpv
+from search.snapshots import framework_value_ranges, user_preferences
+
+# the in-process indexes of the frameworks, kept up to date with the changes committed in this process
+framework_indexes = [framework_name_index, framework_number_index, framework_memory_index, framework_columnar_engine]
+
+# the ids of the frameworks changed by each thread, applied once their transaction is committed
+pending_changes = threading.local()
+
+
+@receiver(post_index, sender=FrameworkDocument)
+def bump_index_generation_on_index(sender, **kwargs):
+    """
+    Invalidates the cached search results whenever framework documents are (re)indexed or deleted.
+    """
+    transaction.on_commit(index_generation.bump)
+
+
+@receiver(post_save, sender=Framework)
+@receiver(post_delete, sender=Framework)
+@receiver(post_save, sender=Cpv)
+@receiver(post_delete, sender=Cpv)
+def apply_framework_change(sender, instance, **kwargs):
+    """
+    Once the change of a framework or of its cpvs is committed, applies it to the in-process indexes and
+    bumps the index generation, which invalidates the cached search results.
+    """
+    framework_id = instance.id if sender is Framework else instance.framework_id
+    if not hasattr(pending_changes, 'framework_ids'):
+        pending_changes.framework_ids = set()
+    pending_changes.framework_ids.add(framework_id)
+    transaction.on_commit(apply_pending_changes)
+
+
+def apply_pending_changes():
+    """
+    Applies the framework changes of the committed transaction together, one copy of each index. The first
+    callback of the transaction applies them all, the others find none left.
+    """
+    framework_ids = getattr(pending_changes, 'framework_ids', None)
+    if not framework_ids:
+        return
+    # the ids of a rolled back transaction may be left over, applying them again reads the same rows
+    pending_changes.framework_ids = set()
+    framework_ids.discard(None)
+
+    for index in framework_indexes:
+        index.update(framework_ids)
+    generation = index_generation.bump()
+    for index in framework_indexes:
+        index.advance(generation)
+
+
+@receiver(post_save, sender=FrameworkValue)
+@receiver(post_delete, sender=FrameworkValue)
+def invalidate_framework_value_ranges(sender, **kwargs):
+    """
+    Makes the framework value snapshot and the cached value search results stale when a value band changes.
+    """
+    framework_value_ranges.invalidate()
+    transaction.on_commit(index_generation.bump)
+
+
+@receiver(post_save, sender=Preference)
+@receiver(post_delete, sender=Preference)
+def invalidate_user_preferences(sender, instance, **kwargs):
+    """
+    Drops the cached preferences of the user whose preference was created or deleted,
+    e.g. through PreferencesAPIView.
+    """
+    transaction.on_commit(lambda: user_preferences.invalidate(instance.user_id))
+
+
+@receiver(post_save, sender=Framework)
+@receiver(post_delete, sender=Framework)
+def invalidate_all_user_preferences(sender, **kwargs):
+    """
+    Drops all cached preferences when a framework changes, as they hold framework names.
+    """
+    transaction.on_commit(user_preferences.invalidate)
@@ -0,0 +1,261 @@
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+
+from core.timing import timed
+from search.cache import LRUCache
+from search.generation import get_shared_cache
+from search.models import FrameworkValue, Preference
+
+PreferenceSet = namedtuple('PreferenceSet', ['ids', 'ids_by_name', 'version'], defaults=[None])
+
+
+class VersionedSnapshot:
+    """
+    Process-local snapshot of a small table, reloaded when its version changes.
+
+    The version is kept in SEARCH_SHARED_CACHE when it is configured, so a change made by another process is
+    seen by every worker. Without it, snapshots are reloaded every max_age seconds.
+
+    Attributes:
+        name (str): The name of the snapshot, part of its version key.
+        loader (callable): Returns the snapshot data, loaded from the database.
+        check_interval (float): Seconds between two checks of the shared version.
+        max_age (float): Seconds after which a snapshot is reloaded without a shared cache.
+    """
+
+    def __init__(self, name, loader, check_interval=1, max_age=300):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self._version = 0
+        self._data = None
+        self._data_version = None
+        self._loaded_at = 0
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version_key(self):
+        return f'search:snapshot:{self.name}:version'
+
+    def get_version(self):
+        """
+        Returns the current version, read from SEARCH_SHARED_CACHE when it is configured.
+
+        Returns:
+            tuple: The local version and the shared version, None without a shared cache.
+        """
+        if shared := get_shared_cache():
+            version = shared.get(self.version_key)
+            if version is None:
+                shared.add(self.version_key, 0, timeout=None)
+                version = shared.get(self.version_key, 0)
+            return self._version, version
+        return self._version, None
+
+    def invalidate(self):
+        """
+        Makes the snapshot stale in every process. Called whenever the table changes.
+        """
+        with self._lock:
+            self._version += 1
+        if shared := get_shared_cache():
+            try:
+                shared.incr(self.version_key)
+            except ValueError:
+                shared.set(self.version_key, 1, timeout=None)
+
+    def is_fresh(self):
+        """
+        Returns whether the loaded data is current, as far as it can tell without I/O.
+
+        Returns:
+            bool: Whether the data is current, None when the shared version must be read to tell.
+        """
+        if self._data is None or self._data_version[0] != self._version:
+            return False
+
+        now = time.monotonic()
+        if self._data_version[1] is None:
+            return now - self._loaded_at < self.max_age
+        if now - self._checked_at < self.check_interval:
+            return True
+        return None
+
+    def load(self):
+        """
+        Reloads the snapshot data from the database.
+
+        Returns:
+            The snapshot data.
+        """
+        version = self.get_version()
+        data = self.loader()
+        with self._lock:
+            self._data = data
+            self._data_version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+        return data
+
+    def get(self):
+        """
+        Returns the snapshot data, reloaded when it is stale.
+
+        Returns:
+            The snapshot data.
+        """
+        with timed('lookups'):
+            is_fresh = self.is_fresh()
+            if is_fresh is None:
+                self._checked_at = time.monotonic()
+                is_fresh = self.get_version() == self._data_version
+            return self._data if is_fresh else self.load()
+
+    async def aget(self):
+        """
+        Async version of get(), the shared version is read and the data reloaded in a worker thread.
+        """
+        if self.is_fresh():
+            return self._data
+        return await sync_to_async(self.get)()
+
+
+def load_framework_value_ranges():
+    """
+    Loads the FrameworkValue bands.
+
+    Returns:
+        dict: Mapping of value label to its (minimum_value, maximum_value) pair, in drop-down order.
+    """
+    return {
+        value: (minimum_value, maximum_value)
+        for value, minimum_value, maximum_value in FrameworkValue.objects.order_by('id').values_list(
+            'value', 'minimum_value', 'maximum_value'
+        )
+    }
+
+
+framework_value_ranges = VersionedSnapshot('framework_value_ranges', load_framework_value_ranges)
+
+
+class UserPreferenceCache:
+    """
+    Process-local cache of the users' preference frameworks, held as hash sets.
+
+    Entries carry the version of their user and the version of all users, kept in SEARCH_SHARED_CACHE when
+    it is configured. Without it, entries expire after timeout seconds.
+
+    Attributes:
+        timeout (float): Seconds an entry is kept.
+    """
+
+    version_key = 'search:preferences:version'
+
+    def __init__(self, max_entries=10000, timeout=60):
+        self.timeout = timeout
+        self.local = LRUCache(max_entries)
+        self._version = 0
+        self._user_versions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_user_version_key(cls, user_id):
+        return f'{cls.version_key}:{user_id}'
+
+    def get_version(self, user_id):
+        """
+        Returns the version of the preferences of a user, read from the shared cache when it is configured.
+
+        Returns:
+            tuple: The version of all users and the version of the user.
+        """
+        if shared := get_shared_cache():
+            user_key = self.get_user_version_key(user_id)
+            versions = shared.get_many([self.version_key, user_key])
+            return versions.get(self.version_key, 0), versions.get(user_key, 0)
+        return self._version, self._user_versions.get(user_id, 0)
+
+    @staticmethod
+    def load(user_id, version=None):
+        """
+        Loads the preference frameworks of a user.
+
+        Args:
+            user_id (int): The user id.
+            version (tuple, optional): The version of the preferences, read before loading them.
+
+        Returns:
+            PreferenceSet: The frozenset of framework ids, the mapping of framework name to the
+                frozenset of ids of the frameworks with that name, and the version.
+        """
+        ids_by_name = {}
+        for framework_id, name in Preference.objects.filter(user_id=user_id).values_list(
+                'framework_id', 'framework__name'):
+            ids_by_name.setdefault(name, set()).add(framework_id)
+
+        return PreferenceSet(
+            ids=frozenset(framework_id for ids in ids_by_name.values() for framework_id in ids),
+            ids_by_name={name: frozenset(ids) for name, ids in ids_by_name.items()},
+            version=version,
+        )
+
+    def is_current(self, preferences, version, names):
+        if preferences is None or preferences.version != version:
+            return False
+        return get_shared_cache() is not None or not names or all(name in preferences.ids_by_name for name in names)
+
+    def get(self, user_id, names=None):
+        """
+        Returns the preference frameworks of a user.
+
+        Args:
+            user_id (int): The user id.
+            names (list, optional): Framework names the caller looks up, without a shared cache an entry
+                missing any of them is reloaded.
+
+        Returns:
+            PreferenceSet: The preference frameworks of the user.
+        """
+        with timed('lookups'):
+            version = self.get_version(user_id)
+            preferences = self.local.get(user_id)
+            if not self.is_current(preferences, version, names):
+                preferences = self.load(user_id, version)
+                self.local.set(user_id, preferences, self.timeout)
+            return preferences
+
+    async def aget(self, user_id, names=None):
+        """
+        Async version of get(), the version is read and the preferences are loaded in a worker thread.
+        """
+        if get_shared_cache() is not None:
+            return await sync_to_async(self.get)(user_id, names)
+        with timed('lookups'):
+            version = self.get_version(user_id)
+            preferences = self.local.get(user_id)
+            if not self.is_current(preferences, version, names):
+                preferences = await sync_to_async(self.load)(user_id, version)
+                self.local.set(user_id, preferences, self.timeout)
+            return preferences
+
+    def invalidate(self, user_id=None):
+        """
+        Makes the cached preferences of a user stale in every process, or of every user when user_id is None.
+        Called once the change is committed.
+        """
+        with self._lock:
+            if user_id is None:
+                self._version += 1
+            else:
+                self._user_versions[user_id] = self._user_versions.get(user_id, 0) + 1
+        if shared := get_shared_cache():
+            key = self.version_key if user_id is None else self.get_user_version_key(user_id)
+            shared.add(key, 0, timeout=None)
+            shared.incr(key)
+
+
+user_preferences = UserPreferenceCache()
@@ -0,0 +1,143 @@
+import datetime
+import functools
+import random
+import re
+
+from django.conf import settings
+
+from search.ingestion import iter_json_records
+
+FIXTURE_PATH = settings.BASE_DIR / 'search/fixture/frameworks.json'
+DATE_FORMAT = '%d/%m/%Y'
+DOCUMENTS_URL = 'https://assets.crowncommercial.gov.uk/wp-content/uploads/'
+NUMBER_PATTERN = re.compile(r'^RM\w*\s*')
+
+# synthetic numbers have 5 digits or more, so they do not collide with the numbers of the fixture
+FIRST_NUMBER = 10000
+
+
+class SyntheticCatalog:
+    """
+    Generates scraped framework records shaped like the records of the fixture, drawn from their
+    distributions, at any scale. Every record is built from a template record of the fixture picked at
+    random, so the fields keep their correlations.
+
+    Attributes:
+        word_replacement_rate (float): The probability of replacing every word of the template name.
+        max_date_shift (int): The maximum number of days the dates are moved by.
+    """
+
+    word_replacement_rate = 0.3
+    max_date_shift = 3 * 365
+
+    def __init__(self, path=FIXTURE_PATH, seed=0):
+        """
+        Args:
+            path (str, optional): The scraped records the distributions are read from. Defaults to the fixture.
+            seed (int, optional): The seed of the generator, the same seed generates the same records.
+        """
+        with open(path, 'r') as f:
+            self.templates = [record for record in iter_json_records(f) if record.get('framework_name')]
+        self.random = random.Random(seed)
+
+        self.name_words = [word for record in self.templates for word in record['framework_name'].split()]
+        self.paragraphs = [
+            paragraph for record in self.templates if isinstance(record.get('description'), list)
+            for paragraph in record['description']
+        ]
+        self.lots = [
+            pair for record in self.templates
+            if isinstance(record.get('lot_name'), list) and isinstance(record.get('lot_description'), list)
+            for pair in zip(record['lot_name'], record['lot_description'])
+        ]
+        self.document_kinds = sorted({
+            NUMBER_PATTERN.sub('', name) for record in self.templates for name in record.get('documents') or {}
+        } - {''})
+        self.suppliers = sorted({
+            item for record in self.templates for item in (record.get('suppliers') or {}).items()
+        })
+
+    def sample(self, population, count):
+        return self.random.sample(population, min(count, len(population)))
+
+    def get_name(self, template):
+        words = template['framework_name'].split()
+        return ' '.join(
+            self.random.choice(self.name_words) if self.random.random() < self.word_replacement_rate else word
+            for word in words
+        )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def parse_date(string_date):
+        return datetime.datetime.strptime(string_date, DATE_FORMAT).date()
+
+    def get_dates(self, template):
+        start_date, end_date = self.parse_date(template['start_date']), self.parse_date(template['end_date'])
+        shift = datetime.timedelta(days=self.random.randint(-self.max_date_shift, self.max_date_shift))
+        return (start_date + shift).strftime(DATE_FORMAT), (end_date + shift).strftime(DATE_FORMAT)
+
+    def get_value(self, template):
+        value = int(''.join(filter(str.isdigit, template['framework_value'])))
+        value = round(value * 2 ** self.random.uniform(-1, 1), -5)
+        return f'£{value:,.0f}'
+
+    def get_cpv_code_details(self, template):
+        cpv_code_details = []
+        for cpv in template['cpv_code_details']:
+            codes = cpv.get('other_cpv_codes')
+            cpv_code_details.append({
+                'main_cpv_code': cpv.get('main_cpv_code'),
+                'other_cpv_codes': self.sample(codes, self.random.randint(1, len(codes))) if codes else codes,
+            })
+        return cpv_code_details
+
+    def generate_record(self, index):
+        """
+        Generates the record with the sequence number index.
+
+        Returns:
+            dict: The scraped record.
+        """
+        template = self.random.choice(self.templates)
+        number = f'RM{FIRST_NUMBER + index}'
+        start_date, end_date = self.get_dates(template)
+
+        lot_count = len(template['lot_name']) if isinstance(template.get('lot_name'), list) else 0
+        lots = self.sample(self.lots, lot_count)
+        record = {
+            'category_name': template.get('category_name'),
+            'subcategory': template.get('subcategory'),
+            'framework_name': self.get_name(template),
+            'framework_number': number,
+            'start_date': start_date,
+            'end_date': end_date,
+            'description': self.sample(self.paragraphs, len(template.get('description') or [])),
+            'number_of_lots': str(len(lots)),
+            'lot_name': [name for name, _ in lots],
+            'lot_description': [description for _, description in lots],
+            'documents': {
+                f'{number} {kind}': f'{DOCUMENTS_URL}{number}-{"-".join(kind.split())}.pdf'
+                for kind in self.sample(self.document_kinds, len(template.get('documents') or {}))
+            },
+            'suppliers': dict(self.sample(self.suppliers, len(template.get('suppliers') or {}))),
+        }
+        if template.get('framework_value'):
+            record['framework_value'] = self.get_value(template)
+        if template.get('cpv_code_details'):
+            record['cpv_code_details'] = self.get_cpv_code_details(template)
+        return record
+
+    def generate(self, count, start=0):
+        """
+        Generates count records.
+
+        Args:
+            count (int): The number of records.
+            start (int, optional): The sequence number of the first record, to extend a generated catalog.
+
+        Yields:
+            dict: The scraped records.
+        """
+        for index in range(start, start + count):
+            yield self.generate_record(index)
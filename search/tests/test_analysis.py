@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from search.analysis import analyze_html_strip, stem
+
+
+class AnalysisTests(SimpleTestCase):
+
+    def test_stem(self):
+        for word, expected in [
+            ('consolidated', 'consolid'), ('services', 'servic'), ('printing', 'print'), ('generously', 'generous'),
+            ('supplies', 'suppli'), ('skies', 'sky'), ('management', 'manag'), ('hopping', 'hop'),
+        ]:
+            self.assertEqual(stem(word), expected)
+
+    def test_html_strip_keeps_positions_of_stop_words(self):
+        self.assertEqual(
+            analyze_html_strip('<b>Supply</b> of the Cloud &amp; Printing'),
+            [(0, 'suppli'), (3, 'cloud'), (4, 'print')],
+        )
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from search.autocomplete import AutocompleteIndex
+from search.generation import index_generation
+from search.models import Framework
+from search.signals import framework_indexes
+
+
+class AutocompleteIndexTests(TestCase):
+    """
+    Tests of the autocomplete index against the changes of the frameworks.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.framework = Framework.objects.create(name='Media monitoring', site_name='Site')
+        Framework.objects.create(name='Medical supplies', site_name='Site')
+
+    def setUp(self):
+        self.index = AutocompleteIndex('name')
+        patcher = mock.patch('search.signals.framework_indexes', [*framework_indexes, self.index])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_names(self, query):
+        return [completion['name'] for completion in self.index.complete(query)]
+
+    def test_committed_change_is_applied_without_rebuild(self):
+        self.assertEqual(self.get_names('med'), ['Media monitoring', 'Medical supplies'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.framework.name = 'Media analysis'
+            self.framework.save()
+
+        with mock.patch.object(self.index, 'build_in_background') as build_in_background:
+            self.assertEqual(self.get_names('media'), ['Media analysis'])
+            self.assertEqual(self.get_names('mon'), [])
+        build_in_background.assert_not_called()
+        self.assertEqual(self.index.generation, index_generation.get())
+
+    def test_changes_of_a_transaction_are_applied_together(self):
+        self.get_names('med')
+
+        with mock.patch.object(self.index, 'apply_changes', wraps=self.index.apply_changes) as apply_changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                for framework in Framework.objects.all():
+                    framework.name = f'{framework.name} services'
+                    framework.save()
+
+        apply_changes.assert_called_once()
+        self.assertEqual(self.get_names('med'), ['Media monitoring services', 'Medical supplies services'])
+
+    def test_many_changes_rebuild_in_background(self):
+        self.get_names('med')
+        self.index.max_update_size = 1
+
+        with mock.patch.object(self.index, 'build_in_background') as build_in_background:
+            with self.captureOnCommitCallbacks(execute=True):
+                for framework in Framework.objects.all():
+                    framework.save()
+        build_in_background.assert_called_once()
+
+    def test_change_of_another_process_rebuilds_in_background(self):
+        self.assertEqual(self.get_names('media'), ['Media monitoring'])
+        Framework.objects.filter(id=self.framework.id).update(name='Media analysis')
+        index_generation.bump()
+
+        with mock.patch.object(self.index, 'build_in_background') as build_in_background:
+            # the current index serves until the rebuild is done
+            self.assertEqual(self.get_names('media'), ['Media monitoring'])
+        build_in_background.assert_called_once()
+        self.index.build()
+        self.assertEqual(self.get_names('media'), ['Media analysis'])
+
+    def test_rebuilt_after_max_age_without_shared_cache(self):
+        self.assertEqual(self.get_names('media'), ['Media monitoring'])
+        # changed by another process, whose generation bump this process does not see
+        Framework.objects.filter(id=self.framework.id).update(name='Media analysis')
+
+        with mock.patch.object(self.index, 'build_in_background') as build_in_background:
+            self.get_names('media')
+        build_in_background.assert_not_called()
+
+        self.index.max_age = 0
+        with mock.patch.object(self.index, 'build_in_background') as build_in_background:
+            self.get_names('media')
+        build_in_background.assert_called_once()
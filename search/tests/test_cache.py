@@ -0,0 +1,52 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from search.cache import SearchResultCache
+from search.generation import GENERATION_KEY, get_shared_cache, index_generation
+
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'search': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'search'},
+}
+
+
+@override_settings(CACHES=SHARED_CACHES, SEARCH_SHARED_CACHE='search')
+class SearchResultCacheTests(SimpleTestCase):
+    """
+    Tests of the search result cache against the index generation.
+    """
+
+    def setUp(self):
+        self.cache = SearchResultCache(enabled=True)
+        self.key = SearchResultCache.make_key('frameworks', {'query': 'cloud'})
+
+    def test_result_searched_before_a_change_is_stale(self):
+        generation = index_generation.get()
+        # a framework change is committed while the search runs
+        index_generation.bump()
+        self.cache.set(self.key, ['result'], generation)
+
+        self.assertIsNone(self.cache.get(self.key, index_generation.get()))
+
+    def test_result_is_served_until_a_change(self):
+        generation = index_generation.get()
+        self.cache.set(self.key, ['result'], generation)
+
+        self.assertEqual(self.cache.get(self.key, index_generation.get()), ['result'])
+        self.cache.local.clear()
+        self.assertEqual(self.cache.get(self.key, index_generation.get()), ['result'])
+        index_generation.bump()
+        self.assertIsNone(self.cache.get(self.key, index_generation.get()))
+
+    def test_generations_are_not_reused_after_eviction(self):
+        generation = index_generation.get()
+        self.cache.set(self.key, ['result'], generation)
+        get_shared_cache().delete(GENERATION_KEY)
+
+        self.assertGreater(index_generation.get(), generation)
+        self.assertIsNone(self.cache.get(self.key, index_generation.get()))
+
+    @override_settings(SEARCH_SHARED_CACHE=None, SEARCH_RESULT_CACHE={'ENABLED': True})
+    def test_enabled_without_shared_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            SearchResultCache.from_settings()
@@ -0,0 +1,92 @@
+import uuid
+from unittest import mock
+
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+
+from search.ingestion import FrameworkLoader, FrameworkUpserter, get_site_name
+from search.models import Framework, IndexOutbox, Cpv, Document, LOT, Supplier
+from search.outbox import OUTBOX_SIGNAL_PROCESSOR
+from search.synthetic import SyntheticCatalog
+
+
+@override_settings(ELASTICSEARCH_DSL_AUTOSYNC=True, ELASTICSEARCH_DSL_SIGNAL_PROCESSOR=OUTBOX_SIGNAL_PROCESSOR)
+class FrameworkLoaderTests(TestCase):
+    """
+    Tests of the indexing of the frameworks inserted by the loader.
+    """
+
+    def test_inserted_frameworks_are_added_to_the_outbox(self):
+        FrameworkLoader(batch_size=3).load(SyntheticCatalog(seed=0).generate(5))
+
+        self.assertEqual(
+            sorted(IndexOutbox.objects.values_list('framework_id', flat=True)),
+            sorted(Framework.objects.values_list('id', flat=True)),
+        )
+
+    def test_not_reindexed(self):
+        FrameworkLoader(reindex=False).load(SyntheticCatalog(seed=0).generate(5))
+
+        self.assertEqual(Framework.objects.count(), 5)
+        self.assertFalse(IndexOutbox.objects.exists())
+
+    def test_load_again_skips_saved_frameworks(self):
+        records = list(SyntheticCatalog(seed=0).generate(5))
+        FrameworkLoader(reindex=False).load(records)
+        counts = FrameworkLoader(reindex=False).load(records + records)
+
+        self.assertEqual(Framework.objects.count(), 5)
+        self.assertEqual((counts['Framework'], counts['skipped']), (0, 10))
+
+
+class FrameworkUpserterTests(TestCase):
+    """
+    Tests of the updates of the upserter.
+    """
+
+    def test_replaced_children_send_post_delete(self):
+        records = list(SyntheticCatalog(seed=0).generate(3))
+        FrameworkUpserter(reindex=False).load(records)
+        framework = Framework.objects.get(name=records[0]['framework_name'])
+        children = sum(model.objects.filter(framework=framework).count() for model in (Cpv, Document, LOT, Supplier))
+
+        records[0]['description'] = 'Changed description'
+        handler = mock.Mock()
+        post_delete.connect(handler)
+        self.addCleanup(post_delete.disconnect, handler)
+        counts = FrameworkUpserter(reindex=False).load(records)
+
+        self.assertEqual((counts['updated'], counts['unchanged']), (1, 2))
+        self.assertEqual(handler.call_count, children)
+
+
+class LegacyFrameworkTests(TestCase):
+    """
+    Tests of loading the catalog over the frameworks saved by the previous populate_frameworks, whose
+    site_name ends with a random suffix.
+    """
+
+    def setUp(self):
+        self.records = list(SyntheticCatalog(seed=0).generate(5))
+        for record in self.records:
+            Framework.objects.create(
+                name=record['framework_name'],
+                site_name='_'.join(record['framework_name'].split(' ')) + str(uuid.uuid4())[:10],
+                number=record.get('framework_number'),
+            )
+
+    def test_upsert_updates_legacy_frameworks(self):
+        counts = FrameworkUpserter(reindex=False).load(self.records)
+
+        self.assertEqual((counts['created'], counts['updated'], counts['unavailable']), (0, 5, 0))
+        self.assertEqual(Framework.objects.filter(is_available=True).count(), 5)
+        self.assertEqual(
+            set(Framework.objects.values_list('site_name', flat=True)),
+            {get_site_name(record['framework_name'], record.get('framework_number')) for record in self.records},
+        )
+
+    def test_load_skips_legacy_frameworks(self):
+        counts = FrameworkLoader(reindex=False).load(self.records)
+
+        self.assertEqual((counts['Framework'], counts['skipped']), (0, 5))
+        self.assertEqual(Framework.objects.count(), 5)
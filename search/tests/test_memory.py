@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from search.documents import FrameworkDocument
+from search.memory import InvertedIndex, MemorySearchIndex
+from search.models import Framework
+from search.tests.test_queries import EXCLUDE_UNAVAILABLE
+
+
+class InvertedIndexTests(SimpleTestCase):
+    """
+    Tests of the memory index with query bodies emitted by FrameworkSearchQuery.
+    """
+
+    def setUp(self):
+        self.index = InvertedIndex(FrameworkDocument._doc_type.mapping.to_dict()['properties'], name='frameworks')
+        for framework_id, name, category, start_date, cpvs in [
+            (1, 'Cloud hosting', 'IT', '2022-03-01', [72000000]),
+            (2, 'Clouds of printing services', 'Print', '2023-05-01', []),
+            (3, 'Furniture supply', 'Buildings', '2023-01-01', [39000000]),
+            (4, 'Cloud printing', 'IT', None, [72000000, 79800000]),
+        ]:
+            self.index.add(str(framework_id), {
+                'id': framework_id, 'name': name, 'number': f'RM{framework_id}', 'description': 'Framework',
+                'value_number': framework_id * 1000000, 'industry_or_category': category, 'start_date': start_date,
+                'is_available': framework_id != 3, 'cpvs': [{'code': code} for code in cpvs],
+            })
+
+    def search_ids(self, body):
+        return [hit['_id'] for hit in self.index.search(body)['hits']['hits']]
+
+    def test_match_phrase_excludes_unavailable(self):
+        query = {'bool': {'should': [{'match_phrase': {'name': 'clouds'}}], 'must_not': EXCLUDE_UNAVAILABLE}}
+        self.assertEqual(sorted(self.search_ids({'query': query})), ['1', '2', '4'])
+        self.assertEqual(self.search_ids({'query': {'match_phrase': {'name': 'cloud printing'}}}), ['4'])
+
+    def test_filters_match_any(self):
+        query = {'bool': {'filter': [{'bool': {'should': [
+            {'nested': {'path': 'cpvs', 'query': {'match': {'cpvs.code': '79800000'}}}},
+            {'term': {'industry_or_category': 'Print'}},
+        ]}}]}}
+        self.assertEqual(sorted(self.search_ids({'query': query})), ['2', '4'])
+
+    def test_range(self):
+        query = {'bool': {'filter': [{'range': {'start_date': {'gte': '2023-01-01', 'lte': '2023-12-31'}}}]}}
+        self.assertEqual(sorted(self.search_ids({'query': query})), ['2', '3'])
+        query = {'bool': {'filter': [{'range': {'value_number': {'lte': 2000000}}}]}}
+        self.assertEqual(sorted(self.search_ids({'query': query})), ['1', '2'])
+
+    def test_bool_prefix(self):
+        query = {'multi_match': {
+            'query': 'cloud prin', 'type': 'bool_prefix',
+            'fields': ['name.search_as_you_type', 'name.search_as_you_type._2gram'],
+        }}
+        self.assertEqual(self.search_ids({'query': query})[0], '4')
+
+    def test_facets_ignore_post_filter(self):
+        response = self.index.search({
+            'query': {'match_all': {}},
+            'post_filter': {'term': {'industry_or_category': 'IT'}},
+            'aggs': {'industry_types': {'terms': {'field': 'industry_or_category', 'size': 10}}},
+        })
+        self.assertEqual(response['hits']['total'], {'value': 2, 'relation': 'eq'})
+        self.assertEqual(response['aggregations']['industry_types']['buckets'], [
+            {'key': 'IT', 'doc_count': 2}, {'key': 'Buildings', 'doc_count': 1}, {'key': 'Print', 'doc_count': 1},
+        ])
+
+    def test_search_after(self):
+        body = {'query': {'match_all': {}}, 'size': 3, 'sort': [{'_score': 'desc'}, {'id': 'asc'}]}
+        hits = self.index.search(body)['hits']['hits']
+        self.assertEqual([hit['_id'] for hit in hits], ['1', '2', '3'])
+        self.assertEqual(self.search_ids({**body, 'search_after': hits[-1]['sort']}), ['4'])
+
+    def test_remove(self):
+        self.index.remove('4')
+        self.assertEqual(self.search_ids({'query': {'match': {'name': 'cloud'}}}), ['1', '2'])
+
+    def test_copy_leaves_index_unchanged(self):
+        self.index.sort_appended()
+        copy = self.index.copy()
+        copy.remove('4')
+        copy.add('5', {'id': 5, 'name': 'Cloud storage', 'industry_or_category': 'IT', 'is_available': True})
+
+        query = {'query': {'bool': {'must': [{'match': {'name': 'cloud'}}, {'term': {'industry_or_category': 'IT'}}]}}}
+        self.assertEqual(sorted(self.search_ids(query)), ['1', '4'])
+        self.assertEqual(sorted(hit['_id'] for hit in copy.search(query)['hits']['hits']), ['1', '5'])
+
+
+class MemorySearchIndexTests(TestCase):
+    """
+    Tests of the memory index against the changes of the frameworks.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Framework.objects.bulk_create(
+            Framework(name=f'Cloud hosting {number}', site_name='Site') for number in range(20)
+        )
+
+    def setUp(self):
+        self.index = MemorySearchIndex(FrameworkDocument, prefetch_related=['cpvs'])
+        self.index.build()
+        # the other indexes copy their data too
+        patcher = mock.patch('search.signals.framework_indexes', [self.index])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_changes_of_a_transaction_are_applied_to_one_copy(self):
+        with mock.patch.object(InvertedIndex, 'copy', autospec=True, side_effect=InvertedIndex.copy) as copy:
+            with self.captureOnCommitCallbacks(execute=True):
+                for framework in Framework.objects.all():
+                    framework.name = framework.name.replace('Cloud', 'Edge')
+                    framework.save()
+
+        copy.assert_called_once()
+        response = self.index.lookup({'query': {'match': {'name': 'edge'}}, 'size': 100})
+        self.assertEqual(response['hits']['total']['value'], 20)
+        self.assertEqual(self.index.lookup({'query': {'match': {'name': 'cloud'}}})['hits']['total']['value'], 0)
@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase
+
+from search.models import IndexOutbox
+from search.outbox import OutboxProcessor
+
+
+class OutboxProcessorTests(TestCase):
+    """
+    Tests of the outbox processor with another worker applying the updates of a framework.
+    """
+
+    def setUp(self):
+        # the connection of the other worker
+        self.other = connections.create_connection('default')
+        self.addCleanup(self.other.close)
+
+    def test_frameworks_applied_by_another_worker_are_skipped(self):
+        IndexOutbox.objects.bulk_create([IndexOutbox(framework_id=framework_id) for framework_id in (7, 8, 7)])
+        self.other.set_autocommit(False)
+        with self.other.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(7)')
+
+        processor = OutboxProcessor()
+        with mock.patch.object(processor, 'apply', return_value={}) as apply:
+            self.assertEqual(processor.process_batch(), (1, 0))
+        apply.assert_called_once_with([8])
+        self.assertEqual(list(IndexOutbox.objects.values_list('framework_id', flat=True)), [7, 7])
+
+        self.other.rollback()
+        with mock.patch.object(processor, 'apply', return_value={}) as apply:
+            self.assertEqual(processor.process_batch(), (2, 0))
+        apply.assert_called_once_with([7])
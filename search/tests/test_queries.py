@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from search.compiler import QueryCompiler
+from search.constants import QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICE_SEARCH_ALL
+from search.exceptions import EmptyQueryException
+from search.mixins import FrameworkSearchQuery
+from search.snapshots import PreferenceSet
+
+EXCLUDE_UNAVAILABLE = [{'term': {'is_available': False}}]
+NO_FILTER = {'cpv_code': '', 'industry_category_type': '', 'sub_category': '', 'start_date': None, 'end_date': None}
+
+
+class FrameworkSearchQueryDSLTests(SimpleTestCase):
+    """
+    Golden tests of the query DSL emitted by FrameworkSearchQuery.full_query().
+    """
+
+    def build(self, query_type, value='', preference_frameworks=None, facets=False, **filters):
+        search_query = FrameworkSearchQuery()
+        search_query.request = SimpleNamespace(user=SimpleNamespace(id=1))
+        search_query.framework_value_ranges = {'Under 1M': (None, 1000000), '1M - 5M': (1000000, 5000000)}
+        search_query.preferences = PreferenceSet(
+            ids=frozenset({3, 4, 7}),
+            ids_by_name={'Cloud': frozenset({7, 3}), 'Print': frozenset({4})},
+        )
+        search_query.data = {
+            'query_type': query_type,
+            'query': {'value': value, 'preference_frameworks': preference_frameworks or []},
+            'filter': {**NO_FILTER, **filters},
+            'facets': facets,
+        }
+        return search_query.full_query()
+
+    def test_scoring_query(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_BY_NAME, 'cloud'), {
+            'query': {'bool': {'should': [{'match_phrase': {'name': 'cloud'}}], 'must_not': EXCLUDE_UNAVAILABLE}},
+        })
+
+    def test_value_query_runs_in_filter_context(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_BY_VALUE, '1M - 5M'), {
+            'query': {'bool': {
+                'filter': [{'range': {'value_number': {'gte': 1000000, 'lte': 5000000}}}],
+                'must_not': EXCLUDE_UNAVAILABLE,
+            }},
+        })
+
+    def test_open_value_band(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_BY_VALUE, 'Under 1M'), {
+            'query': {'bool': {
+                'filter': [{'range': {'value_number': {'lte': 1000000}}}],
+                'must_not': EXCLUDE_UNAVAILABLE,
+            }},
+        })
+
+    def test_search_all_keeps_preferences_optional(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_SEARCH_ALL, 'cloud', preference_frameworks=['Cloud']), {
+            'query': {'bool': {'should': [
+                {'multi_match': {'query': 'cloud', 'fields': ['name', 'description', 'number.raw']}},
+                {'constant_score': {'filter': {'terms': {'id': [3, 7]}}}},
+            ], 'must_not': EXCLUDE_UNAVAILABLE}},
+        })
+
+    def test_search_all_number(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_SEARCH_ALL, '42'), {
+            'query': {'bool': {'should': [
+                {'match': {'value_number': 42}},
+                {'multi_match': {
+                    'query': '42', 'fields': ['name', 'description', 'number.raw', 'cpvs.code', 'value_number']
+                }},
+            ], 'must_not': EXCLUDE_UNAVAILABLE}},
+        })
+
+    def test_preferences_only(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_SEARCH_ALL, preference_frameworks=['Cloud', 'Print']), {
+            'query': {'bool': {'filter': [{'terms': {'id': [3, 4, 7]}}], 'must_not': EXCLUDE_UNAVAILABLE}},
+        })
+
+    def test_single_filter(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_BY_NAME, 'cloud', sub_category='Software'), {
+            'query': {'bool': {
+                'should': [{'match_phrase': {'name': 'cloud'}}],
+                'filter': [{'term': {'sub_category': 'Software'}}],
+                'must_not': EXCLUDE_UNAVAILABLE,
+                'minimum_should_match': 1,
+            }},
+        })
+
+    def test_filters_match_any(self):
+        self.assertEqual(
+            self.build(
+                QUERY_TYPE_CHOICE_BY_VALUE, '1M - 5M', cpv_code='72000000', industry_category_type='IT',
+                start_date='2023-01-01', end_date='2027-01-01'
+            ),
+            {
+                'query': {'bool': {'filter': [
+                    {'range': {'value_number': {'gte': 1000000, 'lte': 5000000}}},
+                    {'bool': {'should': [
+                        {'nested': {'path': 'cpvs', 'query': {'match': {'cpvs.code': '72000000'}}}},
+                        {'term': {'industry_or_category': 'IT'}},
+                        {'range': {'start_date': {'gte': '2023-01-01', 'lte': '2023-01-01'}}},
+                        {'range': {'end_date': {'gte': '2027-01-01', 'lte': '2027-01-01'}}},
+                    ]}},
+                ], 'must_not': EXCLUDE_UNAVAILABLE}},
+            }
+        )
+
+    def test_facets_keep_filters_in_post_filter(self):
+        self.assertEqual(
+            self.build(
+                QUERY_TYPE_CHOICE_BY_NAME, 'cloud', facets=True, industry_category_type='IT', sub_category='Cloud'
+            ),
+            {
+                'query': {'bool': {'should': [{'match_phrase': {'name': 'cloud'}}], 'must_not': EXCLUDE_UNAVAILABLE}},
+                'post_filter': {'bool': {'should': [
+                    {'term': {'industry_or_category': 'IT'}},
+                    {'term': {'sub_category': 'Cloud'}},
+                ]}},
+            }
+        )
+
+    def test_facets_without_filters(self):
+        self.assertEqual(self.build(QUERY_TYPE_CHOICE_BY_VALUE, '1M - 5M', facets=True), {
+            'query': {'bool': {
+                'filter': [{'range': {'value_number': {'gte': 1000000, 'lte': 5000000}}}],
+                'must_not': EXCLUDE_UNAVAILABLE,
+            }},
+        })
+
+    def test_empty_query(self):
+        with self.assertRaises(EmptyQueryException):
+            self.build(QUERY_TYPE_CHOICE_SEARCH_ALL, sub_category='Software')
+
+
+class QueryCompilerTests(SimpleTestCase):
+
+    def test_non_scoring_queries_next_to_each_other(self):
+        compiled = QueryCompiler([{'term': {'id': 1}}, {'exists': {'field': 'logo'}}]).compile()
+        self.assertEqual(compiled, {
+            'query': {'bool': {'filter': [
+                {'bool': {'should': [{'term': {'id': 1}}, {'exists': {'field': 'logo'}}]}},
+            ]}},
+        })
+
+    def test_no_query_clause(self):
+        with self.assertRaises(ValueError):
+            QueryCompiler([], [{'term': {'id': 1}}]).compile()
@@ -0,0 +1,109 @@
+from django.test import TestCase
+
+from core.testing import QueryBudget, QueryBudgetMixin
+from search.constants import (
+    BATCH_SEARCH_TYPE_FRAMEWORK, BATCH_SEARCH_TYPE_FRAMEWORK_NAMES, BATCH_SEARCH_TYPE_FRAMEWORK_NUMBERS,
+    QUERY_TYPE_CHOICE_BY_NAME, QUERY_TYPE_CHOICE_BY_NUMBER, QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICE_SEARCH_ALL
+)
+
+
+def search_body(query_type=QUERY_TYPE_CHOICE_SEARCH_ALL, value='framework', **extra):
+    return {'query_type': query_type, 'query': {'value': value}, **extra}
+
+
+class SearchQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Query budgets of the search endpoints. Searches must not reach Elasticsearch with the memory backend.
+    """
+
+    budgets = [
+        QueryBudget('search_framework_values', 1),
+        QueryBudget('filter_form_data', 3),
+        QueryBudget('search_form_data', 2, method='post', data={}, shape='industries'),
+        QueryBudget(
+            'search_form_data', 3, method='post', shape='sub categories',
+            data=lambda test: {'industry_types': [test.framework.industry_or_category]},
+        ),
+        QueryBudget('search_framework', 4, method='post', data=search_body(), max_es_calls=0, shape='search_all'),
+        QueryBudget(
+            'search_framework', 4, method='post', data=search_body(facets=True), max_es_calls=0,
+            shape='search_all with facets',
+        ),
+        QueryBudget(
+            'search_framework', 5, method='post', max_es_calls=0, shape='search_all with preferences',
+            data=lambda test: {
+                'query_type': QUERY_TYPE_CHOICE_SEARCH_ALL,
+                'query': {'value': '', 'preference_frameworks': [test.framework.name]},
+            },
+        ),
+        QueryBudget(
+            'search_framework', 4, method='post', max_es_calls=0, shape='search_all with filter, page 2',
+            data=lambda test: search_body(
+                filter={'industry_category_type': test.framework.industry_or_category}, page=2, results_per_page=5
+            ),
+        ),
+        QueryBudget(
+            'search_framework', 4, method='post', data=search_body(cursor=''), max_es_calls=0, shape='cursor'
+        ),
+        QueryBudget(
+            'search_framework', 5, method='post', max_es_calls=0, shape='by_name',
+            data=lambda test: search_body(QUERY_TYPE_CHOICE_BY_NAME, test.framework.name),
+        ),
+        QueryBudget(
+            'search_framework', 5, method='post', max_es_calls=0, shape='by_number',
+            data=lambda test: search_body(QUERY_TYPE_CHOICE_BY_NUMBER, test.framework.number),
+        ),
+        QueryBudget(
+            'search_framework', 5, method='post', data=search_body(QUERY_TYPE_CHOICE_BY_VALUE, 'Over 10M'),
+            max_es_calls=0, shape='by_value',
+        ),
+        QueryBudget(
+            'search_framework', 1, method='post', data={'query_type': QUERY_TYPE_CHOICE_SEARCH_ALL}, status_code=400,
+            shape='invalid',
+        ),
+        QueryBudget(
+            'framework_details', 5, url_kwargs=lambda test: {'framework_id': test.framework.id},
+            known_issue='FrameworkDetailsAPIView.get() loads the framework, then RetrieveAPIView.get() loads it again',
+        ),
+        QueryBudget(
+            'framework_names', 1, method='post', max_es_calls=0,
+            data=lambda test: {'framework_name': test.framework.name[:4]},
+        ),
+        QueryBudget(
+            'framework_numbers', 1, method='post', max_es_calls=0,
+            data=lambda test: {'framework_number': test.framework.number[:4]},
+        ),
+        QueryBudget(
+            'batch_search', 8, method='post', max_es_calls=0,
+            data=lambda test: {'requests': [
+                {'type': BATCH_SEARCH_TYPE_FRAMEWORK, **search_body()},
+                {'type': BATCH_SEARCH_TYPE_FRAMEWORK, **search_body(QUERY_TYPE_CHOICE_BY_NAME, test.framework.name)},
+                {'type': BATCH_SEARCH_TYPE_FRAMEWORK_NAMES, 'framework_name': test.framework.name[:4]},
+                {'type': BATCH_SEARCH_TYPE_FRAMEWORK_NUMBERS, 'framework_number': test.framework.number[:4]},
+            ]},
+        ),
+        QueryBudget('preferences', 2),
+        QueryBudget(
+            'preferences', 5, method='post', status_code=201,
+            data=lambda test: {'framework_id': test.frameworks[-1].id},
+        ),
+        QueryBudget(
+            'delete_preferences', 4, method='delete', url_kwargs=lambda test: {'framework_id': test.preferences[0].id}
+        ),
+        QueryBudget(
+            'inquiry', 2, method='post',
+            data=lambda test: {'inquiry_description': 'Pricing', 'framework_id': test.framework.id},
+        ),
+        QueryBudget(
+            'async_search_framework', 4, method='post', data=search_body(facets=True), max_es_calls=0,
+            shape='search_all with facets',
+        ),
+        QueryBudget(
+            'async_framework_names', 1, method='post', max_es_calls=0,
+            data=lambda test: {'framework_name': test.framework.name[:4]},
+        ),
+        QueryBudget(
+            'async_framework_numbers', 1, method='post', max_es_calls=0,
+            data=lambda test: {'framework_number': test.framework.number[:4]},
+        ),
+    ]
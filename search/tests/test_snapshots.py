@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from search.models import Framework, Preference
+from search.snapshots import UserPreferenceCache
+from search.tests.test_cache import SHARED_CACHES
+
+
+@override_settings(CACHES=SHARED_CACHES, SEARCH_SHARED_CACHE='search')
+class UserPreferenceCacheTests(TestCase):
+    """
+    Tests of the user preference cache shared by two processes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='user@example.com', password='password')
+        cls.framework = Framework.objects.create(name='Cloud hosting', site_name='Site')
+        Preference.objects.create(user=cls.user, framework=cls.framework)
+
+    def setUp(self):
+        self.cache = UserPreferenceCache()
+        self.other_process_cache = UserPreferenceCache()
+
+    def test_change_in_another_process_is_seen(self):
+        preferences = self.cache.get(self.user.id, names=['Cloud hosting'])
+        self.assertEqual(preferences.ids, {self.framework.id})
+
+        Preference.objects.filter(user=self.user).delete()
+        self.other_process_cache.invalidate(self.user.id)
+
+        with self.assertNumQueries(1):
+            preferences = self.cache.get(self.user.id, names=['Cloud hosting'])
+        self.assertEqual(preferences.ids, frozenset())
+
+    def test_version_changes_with_the_preferences(self):
+        version = self.cache.get(self.user.id).version
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get(self.user.id).version, version)
+
+        self.other_process_cache.invalidate(self.user.id)
+        self.assertNotEqual(self.cache.get(self.user.id).version, version)
+        version = self.cache.get(self.user.id).version
+        self.other_process_cache.invalidate()
+        self.assertNotEqual(self.cache.get(self.user.id).version, version)
@@ -3,7 +3,8 @@ from django.urls import path
 from search.views import (
     FrameworkAPIVIew, FrameworkNamesAPIView, PreferencesAPIView,
     InquiryAPIView, FrameworkValuesAPIView, FrameworkDetailsAPIView,
-    FilterFormDataAPIView, FrameworkNumberAPIView, SearchFormDataAPIView
+    FilterFormDataAPIView, FrameworkNumberAPIView, SearchFormDataAPIView, BatchSearchAPIView,
+    AsyncFrameworkAPIView, AsyncFrameworkNamesAPIView, AsyncFrameworkNumberAPIView
 )
 
 urlpatterns = [
@@ -17,7 +18,13 @@ urlpatterns = [
     path('framework-detail/<int:framework_id>/', FrameworkDetailsAPIView.as_view(), name='framework_details'),
     path('framework-names/', FrameworkNamesAPIView.as_view(), name='framework_names'),
     path('framework-numbers/', FrameworkNumberAPIView.as_view(), name='framework_numbers'),
+    path('batch/', BatchSearchAPIView.as_view(), name='batch_search'),
     path('preferences/', PreferencesAPIView.as_view(), name='preferences'),
     path('preferences/<int:framework_id>/', PreferencesAPIView.as_view(), name='delete_preferences'),
     path('inquiry/', InquiryAPIView.as_view(), name='inquiry'),
+
+    # async data apis, served without blocking a worker thread on the ASGI entry point
+    path('async/framework/', AsyncFrameworkAPIView.as_view(), name='async_search_framework'),
+    path('async/framework-names/', AsyncFrameworkNamesAPIView.as_view(), name='async_framework_names'),
+    path('async/framework-numbers/', AsyncFrameworkNumberAPIView.as_view(), name='async_framework_numbers'),
 ]
@@ -1,9 +1,14 @@
+import base64
+import json
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
-from administrator.models import SearchData, ViewData
-from search.models import Framework
+from administrator.analytics import get_analytics_sink
+from administrator.models import SearchEvent, ViewData
+from search.constants import DEFAULT_IMAGE_PATH
 
 
 def get_model_object(model_class, query):
@@ -20,6 +25,114 @@ def get_model_object(model_class, query):
     return model_class.objects.filter(**query).first()
 
 
+def get_model_objects_in_bulk(model_class, ids, fields=None):
+    """
+    Retrieve the objects of the specified model class matching the given ids using a single query.
+
+    Args:
+        model_class (Model): The model class to retrieve the objects from.
+        ids (list): The primary keys of the objects to retrieve.
+        fields (list, optional): The only fields to load from the database. Defaults to all fields.
+
+    Returns:
+        dict: Mapping of primary key to the retrieved object. Ids which are not found are left out.
+    """
+    queryset = model_class.objects.all()
+    if fields:
+        queryset = queryset.only(*fields)
+    return queryset.in_bulk(ids)
+
+
+async def aget_model_objects_in_bulk(model_class, ids, fields=None):
+    """
+    Async version of get_model_objects_in_bulk().
+    """
+    queryset = model_class.objects.all()
+    if fields:
+        queryset = queryset.only(*fields)
+    return await queryset.ain_bulk(ids)
+
+
+def normalize_query(value):
+    """
+    Normalize a search text by lowercasing it and collapsing whitespace.
+
+    Args:
+        value (str): The search text, may be None.
+
+    Returns:
+        str: The normalized search text.
+    """
+    return ' '.join((value or '').lower().split())
+
+
+def encode_cursor(data):
+    """
+    Encode pagination state into an opaque cursor string.
+
+    Args:
+        data (dict): The JSON serializable pagination state.
+
+    Returns:
+        str: The cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor built by encode_cursor(). An empty cursor is the cursor of the first page.
+
+    Args:
+        cursor (str): The cursor.
+
+    Raises:
+        ValueError: If the cursor is not valid.
+
+    Returns:
+        dict: The pagination state.
+    """
+    if not cursor:
+        return {}
+
+    try:
+        data = json.loads(base64.urlsafe_b64decode(str(cursor).encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError('cursor is not valid') from e
+
+    if not isinstance(data, dict) or not isinstance(data.get('search_after'), list):
+        raise ValueError('cursor is not valid')
+    return data
+
+
+def get_framework_logo_path(logo):
+    """
+    Build the path of a framework logo, falling back to the default framework logo.
+
+    Args:
+        logo (str): The logo path stored on the framework, relative to MEDIA_URL.
+
+    Returns:
+        str: The path of the logo, relative to BACK_END_DOMAIN.
+    """
+    if logo:
+        return settings.MEDIA_URL + logo
+    return DEFAULT_IMAGE_PATH % ''
+
+
+def get_framework_image_url(logo):
+    """
+    Build the absolute url of a framework logo, falling back to the default framework logo.
+
+    Args:
+        logo (str): The logo path stored on the framework, relative to MEDIA_URL.
+
+    Returns:
+        str: The absolute url of the logo.
+    """
+    return settings.BACK_END_DOMAIN + get_framework_logo_path(logo)
+
+
 def send_inquiry_email(user, message, framework):
     """
     Send an inquiry email to the specified user regarding a framework.
@@ -60,18 +173,62 @@ def send_mail(to, template, context):
     msg.send()
 
 
-def search_data(data, user):
+def search_data(framework_data, user, query_data):
     """
-    Store search data in the database for the specified user and frameworks.
+    Record a search of the specified user as one SearchEvent.
+
+    The row is written by the analytics sink, outside the request.
 
     Args:
-        data (list): The search data containing framework information.
+        framework_data (dict): The search result containing total_count and framework information in data.
         user (User): The user associated with the search data.
+        query_data (dict): The validated search query.
 
     Returns:
         None
     """
-    for framework in data:
-        framework_instance = get_model_object(Framework, query={'id': framework.get('framework_id')})
-        SearchData.objects.create(framework=framework_instance, user=user)
+    query = query_data.get('query') or {}
+    filters = {
+        key: value if isinstance(value, str) else str(value)
+        for key, value in (query_data.get('filter') or {}).items() if value
+    }
+    if preference_frameworks := query.get('preference_frameworks'):
+        filters['preference_frameworks'] = sorted(preference_frameworks)
+
+    get_analytics_sink().record(
+        SearchEvent(
+            user=user,
+            query=normalize_query(query.get('value')),
+            query_type=query_data.get('query_type') or '',
+            filters=filters,
+            total_count=framework_data['total_count'],
+            framework_ids=[framework['framework_id'] for framework in framework_data['data']],
+        )
+    )
+
+
+async def asearch_data(framework_data, user, query_data):
+    """
+    Async version of search_data(). The row is recorded in a worker thread only when the analytics sink
+    writes it inside the request.
+    """
+    if get_analytics_sink().run_async:
+        search_data(framework_data, user, query_data)
+    else:
+        await sync_to_async(search_data)(framework_data, user, query_data)
+
 
+def view_data(framework, user):
+    """
+    Record that the specified user viewed the framework details.
+
+    The row is written by the analytics sink, outside the request.
+
+    Args:
+        framework (Framework): The viewed framework.
+        user (User): The user who viewed the framework.
+
+    Returns:
+        None
+    """
+    get_analytics_sink().record(ViewData(framework=framework, user=user))
@@ -1,24 +1,35 @@
+import asyncio
+import contextlib
+
+from asgiref.sync import sync_to_async
 from django.db.models import F, Q
+from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.generics import RetrieveAPIView, ListCreateAPIView, DestroyAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from administrator.models import ViewData
+from core.timing import timed
+from core.views import AsyncAPIView
+from search.async_search import AsyncSearchQueryMixin
+from search.autocomplete import framework_name_index, framework_number_index, is_autocomplete_index_enabled
+from search.batch import BatchSearchQuery
 from search.constants import (
     DEFAULT_RESULTS_PER_PAGE, INQUIRY_EMAIL_SENT,
     PREFERENCE_DELETED, PREFERENCE_CREATED,
-    INVALID_FRAMEWORK_SEARCH
+    INVALID_FRAMEWORK_SEARCH, QUERY_TYPE_CHOICE_BY_VALUE, QUERY_TYPE_CHOICE_SEARCH_ALL
 )
+from search.exceptions import EmptyQueryException
 from search.mixins import FrameworkSearchQuery, ListFrameworkNames, ListFrameworkNumber
-from search.models import FrameworkValue, Framework, Preference
+from search.models import Framework, Preference
 from search.permissions import IsSurveyFilled, IsPreferenceOwner
 from search.serializers import (
     FrameworkDetailSerializer, PreferencesSerializer,
-    InquirySerializer, IndustryTypeSerializers
+    InquirySerializer, IndustryTypeSerializers, BatchSearchSerializer
 )
-from search.utils import send_inquiry_email, search_data
+from search.snapshots import framework_value_ranges, user_preferences
+from search.utils import send_inquiry_email, search_data, asearch_data, view_data
 
 
 class FrameworkAPIVIew(FrameworkSearchQuery, APIView):
@@ -31,7 +42,8 @@ class FrameworkAPIVIew(FrameworkSearchQuery, APIView):
     def post(self, request, *args, **kwargs):
         if self.is_data_valid(data=request.data):
             framework_data = self.get_data()
-            search_data(framework_data['data'], request.user)
+            with timed('analytics'):
+                search_data(framework_data, request.user, self.data)
             return Response(status=status.HTTP_200_OK, data=framework_data)
         return Response(data={'message': INVALID_FRAMEWORK_SEARCH}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -41,10 +53,9 @@ class FrameworkValuesAPIView(APIView):
     This API is used for Populating "Search with value" form
     """
     permission_classes = [IsAuthenticated, IsSurveyFilled]
-    model = FrameworkValue
 
     def get(self, request):
-        data = {"framework_values": self.model.get_values()}
+        data = {"framework_values": list(framework_value_ranges.get())}
         return Response(status=status.HTTP_200_OK, data=data)
 
 
@@ -74,6 +85,32 @@ class FrameworkNumberAPIView(ListFrameworkNumber, APIView):
         return Response(data={'message': INVALID_FRAMEWORK_SEARCH}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BatchSearchAPIView(BatchSearchQuery, APIView):
+    """
+    Runs a batch of framework searches, name and number suggestions with a single Elasticsearch request.
+
+    The body holds the sub-requests in "requests", each one with a "type" (framework, framework_names or
+    framework_numbers) and the data the single endpoint of that type accepts. The response holds, in input
+    order, the status and data the single endpoint would return for every sub-request.
+    """
+    permission_classes = [IsAuthenticated, IsSurveyFilled]
+    serializer_class = BatchSearchSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        with timed('validate'):
+            serializer.is_valid(raise_exception=True)
+
+        responses = []
+        for search_query, response in self.get_batch_data(serializer.validated_data['requests']):
+            if isinstance(search_query, FrameworkSearchQuery) and response['status'] == status.HTTP_200_OK:
+                with timed('analytics'):
+                    search_data(response['data'], request.user, search_query.data)
+            responses.append(response)
+
+        return Response(status=status.HTTP_200_OK, data={'responses': responses})
+
+
 class FrameworkDetailsAPIView(RetrieveAPIView):
     """
     API view for retrieving framework details based on the framework ID.
@@ -99,7 +136,8 @@ class FrameworkDetailsAPIView(RetrieveAPIView):
 
     def get(self, request, *args, **kwargs):
         framework = self.get_object()
-        ViewData.objects.create(framework=framework, user=user)
+        with timed('analytics'):
+            view_data(framework, request.user)
         return super().get(request, *args, **kwargs)
 
 
@@ -290,3 +328,99 @@ class SearchFormDataAPIView(APIView):
             ).values_list('industry_or_category', flat=True).distinct()
 
         return Response(status=status.HTTP_200_OK, data=data)
+
+
+class AsyncFrameworkAPIView(AsyncSearchQueryMixin, FrameworkSearchQuery, AsyncAPIView):
+    """
+    Async version of FrameworkAPIVIew, served on the ASGI entry point.
+
+    The FrameworkValue ranges and preferences the query needs are prefetched concurrently before the
+    validation, which then reads them from the serializer context instead of the database.
+    """
+    permission_classes = [IsAuthenticated, IsSurveyFilled]
+    results_per_page = DEFAULT_RESULTS_PER_PAGE
+
+    async def post(self, request, *args, **kwargs):
+        await self.prefetch_lookups(request.data)
+        if self.is_data_valid(data=request.data):
+            framework_data = await self.aget_data()
+            with timed('analytics'):
+                await asearch_data(framework_data, request.user, self.data)
+            with timed('render'):
+                return JsonResponse(framework_data)
+        return JsonResponse({'message': INVALID_FRAMEWORK_SEARCH}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def prefetch_lookups(self, data):
+        """
+        Loads the framework value ranges and user preferences data needs, concurrently.
+
+        Args:
+            data (dict): The request data, not validated yet.
+        """
+        query_type = data.get('query_type')
+        query = data.get('query') if isinstance(data.get('query'), dict) else {}
+
+        lookups = {}
+        if query_type == QUERY_TYPE_CHOICE_BY_VALUE or data.get('facets'):
+            lookups['framework_value_ranges'] = framework_value_ranges.aget()
+        preference_names = query.get('preference_frameworks')
+        if query_type == QUERY_TYPE_CHOICE_SEARCH_ALL and preference_names and isinstance(preference_names, list):
+            names = [name for name in preference_names if isinstance(name, str)]
+            lookups['preferences'] = user_preferences.aget(self.request.user.id, names=names)
+
+        for name, value in zip(lookups, await asyncio.gather(*lookups.values())):
+            setattr(self, name, value)
+
+    async def aget_data(self):
+        """
+        Async version of FrameworkSearchQuery.get_data().
+        """
+        # may open a point in time with the sync client
+        with timed('query'):
+            await sync_to_async(self.set_pagination)()
+
+        data = []
+        with contextlib.suppress(EmptyQueryException):
+            data = await self.aget_search_data()
+
+        framework_data = self.get_paginated_data(data)
+        await self.aclose_point_in_times()
+        return framework_data
+
+
+class AsyncFrameworkNamesAPIView(AsyncSearchQueryMixin, ListFrameworkNames, AsyncAPIView):
+    """
+    Async version of FrameworkNamesAPIView, served on the ASGI entry point
+    """
+    permission_classes = [IsAuthenticated, IsSurveyFilled]
+
+    async def post(self, request):
+        data = {'name': request.data.get('framework_name')}
+        if self.is_data_valid(data=data):
+            return JsonResponse(await self.aget_data(), safe=False)
+        return JsonResponse({'message': INVALID_FRAMEWORK_SEARCH}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget_data(self):
+        if is_autocomplete_index_enabled() and (
+                completions := await framework_name_index.acomplete(self.data.get('name'))):
+            return completions
+        return await self.aget_search_data()
+
+
+class AsyncFrameworkNumberAPIView(AsyncSearchQueryMixin, ListFrameworkNumber, AsyncAPIView):
+    """
+    Async version of FrameworkNumberAPIView, served on the ASGI entry point
+    """
+    permission_classes = [IsAuthenticated, IsSurveyFilled]
+
+    async def post(self, request):
+        data = {'number': request.data.get('framework_number')}
+        if self.is_data_valid(data=data):
+            return JsonResponse(await self.aget_data(), safe=False)
+        return JsonResponse({'message': INVALID_FRAMEWORK_SEARCH}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def aget_data(self):
+        if is_autocomplete_index_enabled() and (
+                completions := await framework_number_index.acomplete(self.data.get('number'))):
+            return completions
+        return await self.aget_search_data()
@@ -1,3 +1,32 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import QueryBudget, QueryBudgetMixin
+
+
+def survey_body(test):
+    return {
+        **{name: str(option) for name, option in test.survey_options.items()},
+        **{name: [option.name for option in options] for name, options in test.survey_lists.items()},
+    }
+
+
+class SurveyQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Query budgets of the survey endpoints.
+    """
+
+    budgets = [
+        QueryBudget('check_user_survey', 1),
+        QueryBudget(
+            'save_user_survey', 5,
+            known_issue='the survey options are loaded one by one, the survey is read without select_related',
+        ),
+        QueryBudget(
+            'save_user_survey', 15, method='post', data=survey_body,
+            known_issue='GenericListSerializer.validate() loads the options of the lists one by one',
+        ),
+        QueryBudget('survey_form_data', 7),
+        QueryBudget('survey_categories', 2),
+        QueryBudget('survey_industries', 2),
+        QueryBudget('survey_sectors', 2),
+    ]